@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bookmarks_browser reads bookmarks directly from browser profile files
+instead of a bookmarks.html export, so there is no html to pre-process and
+no icon data to strip.
+
+the output is the same list of bookmarks_class.parsedAddress records that
+bookmarks_parse.parse_html returns for an export of the same profile:
+    location is the folder path joined by :: below 'Bookmarks Menu'
+    add_date and last_modified are POSIX seconds as str
+    tags are comma separated, shortcuturl is the keyword
+
+supported files:
+    places.sqlite       Firefox profile database, read with sqlite3
+    Bookmarks           Chromium family (Chrome, Edge, Brave...) profile json,
+                        location is the folder path below 'Bookmarks'
+
+@author: Crumbs
+"""
+import json
+import os
+import sqlite3
+
+import pybookmark.bookmarks_class as bc
+
+
+# firefox root folder guid and the folder name the html export uses
+PLACES_ROOTS = {'menu________': 'Bookmarks Menu',
+                'toolbar_____': 'Bookmarks Toolbar',
+                'unfiled_____': 'Other Bookmarks',
+                'mobile______': 'Mobile Bookmarks'}
+PLACES_ROOT_ORDER = ['menu________', 'toolbar_____', 'unfiled_____',
+                     'mobile______']
+PLACES_TAGS_ROOT = 'tags________'
+PLACES_TYPE_BOOKMARK = 1
+PLACES_TYPE_FOLDER = 2
+# link labels parse_html drops
+PLACES_SKIP_TITLES = ('Recently Bookmarked', 'Recent Tags')
+
+# chromium profile bookmark file names and root folder order
+CHROMIUM_FILES = ('Bookmarks', 'Bookmarks.bak')
+CHROMIUM_ROOT = 'Bookmarks'
+CHROMIUM_ROOT_ORDER = ['bookmark_bar', 'other', 'synced']
+# seconds from 1601-01-01, the chromium time base, to 1970-01-01
+CHROMIUM_EPOCH_DELTA = 11644473600
+
+
+def is_places_file(FILENAME):
+    """ return True if FILENAME is a Firefox places.sqlite database """
+    return os.path.basename(FILENAME).lower() == 'places.sqlite'
+
+
+def places_connect(FILENAME):
+    """
+    open places.sqlite read only. Firefox holds a lock on the database of a
+    running profile, in that case the file is opened as immutable which
+    skips the lock but also changes not yet written from the -wal file.
+
+    Args:
+        FILENAME (str): path to places.sqlite
+    Returns:
+        sqlite3.Connection
+    """
+    uri = 'file:' + os.path.abspath(FILENAME).replace('?', '%3f')
+    try:
+        connection = sqlite3.connect(uri + '?mode=ro', uri=True)
+        connection.execute('SELECT count(*) FROM moz_bookmarks').fetchone()
+    except sqlite3.OperationalError as e:
+        if 'locked' not in str(e):
+            raise
+        connection = sqlite3.connect(uri + '?mode=ro&immutable=1', uri=True)
+    return connection
+
+
+def places_tables(connection):
+    """ return the set of table names in the database """
+    return {row[0] for row in connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def places_seconds(PRTIME):
+    """ firefox PRTime microseconds to the html export seconds string """
+    if PRTIME is None:
+        return None
+    return str(PRTIME // 1000000)
+
+
+def read_places(FILENAME):
+    """
+    Given a Firefox places.sqlite file return the address set. Bookmarks
+    with folders, keywords and tags are each read with a single query and
+    the folder tree is walked in memory in the export order.
+
+    Args:
+        FILENAME (str): path to places.sqlite
+    Returns:
+        (list) of bc.parsedAddress, same as parse_html() output
+    """
+    connection = places_connect(FILENAME)
+    try:
+        tables = places_tables(connection)
+
+        # - folders and bookmarks by parent
+        children = {}   # key = parent id, value = list of rows
+        folder_guid = {}
+        for row in connection.execute(
+                'SELECT b.id, b.type, b.parent, b.position, b.title, '
+                '  b.dateAdded, b.lastModified, b.guid, p.id, p.url '
+                'FROM moz_bookmarks b LEFT JOIN moz_places p ON b.fk = p.id '
+                'WHERE b.type IN (?, ?)',
+                (PLACES_TYPE_BOOKMARK, PLACES_TYPE_FOLDER)):
+            children.setdefault(row[2], []).append(row)
+            if row[1] == PLACES_TYPE_FOLDER:
+                folder_guid[row[0]] = row[7]
+
+        # - tags are folders below the tags root holding a bookmark per url
+        tags = {}       # key = place id, value = list of tag names
+        tags_root = [fid for fid, guid in folder_guid.items()
+                     if guid == PLACES_TAGS_ROOT]
+        for (place_id, tag) in connection.execute(
+                'SELECT b.fk, t.title FROM moz_bookmarks b '
+                'JOIN moz_bookmarks t ON b.parent = t.id '
+                'WHERE t.parent = ? AND b.type = ? ORDER BY t.title',
+                (tags_root[0] if len(tags_root) > 0 else -1,
+                 PLACES_TYPE_BOOKMARK)):
+            tags.setdefault(place_id, []).append(tag)
+
+        keywords = {}   # key = place id, value = keyword
+        if 'moz_keywords' in tables:
+            keywords = dict(connection.execute(
+                'SELECT place_id, keyword FROM moz_keywords'))
+
+        descriptions = {}   # key = bookmark id, value = description
+        if 'moz_items_annos' in tables:
+            # firefox before version 62 kept descriptions as annotations
+            descriptions = dict(connection.execute(
+                'SELECT a.item_id, a.content FROM moz_items_annos a '
+                'JOIN moz_anno_attributes n ON a.anno_attribute_id = n.id '
+                "WHERE n.name = 'bookmarkProperties/description'"))
+    finally:
+        connection.close()
+
+    for rows in children.values():
+        rows.sort(key=lambda row: row[3])
+
+    # - walk the roots like the export: menu contents, then the other roots
+    #   as folders inside the menu
+    root_ids = {folder_guid[fid]: fid for fid in folder_guid
+                if folder_guid[fid] in PLACES_ROOTS}
+    ADDRESS_SET = []
+    stack = []      # [iterator over folder rows, folder path]
+    for guid in reversed(PLACES_ROOT_ORDER):
+        if guid not in root_ids:
+            continue
+        if guid == 'menu________':
+            folders = [PLACES_ROOTS[guid]]
+        else:
+            folders = [PLACES_ROOTS['menu________'], PLACES_ROOTS[guid]]
+        stack.append((iter(children.get(root_ids[guid], [])), folders))
+    while len(stack) > 0:
+        (rows, folders) = stack[-1]
+        row = next(rows, None)
+        if row is None:
+            # folder is done, exit it
+            stack.pop()
+            continue
+        (item_id, item_type, parent, position, title, add_date,
+         last_modified, guid, place_id, url) = row
+        if item_type == PLACES_TYPE_FOLDER:
+            # enter the sub folder, its contents come before the next row
+            stack.append((iter(children.get(item_id, [])),
+                          folders + [title or '']))
+            continue
+        if url is None or title in PLACES_SKIP_TITLES:
+            continue
+        place_tags = tags.get(place_id)
+        ADDRESS_SET.append(bc.parsedAddress(
+            title or 'empty_string',    # same as html_preprocess
+            url,
+            places_seconds(add_date),
+            places_seconds(last_modified),
+            None,
+            keywords.get(place_id),
+            None if place_tags is None else ','.join(place_tags),
+            '::'.join(folders),
+            descriptions.get(item_id)))
+    return ADDRESS_SET
+
+
+def is_chromium_file(FILENAME):
+    """ return True if FILENAME is a Chromium profile Bookmarks json file """
+    return os.path.basename(FILENAME) in CHROMIUM_FILES
+
+
+def chromium_seconds(DATE):
+    """
+    chromium date, microseconds since 1601-01-01 as str, to the html export
+    POSIX seconds string. bookmarks.build_address_struct turns it into
+    AgeAsInt like every other add_date.
+    """
+    if DATE is None or DATE in ('', '0'):
+        return None
+    return str(int(DATE) // 1000000 - CHROMIUM_EPOCH_DELTA)
+
+
+def read_chromium_iter(FILENAME, file_location=None):
+    """
+    Given a Chromium profile Bookmarks json file yield the addresses one at
+    a time, so the output can be passed straight to
+    bookmarks.build_address_struct without building the address list.
+    The json is loaded in one json.load call, the C decoder is faster than
+    any incremental python tokenizer and the nested children are then
+    walked with an explicit stack.
+
+    Args:
+        FILENAME (str): path to the Bookmarks file
+        file_location (str): value for parsedAddress.file_location, default
+            None like the other readers, parse_path sets it
+    Yields:
+        bc.parsedAddress
+    """
+    with open(FILENAME, 'r', encoding='utf-8') as fJson:
+        roots = json.load(fJson)['roots']
+    root_names = [name for name in CHROMIUM_ROOT_ORDER if name in roots]
+    root_names += [name for name in roots 
+                   if name not in CHROMIUM_ROOT_ORDER and 
+                   type(roots[name]) is dict]
+
+    stack = []      # [iterator over folder children, folder path]
+    for name in reversed(root_names):
+        root = roots[name]
+        stack.append((iter([root]), [CHROMIUM_ROOT]))
+    while len(stack) > 0:
+        (nodes, folders) = stack[-1]
+        node = next(nodes, None)
+        if node is None:
+            # folder is done, exit it
+            stack.pop()
+            continue
+        if node.get('type') == 'folder':
+            # enter the folder, its contents come before the next node
+            stack.append((iter(node.get('children', [])),
+                          folders + [node.get('name', '')]))
+            continue
+        if node.get('type') != 'url' or node.get('url') is None:
+            continue
+        yield bc.parsedAddress(
+            node.get('name') or 'empty_string',    # same as html_preprocess
+            node['url'],
+            chromium_seconds(node.get('date_added')),
+            None,
+            None,
+            None,
+            None,
+            '::'.join(folders),
+            None,
+            file_location)
+
+
+def read_chromium(FILENAME):
+    """
+    Given a Chromium profile Bookmarks json file return the address set, see
+    read_chromium_iter
+    
+    Args:
+        FILENAME (str): path to the Bookmarks file
+    Returns:
+        (list) of bc.parsedAddress, same as parse_html() output
+    """
+    return list(read_chromium_iter(FILENAME))
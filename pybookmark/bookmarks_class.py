@@ -16,13 +16,23 @@ completely break existing code
         [3] = location
         [4] = description
         [5] = file location
+        [6] = last modified
+
+    bookmarksColumnar stores the same dictionary by attribute in integer
+    arrays for very large collections
 
 @author: Crumbs
 """
+import array
+import bisect
+from collections.abc import ItemsView, ValuesView
 import datetime
 import json
 import re
 import sys
+from typing import NamedTuple
+
+import pybookmark.bookmarks_json as bj
 
 
 def List_Valid_Element(value, index):
@@ -34,6 +44,25 @@ def List_Valid_Element(value, index):
     else:
         return value
 
+def Tags_Split(value):
+    """ split a TAGS attribute, comma separated tags, into its tags
+    the tags are interned so each distinct tag is stored once however many
+    bookmarks carry it
+    
+    Args:
+        value: a str is split at commas, empty tags are dropped. a str with
+            no comma is one tag. other types are returned as one element
+    Returns:
+        list of tags
+    """
+    if type(value) is not str:
+        return [value]
+    if ',' not in value:
+        return [sys.intern(value)]
+    return [sys.intern(tag.strip()) for tag in value.split(',')
+            if tag.strip() != '']
+
+
 class AgeAsInt():
     """ class for integer value that tracks time; simpler than datetime
     can not use int as super class because int is immutable so this is
@@ -116,6 +145,58 @@ class AgeAsInt():
         self.value = int(datetime.timestamp())
 
 
+class parsedAddress(NamedTuple):
+    """ a single link as parsed from a bookmarks html file, the record that
+    bookmarks_parse passes to bookmarks.build_address_struct()
+    
+    fixed layout so every link has the same fields whether or not it has a
+    description or has been tagged with its file yet. Positions 0 to 7 are
+    the same as the legacy address lists so index access still works.
+    
+    Fields:
+        label (str): link text
+        url (str): href
+        add_date (str): ADD_DATE, the age
+        last_modified (str): LAST_MODIFIED
+        last_charset (str): LAST_CHARSET, not used by the merge
+        shortcuturl (str): SHORTCUTURL, not used by the merge
+        tags (str): TAGS, comma separated, split by set_value of bookmarkAttr
+        location (str): folders joined by ::
+        description (str): DD text, None if the link has no description
+        file_location (str): file the link was parsed from, None until set
+    """
+    label: str
+    url: str
+    add_date: str
+    last_modified: str
+    last_charset: str
+    shortcuturl: str
+    tags: str
+    location: str
+    description: str = None
+    file_location: str = None
+
+    @classmethod
+    def from_list(cls, addrlist):
+        """ convert a legacy address list to parsedAddress
+        
+        Args:
+            addrlist (list|tuple): parsedAddress values or an address list of
+                length 8 (no file), 9 (file) or 10 (description and file)
+        Returns:
+            parsedAddress
+        """
+        if isinstance(addrlist, cls):
+            return addrlist
+        addrlist_len = len(addrlist)
+        if addrlist_len == 9:
+            # description is not defined in this case
+            return cls(*addrlist[0:8], None, addrlist[8])
+        elif addrlist_len in (8, 10):
+            return cls(*addrlist)
+        raise ValueError(f'parsedAddress: can not convert length {addrlist_len} for {addrlist}')
+
+
 class bookmarkAttr(list):
     """ define the basic bookmark attribute data object
     fundamentally a list of lists so inherit from list.
@@ -128,6 +209,10 @@ class bookmarkAttr(list):
         list, just add get_value mod to drop list.
 
     does NOT include the URL by default because stored at a higher level
+
+    each attribute is stored once, as the list element at its fixed offset
+        in bookmark_map_forward, no per instance dict (__slots__ is empty)
+        get_dict builds the name keyed view on request
     
     if want an empty class call with empty (), example: x = bookmarkAttr(())
 
@@ -148,19 +233,23 @@ class bookmarkAttr(list):
         3:'location',
         4:'description',
         5:'file location',
+        6:'last modified',
     }
+    # attributes stored as AgeAsInt, RRR: AgeAsInt
+    bookmark_time_keys = ('age', 'last modified')
     # add the reverse lookup
     bookmark_map_reverse = {}
     for bmk in bookmark_map_forward.keys():
         bookmark_map_reverse[bookmark_map_forward[bmk]] = bmk
     del bmk
+    # no __dict__ per instance, the list is the only storage
+    __slots__ = ()
 
     # use default init
     def __init__(self, *args):
-        self.data = {}
         # print(f'start init yo: {type(args)}::{len(args)}')  # debug
         super().__init__(args[0])
-        self._clean()  # this adds to data and forces all elements to []
+        self._clean()  # this forces all elements to []
 
     # def __str__(self):  # YYY trying to debug json export
     #     return str(list(self))
@@ -179,7 +268,7 @@ class bookmarkAttr(list):
                 'index not valid for bookmark_map_forward').with_traceback(tb)
 
     def _clean(self, overwrite:bool=True):
-        """ force all list elements to type list and adds to data dictionary 
+        """ force all list elements to type list
         uses overwrite by default because called during initialization
         Args:
             overwrite (bool): if True then overwrite the existing value
@@ -191,18 +280,22 @@ class bookmarkAttr(list):
         """ return full attributes that can exist as a list
         undefined attributes are returned as empty list []
         """
+        len_self = len(self)
         data_array = []
         for index in self.bookmark_map_forward.keys():
-            key = self.bookmark_map_forward[index]
-            if key in self.data.keys():
-                data_array.append(self.data[key])
+            if index < len_self:
+                data_array.append(self[index])
             else:
                 data_array.append([])    # RRR: AgeAsInt, default value
         return data_array
 
     def get_dict(self):
-        """ return the defined attributes as a dictionary """
-        return self.data
+        """ return the defined attributes as a dictionary
+        built from the list, values are the stored lists not copies
+        """
+        return {self.bookmark_map_forward[index]: value
+                for index, value in enumerate(self)
+                if index in self.bookmark_map_forward}
 
     def get_value(self, key, age_drop_list=True):
         """ get a specific attribute by name
@@ -213,21 +306,21 @@ class bookmarkAttr(list):
                 if int must be a defined mappable index
                     because list subclass get_value(int) is unlikely to be used
             age_drop_list (bool): if True (default) return first value of
-                list for age key instead of list
+                list for age and last modified keys instead of list
         """
         if type(key) == int:
+            index = key
             # must map to key name
-            key = self.bookmark_map_forward[key]
-        if key not in self.data.keys():
-            return None
+            key = self.bookmark_map_forward[index]
         else:
-            if key == 'age':    # RRR: AgeAsInt, return
-                if age_drop_list and ((type(self.data[key]) is list) and (len(self.data[key]) > 0)):
-                    return self.data[key][0]
-                else:
-                    return self.data[key]
-            else:
-                return self.data[key]
+            index = self.bookmark_map_reverse.get(key)
+        if (index is None) or (index >= len(self)):
+            return None
+        value = self[index]
+        if key in self.bookmark_time_keys:    # RRR: AgeAsInt, return
+            if age_drop_list and ((type(value) is list) and (len(value) > 0)):
+                return value[0]
+        return value
         
     def remove_values(self, drop_values, debug:bool=False, addr:str='parent'):
         """
@@ -258,6 +351,7 @@ class bookmarkAttr(list):
         """ set the value for key|index specified
         
         forces to list, strips strings, replaces None with valid lists
+        and splits comma separated tags, see Tags_Split
 
         Args:
             key (str|int): 
@@ -284,20 +378,24 @@ class bookmarkAttr(list):
             value = []  # force to empty list, RRR: AgeAsInt, default value
         if type(value) == list:
             value = [x for x in value if x is not None]
-            if key == 'age':
+            if key in self.bookmark_time_keys:
                 # RRR: AgeAsInt, force type, all must be Int or errors
                 value = [x if isinstance(x, AgeAsInt) else AgeAsInt(x) for x in value]
             else:
                 # clean string inputs
                 value = [x.strip() if type(x) is str else x for x in value]
+                if key == 'tags':
+                    value = [tag for x in value for tag in Tags_Split(x)]
         else:
-            if key == 'age':
+            if key in self.bookmark_time_keys:
                 # RRR: AgeAsInt, force type, must be Int or errors
                 if not isinstance(value, AgeAsInt):
                     value = AgeAsInt(value)
             else:
                 if type(value) is str:
                     value = value.strip()
+                if key == 'tags':
+                    value = Tags_Split(value)
 
         # print(f'{type(index)}::{index}')  # debug
 
@@ -309,7 +407,6 @@ class bookmarkAttr(list):
                 self.append([]) # RRR: AgeAsInt, default value
             if type(value) != list:
                 value = [value] # RRR: AgeAsInt, list
-            self.data[key] = value
             self.append(value)
         else:
             # already exist so must handle merger
@@ -335,7 +432,6 @@ class bookmarkAttr(list):
                 if type(value) != list:
                     value = [value]  # RRR: AgeAsInt, list
                 self.__setitem__(index, value)
-                self.data[key] = value
             else:
                 # do not replace existing value, must merge
                 #   but only merge unique new values
@@ -348,7 +444,6 @@ class bookmarkAttr(list):
                     if value not in value_now:
                         value_now.append(value)
                 self.__setitem__(index, value_now)
-                self.data[key] = value_now
 
     def set_array_keys(self, **kwargs):
         for key, value in kwargs.items():
@@ -384,7 +479,11 @@ class bookmarkAttr(list):
         """
         bookmark_dict = {}
         for key_index in self.bookmark_map_forward:
-            bookmark_dict[self.bookmark_map_forward[key_index]] = bookmark_list[key_index]
+            if key_index < len(bookmark_list):
+                bookmark_dict[self.bookmark_map_forward[key_index]] = bookmark_list[key_index]
+            else:
+                # written before the attribute existed
+                bookmark_dict[self.bookmark_map_forward[key_index]] = []
         return bookmark_dict
         
     def serialize(self):
@@ -393,16 +492,17 @@ class bookmarkAttr(list):
             then map AgeAsInt to a serializable type
         """
         list_use = self.get_array()
-        age_index = self.bookmark_map_reverse['age'] # 1
-        if isinstance(list_use[age_index], list):
-            # this is expected
-            list_use[age_index] = [str(x) for x in list_use[age_index]]
-            if len(list_use[age_index]) == 1:
-                # de-list the age to match original save and reduce JSON file size
-                list_use[age_index] = list_use[age_index][0]
-        else:
-            # this is to be complete
-            list_use[age_index] = str(list_use[age_index])
+        for key in self.bookmark_time_keys:
+            age_index = self.bookmark_map_reverse[key] # 1 or 6
+            if isinstance(list_use[age_index], list):
+                # this is expected
+                list_use[age_index] = [str(x) for x in list_use[age_index]]
+                if len(list_use[age_index]) == 1:
+                    # de-list the age to match original save and reduce JSON file size
+                    list_use[age_index] = list_use[age_index][0]
+            else:
+                # this is to be complete
+                list_use[age_index] = str(list_use[age_index])
         return list_use
     
     def to_json(self):
@@ -424,10 +524,29 @@ class bookmarks(dict):
     To tidy bookmarks use clean_address_struct and unique
     To search bookmarks use search_address_struct*
     To save bookmarks use write_json
+    
+    tag and time searches use an index built on the first search, see
+    index_build. the methods above clear it, call index_clear after
+    changing a bookmarkAttr in place with set_value
+
+    read_json, Address_Struct_Read and build_address_struct intern the
+    intern_keys values so equal strings share one object, see intern_value
+    and memory_stats
     """
 
+    # attributes whose str values are shared through intern_value
+    intern_keys = ('tags', 'location', 'file location')
+    # write_json writes {schema_key: schema_header(), bookmarks_key: {url:
+    #   value}}, files with a matching header are read without validation,
+    #   see _build_address_struct_trusted. older archives are {url: value}
+    schema_key = 'schema'
+    bookmarks_key = 'bookmarks'
+    schema_version = 1
+
     def __init__(self, *args):
         super().__init__()
+        self.index = None  # see index_build
+        self.interned = {}  # see intern_value
         if len(args) > 0:
             if type(args[0]) is dict:
                 # a dictionary was passed
@@ -451,14 +570,31 @@ class bookmarks(dict):
     #     rep_str = rep_str[:-1] + "}"
     #     return rep_str
     
-    def _build_address_struct_by_dict(self, dict_in:dict):
+    def _build_address_struct_by_dict(self, dict_in:dict, validate:bool=False):
         """ user passed dict, convert to use bookmarks class and bookmark class
         sub-objects 
+        
+        a dict written by write_json, whose schema_key header matches
+        schema_header(), is loaded by _build_address_struct_trusted unless
+        validate is True. everything else goes through set_value
+        
         Args:
             dict_in (dict): dictionary, key = url and value = list of lists
+                or the write_json wrapper of it, see schema_key
+            validate (bool): if True clean every value with set_value even
+                when the header says write_json wrote it. default False
         Returns:
             None, dict_in loaded by add into object
         """
+        header = None
+        if len(dict_in) == 2 and self.schema_key in dict_in and \
+            type(dict_in.get(self.bookmarks_key)) is dict:
+            # written by write_json, not an older {url: value} archive
+            header = dict_in[self.schema_key]
+            dict_in = dict_in[self.bookmarks_key]
+        if (not validate) and (header == self.schema_header()):
+            self._build_address_struct_trusted(dict_in)
+            return
         for url_key in dict_in:
             value = dict_in[url_key]
             # print(f'basbd: {url_key}:::{value}') # debug
@@ -470,21 +606,65 @@ class bookmarks(dict):
                 # list of lists to parse into bookmark_attr object
                 bookmark_attributes = bookmarkAttr(())
                 use_dict = bookmark_attributes.bookmark_list_to_dict(value)
+                for key in self.intern_keys:
+                    use_dict[key] = self.intern_value(use_dict[key])
                 bookmark_attributes.set_array_keys(**use_dict)
                 self.add(url_key, bookmark_attributes)
+
+    def _build_address_struct_trusted(self, dict_in:dict):
+        """ load a dict written by write_json without checking the values
+        
+        the values are the output of bookmarkAttr.serialize so are already
+        clean: strings are stripped, None dropped and tags split. only the
+        times are converted back to AgeAsInt and the intern_keys interned,
+        the lists are put in the bookmarkAttr as they are
+
+        the garbage collector is paused, see bookmarks_json.gc_paused
         
+        Args:
+            dict_in (dict): dictionary, key = url and value = list of lists,
+                the value lists are reused, not copied
+        Returns:
+            None, dict_in loaded by add into object
+        """
+        n_fields = len(bookmarkAttr.bookmark_map_forward)
+        time_indices = [bookmarkAttr.bookmark_map_reverse[key]
+                        for key in bookmarkAttr.bookmark_time_keys]
+        intern_indices = [bookmarkAttr.bookmark_map_reverse[key]
+                          for key in self.intern_keys]
+        setdefault = self.interned.setdefault
+        with bj.gc_paused():
+            for (url_key, value) in dict_in.items():
+                if len(value) < n_fields:
+                    # written before the attribute existed
+                    value = value + [[] for index in range(n_fields - len(value))]
+                for index in time_indices:
+                    # RRR: AgeAsInt, serialize de-lists single times
+                    if type(value[index]) is list:
+                        value[index] = [AgeAsInt(x) for x in value[index]]
+                    else:
+                        value[index] = [AgeAsInt(value[index])]
+                for index in intern_indices:
+                    value[index] = [setdefault(x, x) for x in value[index]]
+                bookmark_attributes = bookmarkAttr(())
+                bookmark_attributes.extend(value)
+                self.add(url_key, bookmark_attributes)
+
     def add(self, url:str, bookmark:bookmarkAttr):
         if url in self:
             tb = sys.exc_info()[2]
             raise KeyError(
                 'dictionary can not add to existing key use replace').with_traceback(tb)
         self[url] = bookmark
+        self.index = None
     
     def delete(self, url:str):
         del self[url]
+        self.index = None
         
     def replace(self, url:str, bookmark:bookmarkAttr):
         self[url] = bookmark
+        self.index = None
             
     def build_address_struct(self, addresses:list):
         """
@@ -492,81 +672,76 @@ class bookmarks(dict):
         merges but does not clean the data generated by parse_html
         
         Args:
-            addresses (list): output of parse_path(), list of lists, each sub-
-                list is an individual bookmark from the files parsed defined as:
-                [0] label
-                [1] url
-                [2] age
-                [3,4,5] must define due to being output of prior process but not used
-                [6] tag
-                [7] location    
-                [8] description, not always defined
-                [8,9] file location
-                
-                note: unlike higher level structure the sub-list elements can
-                    not be lists ie
-                    [a, b, c] where a = list, b = list, c = list but elements
-                    of a, b, and c are not list
+            addresses (iterable): output of parse_path() or one batch of 
+                iter_parse_path(), parsedAddress records, each is an 
+                individual bookmark from the files parsed. legacy address 
+                lists are converted by parsedAddress.from_list()
         Returns:
             modifies core class dictionary definition
         """
+        self.index = None
         match_char = re.compile(r'\w')  # match characters a-z0-9 space etc
         for addrlist in addresses:
+            if type(addrlist) is not parsedAddress:
+                addrlist = parsedAddress.from_list(addrlist)
             # increase read ability by defining variables for information to assign
-            addr_lab = addrlist[0]
-            addr_url = addrlist[1]
-            addr_age = addrlist[2]
-            addr_tag = addrlist[6]
-            addr_loc = addrlist[7].strip()
-            
-            # decide how to handle description (if defined) and file location
-            addrlist_len = len(addrlist)
-            if addrlist_len == 9:
-                addr_dsc = None     # description is not defined in this case
-                addr_fil = addrlist[8]
-            elif addrlist_len == 10:
-                addr_dsc = addrlist[8]
-                addr_fil = addrlist[9]
-            else:
-                addr_dsc = None    # avoid use below
-                addr_fil = None    # avoids use below
-                print(f'Warning: build_address_struct: Unclear how to handle length {addrlist_len} for {addrlist}')
+            addr_lab = addrlist.label
+            addr_url = addrlist.url
+            addr_age = addrlist.add_date
+            addr_mod = addrlist.last_modified
+            if addr_mod in (None, '', []):
+                addr_mod = None
+            elif not isinstance(addr_mod, AgeAsInt):
+                addr_mod = AgeAsInt(addr_mod)
+            addr_tag = addrlist.tags  # split and interned by Tags_Split
+            addr_loc = self.intern_value(addrlist.location.strip())
+            addr_dsc = addrlist.description
+            addr_fil = self.intern_value(addrlist.file_location)
             
             if addr_url in self.keys():
                 # append to the existing address in the address structure
                 # note this only checks the first element being the same
                 #   should technically do "in" for list but instead call
                 #   unique() later so redesigned code behavior matches existing
+                # look up once, bookmarksColumnar builds a row per lookup
+                bookmark_now = self[addr_url]
                 
                 # addrStruct[addr_url][0]   # label append not the same
-                if self[addr_url].get_value('label')[0] != addr_lab:
-                    self[addr_url].set_value('label', addr_lab)
+                if bookmark_now.get_value('label')[0] != addr_lab:
+                    bookmark_now.set_value('label', addr_lab)
              
                 # addrStruct[addr_url][1]   # age keep oldest
                 if addr_age is not None:
-                    if (self[addr_url].get_value('age') is None) or \
-                        (self[addr_url].get_value('age')[0] > addr_age):
-                        self[addr_url].set_value('age', addr_age, overwrite=True)
+                    addr_age_now = bookmark_now.get_value('age')
+                    if (addr_age_now is None) or (len(addr_age_now) == 0) or \
+                        (addr_age_now > AgeAsInt(addr_age)):
+                        bookmark_now.set_value('age', addr_age, overwrite=True)
+                
+                # addrStruct[addr_url][6]   # last modified keep newest
+                if addr_mod is not None:
+                    addr_mod_now = bookmark_now.get_value('last modified')
+                    if (addr_mod_now is None) or (len(addr_mod_now) == 0) or \
+                        (addr_mod_now < addr_mod):
+                        bookmark_now.set_value('last modified', addr_mod, overwrite=True)
                 
-                # addrStruct[addr_url][2]   # tags append not the same
+                # addrStruct[addr_url][2]   # tags append the tags not there
                 if addr_tag is not None:
-                    if len(self[addr_url].get_value('tags'))==0:
-                        self[addr_url].set_value('tags', addr_tag)
-                    elif self[addr_url].get_value('tags')[0] is None:  # replace None
-                        self[addr_url].set_value('tags', addr_tag, overwrite=True)
-                    else:  # append unique values to not None
-                        if self[addr_url].get_value('tags')[0] != addr_tag:
-                            self[addr_url].set_value('tags', addr_tag)
+                    if len(bookmark_now.get_value('tags'))==0:
+                        bookmark_now.set_value('tags', addr_tag)
+                    elif bookmark_now.get_value('tags')[0] is None:  # replace None
+                        bookmark_now.set_value('tags', addr_tag, overwrite=True)
+                    else:  # append unique values to not None, split by set_value
+                        bookmark_now.set_value('tags', addr_tag)
                 
                 # addrStruct[addr_url][3]   # location append not the same
                 if addr_loc is not None:
-                    if len(self[addr_url].get_value('location'))==0:
-                        self[addr_url].set_value('location', addr_loc)
-                    elif self[addr_url].get_value('location')[0] is None:  # replace None
-                        self[addr_url].set_value('location', addr_loc, overwrite=True)
+                    if len(bookmark_now.get_value('location'))==0:
+                        bookmark_now.set_value('location', addr_loc)
+                    elif bookmark_now.get_value('location')[0] is None:  # replace None
+                        bookmark_now.set_value('location', addr_loc, overwrite=True)
                     else:  # append unique values to not None
-                        if self[addr_url].get_value('location')[0] != addr_loc:
-                            self[addr_url].set_value('location', addr_loc)
+                        if bookmark_now.get_value('location')[0] != addr_loc:
+                            bookmark_now.set_value('location', addr_loc)
                 
                 if (addr_dsc is not None and
                     match_char.search(addr_dsc) is None):
@@ -575,23 +750,23 @@ class bookmarks(dict):
                 
                 # addrStruct[addr_url][4]   # description append not the same
                 if addr_dsc is not None:
-                    if len(self[addr_url].get_value('description'))==0:
-                        self[addr_url].set_value('description', addr_dsc)
-                    elif self[addr_url].get_value('description')[0] is None:  # replace None
-                        self[addr_url].set_value('description', addr_dsc, overwrite=True)
+                    if len(bookmark_now.get_value('description'))==0:
+                        bookmark_now.set_value('description', addr_dsc)
+                    elif bookmark_now.get_value('description')[0] is None:  # replace None
+                        bookmark_now.set_value('description', addr_dsc, overwrite=True)
                     else:  # append unique values to not None
-                        if self[addr_url].get_value('description')[0] != addr_dsc:
-                            self[addr_url].set_value('description', addr_dsc)
+                        if bookmark_now.get_value('description')[0] != addr_dsc:
+                            bookmark_now.set_value('description', addr_dsc)
     
                 # addrStruct[addr_url][5]   # file location append not the same
                 if addr_fil is not None:
-                    if len(self[addr_url].get_value('file location'))==0:
-                        self[addr_url].set_value('file location', addr_fil)
-                    elif self[addr_url].get_value('file location')[0] is None:  # replace None
-                        self[addr_url].set_value('file location', addr_fil, overwrite=True)
+                    if len(bookmark_now.get_value('file location'))==0:
+                        bookmark_now.set_value('file location', addr_fil)
+                    elif bookmark_now.get_value('file location')[0] is None:  # replace None
+                        bookmark_now.set_value('file location', addr_fil, overwrite=True)
                     else:  # append unique values to not None
-                        if self[addr_url].get_value('file location')[0] != addr_fil:
-                            self[addr_url].set_value('file location', addr_fil)                
+                        if bookmark_now.get_value('file location')[0] != addr_fil:
+                            bookmark_now.set_value('file location', addr_fil)                
             else:
                 # create address in the address structure
                 new_bookmark = bookmarkAttr(())
@@ -601,10 +776,29 @@ class bookmarks(dict):
                      'tags': [addr_tag],
                      'location': [addr_loc],
                      'description': [addr_dsc],
-                     'file location': [addr_fil]
+                     'file location': [addr_fil],
+                     'last modified': addr_mod
                      }
                     )
                 self.add(addr_url, new_bookmark)
+
+    def build_address_struct_batches(self, batches):
+        """
+        build (and extend) dictionary from a stream of address batches, see
+        build_address_struct. each batch is merged as it arrives and dropped
+        so only one batch is held at a time next to the dictionary.
+        
+        Args:
+            batches (iterable): iterable of address lists, e.g. the generator
+                returned by bookmarks_parse.iter_parse_path()
+        Returns:
+            (int) number of addresses merged
+        """
+        count = 0
+        for addresses in batches:
+            self.build_address_struct(addresses)
+            count += len(addresses)
+        return count
         
     def clean_address_struct(self, emptyContentDropSet:list, debug:bool=False):
         """
@@ -622,8 +816,9 @@ class bookmarks(dict):
         """
         for addr in self.keys():
             self[addr].remove_values(emptyContentDropSet, debug, addr)
+        self.index = None
         
-    def read_json(self, filename):
+    def read_json(self, filename, validate:bool=False, codec=None):
         """
         read addrStruct from json formated file at location filename
         function assumes file exists and will error if not.
@@ -631,33 +826,147 @@ class bookmarks(dict):
         warning this appends any existing dictionary definition by add. it will
             fail if duplicates exist
         
+        files written by write_json are read without validating each value,
+        see _build_address_struct_by_dict
+        
         Args:
             filename (str): string path to read from
+            validate (bool): if True validate the values of files written by
+                write_json too, for a file edited by hand. default False
+            codec (str): bookmarks_json codec name, default None = the
+                fastest installed, see bookmarks_json.codec_get
         Returns:
             None or dictionary addrStruct
             addrStruct (dict): dictionary of url keys with list of list values
                 created by buildAddressStruct
         """
-        with open(filename, 'r') as fJson:
-            json_dict = json.load(fJson)
-            self._build_address_struct_by_dict(json_dict)
+        json_dict = bj.json_load(filename, codec=codec)
+        self._build_address_struct_by_dict(json_dict, validate=validate)
         
+    def index_build(self):
+        """
+        build the lookup tables search_address_struct uses for tags and the
+        time attributes, stored in self.index until a change clears it
+            'position': key = url, value = position in the dictionary
+            'tags': key = tag, value = list of urls with the tag
+            'age', 'last modified': (sorted times, urls in the same order)
+                the first time of each bookmark as an int, for bisect
+        """
+        position = {}
+        tags = {}
+        times = {key: [] for key in bookmarkAttr.bookmark_time_keys}
+        for (index, (url, bookmark)) in enumerate(self.items()):
+            position[url] = index
+            for tag in bookmark.get_value('tags') or []:
+                if type(tag) is str:
+                    tags.setdefault(tag, []).append(url)
+            for key in times:
+                time_now = bookmark.get_value(key)
+                if time_now is not None and len(time_now) > 0:
+                    times[key].append((time_now.get_value(), index, url))
+        self.index = {'position': position, 'tags': tags}
+        for key in times:
+            times[key].sort()
+            self.index[key] = ([x[0] for x in times[key]],
+                               [x[2] for x in times[key]])
+        return self.index
+
+    def index_clear(self):
+        """ drop the index, see index_build, after changing a bookmark """
+        self.index = None
+
+    def index_order(self, found, url_list=None):
+        """ return the urls found by an index lookup in url_list order, or
+        dictionary order if url_list is None, like a scan would find them """
+        if url_list is None:
+            return sorted(set(found), key=self.index['position'].__getitem__)
+        found = set(found)
+        return [addr for addr in url_list if addr in found]
+
+    def intern_value(self, value):
+        """
+        return the str equal to value already stored by this dictionary so
+        repeated locations, tags and file locations are one object instead
+        of one per bookmark. the table lives as long as the dictionary,
+        unlike sys.intern
+        
+        Args:
+            value: a str, or a list whose str elements are interned. other
+                types are returned unchanged
+        Returns:
+            value or the equal str already in self.interned
+        """
+        setdefault = self.interned.setdefault
+        if type(value) is list:
+            return [setdefault(x, x) if type(x) is str else x for x in value]
+        if type(value) is not str:
+            return value
+        return setdefault(value, value)
+
+    def memory_stats(self):
+        """
+        report how many str objects the attribute values use and the bytes
+        sharing equal values saves, see intern_value
+        
+        Returns:
+            (dict) key = attribute name or 'total', value = dict of
+                'values': number of str values in the attribute
+                'objects': number of distinct str objects among them
+                'bytes': sys.getsizeof of the distinct objects
+                'bytes_unshared': sys.getsizeof of every value, the size
+                    if each value were its own object
+                'bytes_saved': bytes_unshared - bytes
+            'total' also has 'interned', the number of values in the
+                intern table
+        """
+        keys = [key for key in bookmarkAttr.bookmark_map_forward.values()
+                if key not in bookmarkAttr.bookmark_time_keys]
+        stats = {}
+        objects = {key: {} for key in keys}  # id: size
+        for key in keys:
+            stats[key] = {'values': 0, 'bytes_unshared': 0}
+        for bookmark in self.values():
+            for key in keys:
+                for value in bookmark.get_value(key) or []:
+                    if type(value) is not str:
+                        continue
+                    size = sys.getsizeof(value)
+                    stats[key]['values'] += 1
+                    stats[key]['bytes_unshared'] += size
+                    objects[key][id(value)] = size
+        for key in keys:
+            stats[key]['objects'] = len(objects[key])
+            stats[key]['bytes'] = sum(objects[key].values())
+            stats[key]['bytes_saved'] = stats[key]['bytes_unshared'] - stats[key]['bytes']
+        stats['total'] = {name: sum(stats[key][name] for key in keys)
+                          for name in ('values', 'objects', 'bytes',
+                                       'bytes_unshared', 'bytes_saved')}
+        stats['total']['interned'] = len(self.interned)
+        return stats
+
     def search_address_struct(self, pattern, element, ignore_case=False, url_list=None):
         """
         search for pattern in element
         
+        tags and times are looked up in the index, see index_build: a tag
+        pattern is only tested against each distinct tag once and a time
+        range is a bisect of the sorted times
+        
         Args:
             pattern (str): string pattern to pass to re to use for search
-                if element == 1 then treats ># or <# as: age > #   or   age < #
+                if element == 1 or 6 then treats ># or <# as:
+                    time > #   or   time < #, # in POSIX seconds
+                    any other pattern prints why and returns []
             element (int|str): integer element to search, matches attribute mapping
                 for the bookmarkAttr class. mapped to int if attribute string passed 
                  [-1] = search addresses themselves
                  [0] = label
                  [1] = age
-                 [2] = tags
+                 [2] = tags, each tag is searched on its own
                  [3] = location
                  [4] = description
                  [5] = file location
+                 [6] = last modified
             ignore_case (bool): if True pass re.IGNORECASE to regex
                 default = False
             url_list (list): list of urls to use, ie a subset of the defined
@@ -676,23 +985,41 @@ class bookmarks(dict):
             if element != -1:
                 element_str = y.bookmark_map_forward[element]
         
-        if url_list is None:
-            url_list = self.keys()
+        if self.index is None and element in (1, 2, 6):
+            self.index_build()
         
         found_list = []
-        if element == 1:
-            # checks age
+        if element in (1, 6):
+            # checks age or last modified
+            (times, urls) = self.index[element_str]
+            if pattern[0:1] not in ('>', '<'):
+                print(f'search_address_struct: {element_str} pattern must '
+                      f'be ># or <#, not: {pattern}')
+                return found_list
+            try:
+                time_now = int(pattern[1:].strip())
+            except ValueError:
+                print(f'search_address_struct: {element_str} pattern time '
+                      f'must be an integer in POSIX seconds, not: {pattern}')
+                return found_list
             if pattern[0] == '>':
-                pattern = pattern[1:].strip()
-                for addr in url_list:
-                    if self[addr].get_value('age')[0] > pattern:
-                        found_list.append(addr)
-            elif pattern[0] == '<':
-                pattern = pattern[1:].strip()
-                for addr in url_list:
-                    if self[addr].get_value('age')[0] < pattern:
-                        found_list.append(addr)
+                found_list = urls[bisect.bisect_right(times, time_now):]
+            else:
+                found_list = urls[0:bisect.bisect_left(times, time_now)]
+            found_list = self.index_order(found_list, url_list)
+        elif element == 2:
+            if ignore_case:
+                repc = re.compile(pattern, flags=re.IGNORECASE)
+            else:
+                repc = re.compile(pattern)
+            for (tag, urls) in self.index['tags'].items():
+                if repc.search(tag) is not None:
+                    found_list.extend(urls)
+            found_list = self.index_order(found_list, url_list)
         else:
+            if url_list is None:
+                url_list = self.keys()
+            
             if ignore_case:
                 repc = re.compile(pattern, flags=re.IGNORECASE)
             else:
@@ -804,6 +1131,12 @@ class bookmarks(dict):
         
         return list(set(found_list))
 
+    def schema_header(self):
+        """ return the header write_json writes under schema_key, the version
+        and the attribute names in list order """
+        return {'version': self.schema_version,
+                'fields': list(bookmarkAttr.bookmark_map_forward.values())}
+
     def serialize(self):
         """ serialize values to allow json to work 
         this converts AgeAsInt to a JSON serializable type
@@ -829,24 +1162,31 @@ class bookmarks(dict):
        """
        for url in self.keys():
            self[url].unique()
+       self.index = None
 
-    def write_json(self, filename, indent=None):
+    def write_json(self, filename, indent=None, codec=None):
         """
         write bookmark address structure to filename as a json formatted file
         function assumes path directory structure exists and will error if not
         
-        the addrStruct is a list of url keys with list of list values
+        the file is {schema_key: schema_header(), bookmarks_key: addrStruct},
+        addrStruct is url keys with list of list values. the header lets
+        read_json skip validating the values. the file is utf-8 and the
+        same bytes with every codec, see bookmarks_json
         
         Args:
             filename (str): string path to write to
             indent (int): if not None (default), prints pretty json output using
                 value as the number of spaces to indent children. pretty is not a
                 default because makes output files bigger. suggested indent=2
+            codec (str): bookmarks_json codec name, default None = the
+                fastest installed, see bookmarks_json.codec_get
         Returns:
             None.
         """
-        with open(filename, 'w') as fJson:
-            json.dump(self.serialize(), fJson, indent=indent)
+        json_dict = {self.schema_key: self.schema_header(),
+                     self.bookmarks_key: self.serialize()}
+        bj.json_dump(json_dict, filename, indent=indent, codec=codec)
 
     
     #
@@ -866,26 +1206,25 @@ class bookmarks(dict):
                 caveat: because only single values are expected in how
                     the output is used, function drops list to first element
         Returns:
-            address (list): output a single addressparse_path(), list of lists, each sub-
-                list is an individual bookmark from the files parsed defined as:
-                [0] label
-                [1] url
-                [2] age
-                [3,4,5] must define due to being output of prior process but not used
-                [6] tag
-                [7] location
-                [8] description, not always defined
-                [8,9] file location
-        """
-        return [List_Valid_Element(bookmark.get_value('label'), 0),
-                url,
-                List_Valid_Element(bookmark.get_value('age'), 0),
-                [], [], [],
-                List_Valid_Element(bookmark.get_value('tags'), 0),
-                List_Valid_Element(bookmark.get_value('location'), 0),
-                List_Valid_Element(bookmark.get_value('description'), 0),
-                List_Valid_Element(bookmark.get_value('file location'), 0)
-                ]
+            address (parsedAddress): a single address as output by parse_path()
+                last_charset and shortcuturl are not kept by bookmarkAttr so
+                are [], the tags are joined with commas like the TAGS
+                attribute
+        """
+        tags = bookmark.get_value('tags')
+        if isinstance(tags, list) and len(tags) > 0:
+            tags = ','.join(str(tag) for tag in tags)
+        return parsedAddress(
+            label=List_Valid_Element(bookmark.get_value('label'), 0),
+            url=url,
+            add_date=List_Valid_Element(bookmark.get_value('age'), 0),
+            last_modified=List_Valid_Element(bookmark.get_value('last modified'), 0),
+            last_charset=[], shortcuturl=[],
+            tags=tags,
+            location=List_Valid_Element(bookmark.get_value('location'), 0),
+            description=List_Valid_Element(bookmark.get_value('description'), 0),
+            file_location=List_Valid_Element(bookmark.get_value('file location'), 0)
+            )
     
     @staticmethod
     def Address_Struct_Compare(addrStruct1, addrStruct2, verbose = False):
@@ -997,17 +1336,341 @@ class bookmarks(dict):
             return bookmarks(addrStructNew)
        
     @staticmethod 
-    def Address_Struct_Read(filename):
+    def Address_Struct_Read(filename, columnar=False, validate=False, codec=None):
         """
         read addrStruct from json formated file at location filename
         function assumes file exists and will error if not.
         
         Args:
             filename (str): string path to read from
+            columnar (bool): if True return a bookmarksColumnar, for very
+                large files. default False
+            validate (bool): if True validate every value even for files
+                written by write_json, see read_json. default False
+            codec (str): bookmarks_json codec name, see read_json
         Returns:
             None or bookmarks class dictionary addrStruct object
         """
-        addrStruct = None
-        with open(filename, 'r') as fJson:
-            addrStruct = bookmarks(json.load(fJson))
+        if columnar:
+            addrStruct = bookmarksColumnar()
+        else:
+            addrStruct = bookmarks()
+        addrStruct.read_json(filename, validate=validate, codec=codec)
         return addrStruct
+
+
+class bookmarkRow(bookmarkAttr):
+    """ bookmarkAttr read from a bookmarksColumnar row
+
+    set_value writes the row back to the store so in place edits like
+    addrStruct[url].set_value() work as they do on a bookmarks dictionary.
+    changing the lists directly is not written back, use set_value or replace
+    """
+
+    __slots__ = ('_store', '_url')
+
+    def __init__(self, *args):
+        self._store = None
+        self._url = None
+        super().__init__(*args)
+
+    def set_value(self, key, value, overwrite:bool=False):
+        super().set_value(key, value, overwrite=overwrite)
+        if self._store is not None:
+            # only the attribute set is written back
+            if type(key) != int:
+                key = self.bookmark_map_reverse[key]
+            self._store.row_write(self._url, self, index=key)
+
+
+class bookmarkColumn():
+    """ one bookmarkAttr attribute of every bookmarksColumnar row
+
+    row n holds count[n] values from values[start[n]]. a row rewritten with
+    the values it has is not changed. a row rewritten with no more values
+    than it had is written in place, else its values are appended and the
+    old ones are left until bookmarksColumnar.compact
+
+    kind:
+        'time': values are the AgeAsInt integers, int64
+        'table': values are ids into table, equal values share one id
+        'list': values are ids into table, a value new to the row gets a
+            new id, for attributes that are rarely the same like label.
+            values the row already has keep their id
+
+    Args:
+        kind (str): 'time', 'table' or 'list'
+    """
+
+    def __init__(self, kind:str):
+        if kind not in ('time', 'table', 'list'):
+            raise ValueError(f'bookmarkColumn: unknown kind {kind}')
+        self.kind = kind
+        self.start = array.array('I')
+        self.count = array.array('I')
+        self.values = array.array('q' if kind == 'time' else 'I')
+        self.table = None if kind == 'time' else []
+        self.table_ids = {} if kind == 'table' else None
+
+    def __len__(self):
+        return len(self.start)
+
+    def append(self, value:list):
+        """ add a row of values and return its row number """
+        return self.append_codes(self.encode(value))
+
+    def append_codes(self, codes:list):
+        """ add a row of values already encoded and return its row number
+        start is appended last, if an append fails the row does not exist
+        """
+        start = len(self.values)
+        self.values.extend(codes)
+        self.count.append(len(codes))
+        self.start.append(start)
+        return len(self.start) - 1
+
+    def codes(self, row:int):
+        """ return the stored values (ids or integers) of row """
+        start = self.start[row]
+        return self.values[start:start + self.count[row]]
+
+    @staticmethod
+    def table_key(value):
+        """ key of value in table_ids, type in the key for non str so 1,
+        1.0 and True stay apart """
+        return value if type(value) is str else (type(value), value)
+
+    def encode(self, value:list, codes_now=None):
+        """ convert attribute values to the stored integers
+        Args:
+            value (list): attribute values
+            codes_now (iterable): for 'list' columns the ids of the row
+                being rewritten, its values are not added to table again
+        """
+        if self.kind == 'time':
+            return [x.get_value() if isinstance(x, AgeAsInt) else int(x)
+                    for x in value]
+        if self.kind == 'list':
+            table_ids = {self.table_key(self.table[code]): code
+                         for code in (codes_now or [])}
+        else:
+            table_ids = self.table_ids
+        codes = []
+        for x in value:
+            key = self.table_key(x)
+            code = table_ids.get(key)
+            if code is None:
+                code = len(self.table)
+                table_ids[key] = code
+                self.table.append(x)
+            codes.append(code)
+        return codes
+
+    def read(self, row:int):
+        """ return the attribute values of row as a new list """
+        if self.kind == 'time':
+            return [AgeAsInt(x) for x in self.codes(row)]
+        table = self.table
+        return [table[x] for x in self.codes(row)]
+
+    def write(self, row:int, value:list):
+        """ replace the attribute values of row """
+        codes_now = self.codes(row)
+        codes = self.encode(value, codes_now)
+        if codes == codes_now.tolist():
+            return
+        if len(codes) <= self.count[row]:
+            start = self.start[row]
+            self.values[start:start + len(codes)] = array.array(self.values.typecode, codes)
+        else:
+            self.start[row] = len(self.values)
+            self.values.extend(codes)
+        self.count[row] = len(codes)
+
+
+class bookmarksColumnar(bookmarks):
+    """ bookmarks stored by attribute instead of as a bookmarkAttr per url
+
+    for collections of a million or more bookmarks. each attribute is a
+    bookmarkColumn of integer arrays, the urls map to row numbers in rows.
+    tags, locations and file locations are ids into tables of the distinct
+    values, age and last modified are int64 arrays. there is no python
+    object per bookmark other than the url and its row number
+
+    works as a bookmarks dictionary, addrStruct[url] returns a bookmarkRow
+    built from the row, setting it encodes the bookmarkAttr into the row.
+    a bookmarkRow writes set_value back to the store, lists changed in
+    place are not. searches of label, location, description and file
+    location test each distinct value once instead of every bookmark
+
+    deleted and grown rows leave unused values, see compact
+
+    json.dump of the object itself writes {}, use write_json or serialize
+    like for bookmarks
+    """
+
+    # bookmarkColumn kind of each bookmarkAttr.bookmark_map_forward index
+    column_kinds = {
+        0:'list',
+        1:'time',
+        2:'table',
+        3:'table',
+        4:'list',
+        5:'table',
+        6:'time',
+    }
+
+    def __init__(self, *args):
+        self.rows = {}  # key = url, value = row number in the columns
+        self.columns = {index: bookmarkColumn(kind)
+                        for (index, kind) in self.column_kinds.items()}
+        super().__init__(*args)
+
+    def __contains__(self, url):
+        return url in self.rows
+
+    def __delitem__(self, url):
+        del self.rows[url]
+
+    def __eq__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        return len(self) == len(other) and \
+            all(url in other and other[url] == value for (url, value) in self.items())
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __getitem__(self, url):
+        row = self.rows[url]
+        bookmark = bookmarkRow(())
+        # values in the columns are already clean, skip set_value
+        bookmark.extend(self.columns[index].read(row) for index in self.columns)
+        bookmark._store = self
+        bookmark._url = url
+        return bookmark
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self.items())!r})'
+
+    def __setitem__(self, url, bookmark):
+        if not isinstance(bookmark, bookmarkAttr):
+            bookmark = bookmarkAttr(bookmark)
+        row = self.rows.get(url)
+        if row is None:
+            # encode every column first, a value that can not be stored
+            #   leaves all columns without the row
+            codes = [(column, column.encode(bookmark[index]
+                                            if index < len(bookmark) else []))
+                     for (index, column) in self.columns.items()]
+            for (column, column_codes) in codes:
+                row = column.append_codes(column_codes)
+            self.rows[url] = row
+        else:
+            self.row_write(url, bookmark)
+
+    def clear(self):
+        self.rows = {}
+        self.columns = {index: bookmarkColumn(kind)
+                        for (index, kind) in self.column_kinds.items()}
+        self.index = None
+        self.interned = {}
+
+    def compact(self):
+        """ rewrite the columns with only the values of the current rows
+        drops the values left by delete and by rows that grew, and the table
+        values no row uses any more. row numbers follow dictionary order
+        """
+        columns = {index: bookmarkColumn(kind)
+                   for (index, kind) in self.column_kinds.items()}
+        rows = {}
+        for (url, row) in self.rows.items():
+            for index in columns:
+                rows[url] = columns[index].append(self.columns[index].read(row))
+        self.rows = rows
+        self.columns = columns
+
+    def copy(self):
+        new_store = type(self)()
+        for (url, bookmark) in self.items():
+            new_store[url] = bookmark
+        return new_store
+
+    def get(self, url, default=None):
+        if url in self.rows:
+            return self[url]
+        return default
+
+    def items(self):
+        return ItemsView(self)
+
+    def keys(self):
+        return self.rows.keys()
+
+    def pop(self, url, *default):
+        if url not in self.rows:
+            if default:
+                return default[0]
+            raise KeyError(url)
+        bookmark = self[url]
+        del self[url]
+        return bookmark
+
+    def row_write(self, url, bookmark, index=None):
+        """ write the attributes of bookmark to the row of url
+        Args:
+            url (str): url of the row
+            bookmark (bookmarkAttr): attributes to write
+            index (int): attribute to write, None (default) writes all
+        """
+        row = self.rows[url]
+        indices = self.columns if index is None else [index]
+        for index in indices:
+            self.columns[index].write(
+                row, bookmark[index] if index < len(bookmark) else [])
+
+    def search_address_struct(self, pattern, element, ignore_case=False, url_list=None):
+        """
+        search for pattern in element, see bookmarks.search_address_struct
+        label, location, description and file location test the pattern
+        against each table value once and then compare the row ids
+        """
+        index = bookmarkAttr.bookmark_map_reverse.get(element, element)
+        if index not in (0, 3, 4, 5):
+            return super().search_address_struct(pattern, element,
+                                                 ignore_case=ignore_case,
+                                                 url_list=url_list)
+        if ignore_case:
+            repc = re.compile(pattern, flags=re.IGNORECASE)
+        else:
+            repc = re.compile(pattern)
+        column = self.columns[index]
+        found_codes = {code for (code, value) in enumerate(column.table)
+                       if type(value) is str and repc.search(value) is not None}
+        if url_list is None:
+            url_list = self.rows.keys()
+        found_list = []
+        for addr in url_list:
+            for code in column.codes(self.rows[addr]):
+                if code in found_codes:
+                    found_list.append(addr)
+        return found_list
+
+    def setdefault(self, url, default=None):
+        if url not in self.rows:
+            self[url] = default
+        return self[url]
+
+    def update(self, *args, **kwargs):
+        for (url, bookmark) in dict(*args, **kwargs).items():
+            self[url] = bookmark
+
+    def values(self):
+        return ValuesView(self)
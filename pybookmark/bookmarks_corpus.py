@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bookmarks_corpus generates synthetic Netscape format bookmark exports
+
+the output looks like a Firefox bookmarks.html export and is deterministic
+for a given set of parameters and seed, so parse results and benchmark
+numbers can be compared between runs and machines.
+
+    link count          number of <A> links, 1k to 1M are practical
+    folder depth        maximum folder nesting below the root folder
+    description ratio   fraction of links followed by a <DD> description
+    icon bytes          size of the ICON data-uri of every link
+    emoji ratio         fraction of labels that contain an emoji
+
+every link is parsed to exactly one address by parse_html, folders are
+never empty so the empty folder placeholder link is never added.
+
+example:
+    >>> import pybookmark.bookmarks_corpus as corpus
+    >>> corpus.corpus_write('bookmarks_100k.html', n_links=100000, depth=6)
+
+@author: Crumbs
+"""
+import random
+
+
+# emoji used in labels, all are removed by bookmarks_parse.html_preprocess
+CORPUS_EMOJI = ['\U0001F600', '\U0001F680', '\U0001F4DA', '☀', '❤',
+                '\U0001F1FA\U0001F1F8', '⚠️']
+CORPUS_WORDS = ['python', 'recipe', 'news', 'linux', 'garden', 'travel',
+                'music', 'science', 'bike', 'finance', 'docs', 'video',
+                'weather', 'history', 'kids', 'maps']
+CORPUS_HEADER = [
+    '<!DOCTYPE NETSCAPE-Bookmark-file-1>',
+    '<!-- This is an automatically generated file.',
+    '     It will be read and overwritten.',
+    '     DO NOT EDIT! -->',
+    '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">',
+    '<TITLE>Bookmarks</TITLE>',
+    '<H1>Bookmarks Menu</H1>',
+    '',
+    '<DL><p>']
+
+
+def corpus_lines(n_links=1000, depth=4, dd_ratio=0.1, icon_bytes=0,
+                 emoji_ratio=0.0, folder_links=25, seed=350):
+    """
+    generate the lines of a synthetic bookmarks.html file
+
+    Args:
+        n_links (int): number of links
+        depth (int): maximum folder depth below the root folder, 0 = no folders
+        dd_ratio (float): 0 to 1, fraction of links with a <DD> description
+        icon_bytes (int): length of the ICON data-uri of each link, 0 = none
+        emoji_ratio (float): 0 to 1, fraction of labels with an emoji
+        folder_links (int): average number of links before a folder is
+            entered or left
+        seed (int): random seed, same parameters and seed = same output
+    Yields:
+        (str) line of the file including the newline
+    """
+    if n_links < 0 or depth < 0 or icon_bytes < 0 or folder_links < 1:
+        raise ValueError('corpus_lines: n_links, depth, icon_bytes must be >= 0 '
+                         'and folder_links >= 1')
+    if not (0 <= dd_ratio <= 1 and 0 <= emoji_ratio <= 1):
+        raise ValueError('corpus_lines: dd_ratio and emoji_ratio must be 0 to 1')
+
+    rand = random.Random(seed)
+    icon = ''
+    if icon_bytes > 0:
+        icon_head = 'data:image/png;base64,'
+        icon_body = ''.join(rand.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdef0123456789+/')
+                            for i in range(max(icon_bytes - len(icon_head), 0)))
+        icon = f' ICON="{icon_head}{icon_body}"'
+
+    for line in CORPUS_HEADER:
+        yield line + '\n'
+
+    level = 0           # current folder depth
+    level_links = [0]   # number of links in each open folder
+    n_folders = 0
+    for i in range(n_links):
+        indent = '    ' * (level + 1)
+        if level < depth and level_links[-1] > 0 and rand.random() < 1 / folder_links:
+            # enter a new folder
+            n_folders += 1
+            age = 1500000000 + i * 37
+            yield (f'{indent}<DT><H3 ADD_DATE="{age}" LAST_MODIFIED="{age}">'
+                   f'{rand.choice(CORPUS_WORDS).title()} folder {n_folders}</H3>\n')
+            yield f'{indent}<DL><p>\n'
+            level += 1
+            level_links.append(0)
+            indent = '    ' * (level + 1)
+
+        word = rand.choice(CORPUS_WORDS)
+        label = f'{word} site {i}'
+        if rand.random() < emoji_ratio:
+            label = f'{rand.choice(CORPUS_EMOJI)} {label}'
+        url = f'https://{word}{i % 997}.example.com/page/{i}'
+        age = 1500000000 + i * 37
+        attrs = f'HREF="{url}" ADD_DATE="{age}" LAST_MODIFIED="{age + 60}"'
+        if i % 10 == 0:
+            attrs += f' TAGS="{word},tag{i % 7}"'
+        if icon_bytes > 0:
+            attrs += f' ICON_URI="fake-favicon-uri:{url}"{icon}'
+        yield f'{indent}<DT><A {attrs}>{label}</A>\n'
+        if rand.random() < dd_ratio:
+            yield f'{indent}<DD>description of {word} site {i}\n'
+        level_links[-1] += 1
+
+        if level > 0 and rand.random() < 1 / folder_links:
+            # leave the folder, it always has at least 1 link
+            level -= 1
+            level_links.pop()
+            yield '    ' * (level + 1) + '</DL><p>\n'
+
+    while level > 0:
+        level -= 1
+        yield '    ' * (level + 1) + '</DL><p>\n'
+    yield '</DL>\n'
+
+
+def corpus_html(**kwargs):
+    """ return the corpus_lines output as a single string, see corpus_lines """
+    return ''.join(corpus_lines(**kwargs))
+
+
+def corpus_write(FILENAME, **kwargs):
+    """
+    write a synthetic bookmarks.html file line by line so 1M link files do
+    not have to fit in memory as a string
+
+    Args:
+        FILENAME (str): file to write, should have bookmark in the name to be
+            found by bookmarks_parse.parse_path
+        **kwargs: passed to corpus_lines
+    Returns:
+        (int) number of bytes written
+    """
+    n_bytes = 0
+    with open(FILENAME, 'w', encoding='utf-8') as fHan:
+        for line in corpus_lines(**kwargs):
+            fHan.write(line)
+            n_bytes += len(line.encode('utf-8'))
+    return n_bytes
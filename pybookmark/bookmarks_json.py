@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bookmarks_json reads and writes the json archives through a codec registry
+
+bookmarks.read_json, write_json and Address_Struct_Read load and dump with
+the first codec in JSON_CODEC_ORDER that is registered, or a named one.
+the stdlib json codec is always registered. orjson is used when it is
+installed, it is not a requirement.
+
+every codec writes the same bytes for the same object: utf-8, non-ASCII
+characters as they are, no spaces without indent and the stdlib layout
+with indent=2. a file written with one codec is byte for byte the file any
+other codec writes, so archives and their checksums do not depend on what
+is installed. older archives were written by json.dump with non-ASCII
+escaped and ', ' separators, they read the same but rewriting one changes
+its bytes.
+
+    codec_register      add a codec, e.g. a faster decoder
+    codec_get           look up a codec by name or the preferred one
+    json_load           read a json file with a codec
+    json_dump           write an object as a json file with a codec
+    gc_paused           pause the cyclic garbage collector for bulk loads
+
+example:
+    >>> import pybookmark.bookmarks_json as bj
+    >>> bj.codec_get().name     # with orjson installed
+    'orjson'
+    >>> bj.json_dump({'a': [1]}, 'a.json', codec='json')
+
+@author: Crumbs
+"""
+import gc
+import json
+from contextlib import contextmanager
+from typing import Callable, NamedTuple
+
+try:
+    import orjson
+except ImportError:     # optional, stdlib json is used
+    orjson = None
+
+
+class jsonCodec(NamedTuple):
+    """ one registered json codec
+
+    Args:
+        name (str): name to select the codec by
+        load (callable): load(fHan) returns the object of binary file fHan
+        dump (callable): dump(obj, fHan, indent) writes obj to binary file
+            fHan as utf-8 json, indent None = compact, else the number of
+            spaces to indent children
+    """
+    name: str
+    load: Callable
+    dump: Callable
+
+
+# key = codec name, value = jsonCodec, see codec_register
+JSON_CODECS = {}
+# codec names in preference order, codec_get() returns the first registered
+JSON_CODEC_ORDER = ['orjson', 'json']
+
+
+def json_stdlib_load(fHan):
+    """ load with the stdlib json module, see jsonCodec """
+    return json.loads(fHan.read())
+
+
+def json_stdlib_dump(obj, fHan, indent=None):
+    """ dump with the stdlib json module, see jsonCodec """
+    if indent is None:
+        separators = (',', ':')
+    else:
+        separators = (',', ': ')
+    fHan.write(json.dumps(obj, ensure_ascii=False, indent=indent,
+                          separators=separators).encode('utf-8'))
+
+
+def json_orjson_load(fHan):
+    """ load with orjson, see jsonCodec """
+    return orjson.loads(fHan.read())
+
+
+def json_orjson_dump(obj, fHan, indent=None):
+    """ dump with orjson, see jsonCodec
+    orjson only indents by 2, other indents are written by the stdlib
+    """
+    if indent is None:
+        fHan.write(orjson.dumps(obj))
+    elif indent == 2:
+        fHan.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        json_stdlib_dump(obj, fHan, indent=indent)
+
+
+def codec_register(name, load, dump, prefer=False):
+    """
+    register a json codec, replaces a codec of the same name
+
+    Args:
+        name (str): name to select the codec by
+        load (callable): see jsonCodec
+        dump (callable): see jsonCodec, must write the bytes the stdlib
+            codec writes so files do not depend on the codec
+        prefer (bool): if True codec_get() returns this codec from now on,
+            else it is only used by name unless name is in JSON_CODEC_ORDER
+    Returns:
+        (jsonCodec) the registered codec
+    """
+    JSON_CODECS[name] = jsonCodec(name, load, dump)
+    if prefer:
+        if name in JSON_CODEC_ORDER:
+            JSON_CODEC_ORDER.remove(name)
+        JSON_CODEC_ORDER.insert(0, name)
+    return JSON_CODECS[name]
+
+
+def codec_get(name=None):
+    """
+    return a registered codec
+
+    Args:
+        name (str|jsonCodec): codec name, a jsonCodec is returned as is.
+            None (default) returns the first registered codec in
+            JSON_CODEC_ORDER
+    Returns:
+        (jsonCodec)
+    """
+    if isinstance(name, jsonCodec):
+        return name
+    if name is None:
+        for name_now in JSON_CODEC_ORDER:
+            if name_now in JSON_CODECS:
+                return JSON_CODECS[name_now]
+        name = 'json'
+    if name not in JSON_CODECS:
+        raise ValueError(f'codec_get: json codec {name} is not registered, '
+                         f'registered: {list(JSON_CODECS)}')
+    return JSON_CODECS[name]
+
+
+@contextmanager
+def gc_paused():
+    """
+    pause the cyclic garbage collector in the with block, the previous
+    state is restored on exit
+
+    for building many objects without reference cycles, like decoded json
+    and the bookmarks made from it: with a large dictionary already loaded
+    the collections the allocations trigger took most of the load time
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def json_load(filename, codec=None):
+    """
+    read a json file, the garbage collector is paused, see gc_paused
+
+    Args:
+        filename (str): string path to read from
+        codec (str|jsonCodec): see codec_get, default the preferred codec
+    Returns:
+        the decoded object
+    """
+    codec = codec_get(codec)
+    with gc_paused(), open(filename, 'rb') as fHan:
+        return codec.load(fHan)
+
+
+def json_dump(obj, filename, indent=None, codec=None):
+    """
+    write obj as a utf-8 json file
+
+    Args:
+        obj: object to write, dict keys must be str
+        filename (str): string path to write to
+        indent (int): None (default) = compact, else spaces per level
+        codec (str|jsonCodec): see codec_get, default the preferred codec
+    Returns:
+        None
+    """
+    with open(filename, 'wb') as fHan:
+        codec_get(codec).dump(obj, fHan, indent)
+
+
+codec_register('json', json_stdlib_load, json_stdlib_dump)
+if orjson is not None:
+    codec_register('orjson', json_orjson_load, json_orjson_dump)
@@ -46,17 +46,137 @@ TODO:
 """
 #import BeautifulSoup as bs    # beautifulSoup version 3
 import bs4 as bs    # beautifulSoup 4
+import bz2
+import codecs
+from functools import partial
 import glob
+import gzip
+import hashlib
+import html
+from html.parser import HTMLParser
+import io
+import json
+import lzma
+from multiprocessing import Pool
 import os
 import re
 import sys
+import time
+import zipfile
+
+import pybookmark.bookmarks_browser as bb
+import pybookmark.bookmarks_class as bc
+
+try:
+    import resource
+except ImportError:     # windows
+    resource = None
+
+
+# compressed files are read through these without writing them out
+FILE_COMPRESSED = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+# a zip member is named by the archive path joined with the member name
+FILE_ZIP = '.zip'
+
+
+def file_archive(file_abs_path):
+    """
+    Return (archive, member) for a zip member path such as
+    backup.zip/bookmarks.html or (file_abs_path, None) for any other file
+    """
+    path_lower = file_abs_path.lower()
+    end = path_lower.find(FILE_ZIP + os.sep)
+    while end >= 0:
+        end += len(FILE_ZIP)
+        if os.path.isfile(file_abs_path[0:end]):
+            member = file_abs_path[end + 1:].replace(os.sep, '/')
+            return (file_abs_path[0:end], member)
+        end = path_lower.find(FILE_ZIP + os.sep, end)
+    return (file_abs_path, None)
+
+
+def file_open(file_abs_path):
+    """
+    Return the passed file opened for reading bytes. .gz, .bz2 and .xz files
+    and zip members are decompressed as they are read, nothing is written.
+    """
+    (archive, member) = file_archive(file_abs_path)
+    if member is not None:
+        # the member keeps the archive file open after the ZipFile closes
+        with zipfile.ZipFile(archive) as fZip:
+            return fZip.open(member)
+    open_now = FILE_COMPRESSED.get(os.path.splitext(file_abs_path)[1].lower(),
+                                   open)
+    return open_now(file_abs_path, 'rb')
+
+
+def file_stat(file_abs_path):
+    """
+    Return (size, mtime_ns) of the passed file. For a zip member the size
+    is the uncompressed size and the time the one stored for the member.
+    """
+    (archive, member) = file_archive(file_abs_path)
+    if member is not None:
+        with zipfile.ZipFile(archive) as fZip:
+            info = fZip.getinfo(member)
+        mtime = int(time.mktime(info.date_time + (0, 0, -1)))
+        return (info.file_size, mtime * 1000000000)
+    stat = os.stat(file_abs_path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def file_exists(file_abs_path):
+    """ Return True if the passed file or zip member exists """
+    (archive, member) = file_archive(file_abs_path)
+    if member is None:
+        return os.path.exists(file_abs_path)
+    with zipfile.ZipFile(archive) as fZip:
+        return member in fZip.NameToInfo
+
+
+def file_zip_members(archive):
+    """
+    Return the paths of the html members of a zip archive, see file_archive,
+    an empty list if the file is not a zip archive
+    """
+    try:
+        with zipfile.ZipFile(archive) as fZip:
+            names = fZip.namelist()
+    except (OSError, zipfile.BadZipFile):
+        print(f'not a zip archive, skipped: {archive}')
+        return []
+    return [os.path.join(archive, *name.split('/')) for name in names
+            if name.lower().endswith('.html')]
 
 
 def file_age(file_abs_path):
     """
     Return file modification time for the passed file
     """
-    return(os.stat(file_abs_path)[8])
+    return(file_stat(file_abs_path)[1] // 1000000000)
+
+
+def file_hash(file_abs_path, block_size=1048576):
+    """
+    Return sha256 hex digest of the file content, read in blocks
+    """
+    hasher = hashlib.sha256()
+    with file_open(file_abs_path) as fileHan:
+        block = fileHan.read(block_size)
+        while len(block) > 0:
+            hasher.update(block)
+            block = fileHan.read(block_size)
+    return hasher.hexdigest()
+
+
+def peak_rss_mb():
+    """ return peak resident memory of this process in MB or None """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak / 1048576     # bytes on mac
+    return peak / 1024            # kilobytes on linux
 
 
 # buildAddressStruct moved to bookmarks_class as build_address_struct
@@ -145,7 +265,8 @@ def tagElement(ELEM, FOLDER_LIST, DEBUG):
         #TAGS:tags
         #TAGS:unfiled_bookmarks_folder      assigned to OTHER_BOOKMARKS folder
         #TAGS:web_panel         drop
-        addrList = [ELEM.contents[0], \
+        addrList = bc.parsedAddress(
+                    ELEM.contents[0], \
                     ELEM.get('href'), \
                     ELEM.get('add_date'), \
                     ELEM.get('last_modified'), \
@@ -153,7 +274,7 @@ def tagElement(ELEM, FOLDER_LIST, DEBUG):
                     ELEM.get('shortcuturl'), \
                     ELEM.get('tags'), \
                     '::'.join(FOLDER_LIST)
-                    ]
+                    )
 
         if (DEBUG):
             print('::'.join(FOLDER_LIST) + "--" + ELEM.contents[0])
@@ -190,18 +311,28 @@ def tagElement(ELEM, FOLDER_LIST, DEBUG):
     return(None, FOLDER_LIST, None)
 
 
-def getChildren(SOUP, ADDRESS_SET, FOLDER_LIST, FOLDER_PTR, DEBUG, LEVEL=0):
+def getChildren(SOUP, ADDRESS_SET, FOLDER_LIST, FOLDER_PTR, DEBUG, LEVEL=0,
+                ERRORS=None):
     """
-    Loop interative call to move into soup
+    Loop over the soup using an explicit stack instead of recursive calls,
+    so deeply nested folders do not hit the python recursion limit.
+
+    Each stack entry is a tag whose children are still being processed.
+    A tag with more than 1 child is pushed to the stack (was the recursive
+    getChildren call). When all children of a dl tag are done the folder
+    is exited, ie popped from FOLDER_LIST.
 
     Args:
         SOUP            ie bs.BeautifulSoup( doc ) or a sub-portion there-of
-        ADDRESS_SET     list of address information
+        ADDRESS_SET     list of address information, bc.parsedAddress
         FOLDER_LIST     list of folders
         FOLDER_PTR      integer pointer into FOLDER_LIST
         DEBUG           boolean, if true print messages
-        LEVEL           integer counter that tracks recursive getChildren call
+        LEVEL           integer counter that tracks the stack depth
                         only prints when DEBUG = True
+        ERRORS          None or list, if a list the walk recovers: an
+                        element that fails is skipped and a parse_diagnostic
+                        dict appended to ERRORS instead of raising
     Returns:
         address set
         FOLDER_LIST
@@ -215,114 +346,378 @@ def getChildren(SOUP, ADDRESS_SET, FOLDER_LIST, FOLDER_PTR, DEBUG, LEVEL=0):
             SOUP.decode() also returns str but in unicode, 
             SOUP.decode_contents() returns str but without leading element
             SOUP.get_text() is only the human readable text
+        the subtree is only decoded to a string for DEBUG messages
         per ref: https://stackoverflow.com/questions/31528600/beautifulsoup-runtimeerror-maximum-recursion-depth-exceeded
     """
 
+    # stack entry: [tag, index of child now, newFolder, level]
+    stack = [[SOUP, -1, SOUP.name == 'dl', LEVEL]]
     if DEBUG:
-        print(f'getChildren call level = {LEVEL}')
-    LEVEL = LEVEL + 1
+        getChildrenDebug(SOUP, LEVEL)
     
-    # - first handle if new folder or not
-    soup_text = (SOUP.decode()).replace('\r', ' ').replace('\n', ' ')
-    #   was using SOUP.get_text() but it doesn't include html formatting
-    #   need html formatting for the next line to work
-    #   SOUP.name gives the current element so don't have to use a string
-    if SOUP.name == 'dl':
-        #if (re.search('^<dl>', stringNChar(soup_text, 10)) is not None):
-        newFolder = True
-        if (DEBUG):
-            print('SOUPI' + str(len(SOUP)) + ':enter:' +
-              stringNChar(soup_text, 100))
-    else:
-        newFolder = False
-        if (DEBUG):
-            print('SOUPI' + str(len(SOUP)) + '::' +
-              stringNChar(soup_text, 100))
-
-    # - now handle the sub elements of the passed SOUP
-    tagNowI = -1
-    while (tagNowI < (len(SOUP)-1)):
-        tagNowI = tagNowI + 1
+    while len(stack) > 0:
+        frame = stack[-1]
+        SOUP = frame[0]
+        frame[1] = frame[1] + 1
+        tagNowI = frame[1]
+
+        if tagNowI >= len(SOUP.contents):
+            # all sub elements handled, leave the folder if it is one
+            stack.pop()
+            if frame[2]:
+                pre_folder = ':'.join(FOLDER_LIST)
+                if len(FOLDER_LIST) == 0 and ERRORS is not None:
+                    # more folders closed than opened, nothing to leave
+                    ERRORS.append(parse_diagnostic(
+                        'IndexError: folder closed with no open folder',
+                        SOUP.name, '', fragment=stringNChar(SOUP.decode(), 100)))
+                    continue
+                FOLDER_LIST.pop()
+                if (DEBUG):
+                    print('Exit folder (' + str(FOLDER_PTR) + ') from' + 
+                          pre_folder + '\n\tnow' + ':'.join(FOLDER_LIST))
+                FOLDER_PTR = 0  # should it -1 instead if odd/even
+            continue
 
         # only process Tags
-        if (re.search('Tag', str(type(SOUP.contents[tagNowI]))) is None):
+        tagNow = SOUP.contents[tagNowI]
+        if not isinstance(tagNow, bs.element.Tag):
             continue
 
-        soupLength = len(SOUP.contents[tagNowI])
+        soupLength = len(tagNow.contents)
         if (DEBUG):
             print('getChildren: ' + str(tagNowI) + '::' + str(soupLength))
 
         if (soupLength == 0):
             continue
 
-        if (soupLength == 1):
-            if (DEBUG):
-                if type(SOUP.contents[tagNowI]) is bs.element.NavigableString:
-                    print('found:: ' + (SOUP.contents[tagNowI].title()))     
-                else:
-                    print('found:: ' + (SOUP.contents[tagNowI].get_text()))
-
-            (addr, FOLDER_LIST, elemType) = tagElement(
-                    SOUP.contents[tagNowI], FOLDER_LIST, DEBUG)
-            if (DEBUG):
-                print('element type: ' + str(elemType))
-
-            if (elemType == 0 and addr is not None):
-                # append the dd information string to the last address
-                ADDRESS_SET[len(ADDRESS_SET)-1].append(addr)
-            elif (elemType == 1 and addr is not None):
-                # append the latest address information to the ADDRESS_SET
-                ADDRESS_SET.append(addr)
-            elif (elemType == 2):
-                # 2: increment the folder pointer; QQQ okay but how to leave folder?
-                if (tagNowI < len(SOUP)-2):
-                    x=1
-                    if (len(SOUP.contents[tagNowI+1]) == 1):
-                        # empty folder must leave (fixes Raspberry pi issue but not Entertainment and Lifestyle not-leaving folder issue)
-                        x = FOLDER_LIST.pop()
-                        if (DEBUG):
-                            print('Drop Bad folder:' + x)
-            elif (elemType == 3 or elemType == 4):
-                # 3: folder name new; QQQ: already appended at a lower level
-                # 4: folder name new; QQQ: already appended at a lower level; parent folder
-                # this doesn't do anything anymore except prevent no match message
-                # script not optimized so don't remove; leave for documentation
-                x = 1
-            else:
-                # nothing happened; why?
-                #   <p> gets here; needs to be folder type or is it dl that marks folders? technically both
-                #   title gets here also
-                #   \n gets here
-                if (DEBUG):
-                    print('no match by type:: ' + (SOUP.contents[tagNowI].get_text()))
+        if (soupLength == 1 and ERRORS is not None and
+                tagNow.name == 'dd' and len(ADDRESS_SET) == 0):
+            # recover: no link to describe yet, the description is dropped
+            ERRORS.append(parse_diagnostic(
+                'IndexError: description without link', tagNow.name,
+                '::'.join([str(x) for x in FOLDER_LIST]),
+                fragment=stringNChar(tagNow.decode(), 100)))
+        elif (soupLength == 1 and ERRORS is not None):
+            # recover: quarantine only the element that fails
+            folder_len = len(FOLDER_LIST)
+            try:
+                (ADDRESS_SET, FOLDER_LIST) = getChildrenElement(
+                    SOUP, tagNowI, ADDRESS_SET, FOLDER_LIST, DEBUG)
+                if len(FOLDER_LIST) > folder_len and \
+                        not isinstance(FOLDER_LIST[-1], str):
+                    # folder name with nested tags, keep only the text
+                    ERRORS.append(parse_diagnostic(
+                        'TypeError: folder name is not text', tagNow.name,
+                        '::'.join(FOLDER_LIST[0:-1]),
+                        fragment=stringNChar(tagNow.decode(), 100)))
+                    FOLDER_LIST[-1] = FOLDER_LIST[-1].get_text()
+            except Exception as e:
+                del FOLDER_LIST[folder_len:]
+                ERRORS.append(parse_diagnostic(
+                    f'{type(e).__name__}: {e}', tagNow.name,
+                    '::'.join([str(x) for x in FOLDER_LIST]),
+                    fragment=stringNChar(tagNow.decode(), 100)))
+        elif (soupLength == 1):
+            (ADDRESS_SET, FOLDER_LIST) = getChildrenElement(
+                SOUP, tagNowI, ADDRESS_SET, FOLDER_LIST, DEBUG)
+
+        elif (tagNow.name in ('h1', 'h3') and ERRORS is not None):
+            # recover: folder name with nested tags, keep only the text so
+            #   the folder closing dl still leaves this folder
+            ERRORS.append(parse_diagnostic(
+                'TypeError: folder name is not text', tagNow.name,
+                '::'.join(FOLDER_LIST),
+                fragment=stringNChar(tagNow.decode(), 100)))
+            FOLDER_LIST.append(tagNow.get_text())
 
         else:
-            # pseudo-code if len > 1 then need to call getChildren
-            # when exit after a call to getChildren then reduce FOLDER_PTR???
-            #   problem decrementing FOLDER_PTR here is too overzealous
-            if (re.search('empty_folder_auto_can_bus',
-                          stringNChar(SOUP.contents[tagNowI].get_text(), 100)) is not None):
-                x = 1
+            # len > 1 so must process the children of this tag before the
+            # remaining siblings; was a recursive call to getChildren
             if (DEBUG):
                 print('Calling getChildren:' + str(tagNowI) + ': ' 
-                      + stringNChar(SOUP.contents[tagNowI].get_text(), 100))
-            (ADDRESS_SET, FOLDER_LIST, FOLDER_PTR) = getChildren(
-                    SOUP.contents[tagNowI],
-                    ADDRESS_SET,
-                    FOLDER_LIST,
-                    FOLDER_PTR, DEBUG, LEVEL)
-
-    if newFolder:
-        pre_folder = FOLDER_LIST
-        FOLDER_LIST.pop()
-        if (DEBUG):
-            print('Exit folder (' + str(FOLDER_PTR) + ') from' + 
-                  ':'.join(pre_folder) + '\n\tnow' + ':'.join(FOLDER_LIST))
-        FOLDER_PTR = 0  # should it -1 instead if odd/even
+                      + stringNChar(tagNow.get_text(), 100))
+                getChildrenDebug(tagNow, frame[3] + 1)
+            stack.append([tagNow, -1, tagNow.name == 'dl', frame[3] + 1])
 
     return(ADDRESS_SET, FOLDER_LIST, FOLDER_PTR)
+
+
+def getChildrenElement(SOUP, tagNowI, ADDRESS_SET, FOLDER_LIST, DEBUG):
+    """
+    handle the single element tag SOUP.contents[tagNowI] for getChildren
+
+    Args:
+        SOUP            tag holding the element
+        tagNowI         index of the element in SOUP.contents
+        ADDRESS_SET     see getChildren
+        FOLDER_LIST     see getChildren
+        DEBUG           boolean, if true print messages
+    Returns:
+        address set
+        FOLDER_LIST
+    """
+    tagNow = SOUP.contents[tagNowI]
+    if (DEBUG):
+        print('found:: ' + (tagNow.get_text()))
+
+    (addr, FOLDER_LIST, elemType) = tagElement(
+        tagNow, FOLDER_LIST, DEBUG)
+    if (DEBUG):
+        print('element type: ' + str(elemType))
+
+    if (elemType == 0 and addr is not None):
+        # set the dd information string as the last address description
+        ADDRESS_SET[-1] = address_describe(ADDRESS_SET[-1], addr)
+    elif (elemType == 1 and addr is not None):
+        # append the latest address information to the ADDRESS_SET
+        ADDRESS_SET.append(addr)
+    elif (elemType == 2):
+        # 2: increment the folder pointer; QQQ okay but how to leave folder?
+        if (tagNowI < len(SOUP.contents)-2):
+            if (len(SOUP.contents[tagNowI+1]) == 1):
+                # empty folder must leave (fixes Raspberry pi issue but not Entertainment and Lifestyle not-leaving folder issue)
+                x = FOLDER_LIST.pop()
+                if (DEBUG):
+                    print('Drop Bad folder:' + x)
+    elif (elemType == 3 or elemType == 4):
+        # 3: folder name new; already appended by tagElement
+        # 4: folder name new; already appended by tagElement; parent folder
+        pass
+    else:
+        # nothing happened; why?
+        #   <p> gets here; needs to be folder type or is it dl that marks folders? technically both
+        #   title gets here also
+        #   \n gets here
+        if (DEBUG):
+            print('no match by type:: ' + (tagNow.get_text()))
+
+    return(ADDRESS_SET, FOLDER_LIST)
+
+
+def parse_diagnostic(error, tag, location, line=None, fragment=None):
+    """
+    return the record of an error the recovering parse skipped over
+
+    Args:
+        error (str): exception type and message
+        tag (str): name of the element that failed
+        location (str): folder path at the element, '::' separated
+        line (int): line in the file, None where the parser has no position
+        fragment (str): start of the skipped html
+    Returns:
+        (dict) with the arguments as keys
+    """
+    return {'error': error, 'tag': tag, 'location': location, 'line': line,
+            'fragment': fragment}
+
+
+def getChildrenDebug(SOUP, LEVEL):
+    """
+    print the getChildren debug message for a tag entered at LEVEL
+    this decodes the full subtree so is only called when DEBUG = True
+    """
+    print(f'getChildren call level = {LEVEL}')
+    soup_text = (SOUP.decode()).replace('\r', ' ').replace('\n', ' ')
+    if SOUP.name == 'dl':
+        print('SOUPI' + str(len(SOUP)) + ':enter:' +
+              stringNChar(soup_text, 100))
+    else:
+        print('SOUPI' + str(len(SOUP)) + '::' +
+              stringNChar(soup_text, 100))
     
 
+class bookmarkStreamParser(HTMLParser):
+    """
+    Event driven Netscape bookmark format parser used by parse_html_stream().
+    Replaces the soup tree + getChildren walk with a single pass over the
+    tags as they are fed in, so memory does not grow with the file size.
+
+    Folder handling follows getChildren:
+        h1, h3 text is pushed onto FOLDER_LIST
+        closing dl pops the last folder from FOLDER_LIST
+        a with a single text element is a link, location is FOLDER_LIST
+        dd text is appended to the last link
+    
+    Args:
+        DEBUG (bool): if True print messages
+        ERRORS (list): default None, if a list the parser recovers from a dl
+            closed with no open folder and reports a dd before any link,
+            see getChildren
+    Attributes:
+        ADDRESS_SET (list): list of address information, same as getChildren
+        FOLDER_LIST (list): list of folders, last is lowest
+        ERRORS (list): parse_diagnostic dicts of the recovered errors or None
+    """
+    
+    # tags that end a dd description element
+    dd_end_tags = ('dt', 'dd', 'dl', 'h1', 'h3', 'hr')
+    
+    def __init__(self, DEBUG=False, ERRORS=None):
+        super().__init__(convert_charrefs=True)
+        self.DEBUG = DEBUG
+        self.ERRORS = ERRORS
+        self.ADDRESS_SET = []
+        self.FOLDER_LIST = []
+        self._elem = None       # name of the element whose text is collected
+        self._elem_attrs = None
+        self._elem_line = None  # line the element starts on
+        self._elem_nested = False   # a tag inside the folder name was skipped
+        self._text = []         # text can arrive over several handle_data calls
+
+    def _dd_close(self, tag):
+        """ finish a dd element that is ended implicitly by tag """
+        if self._elem == 'dd':
+            if tag in self.dd_end_tags and len(self._text) > 0:
+                if len(self.ADDRESS_SET) > 0:
+                    # set the dd information string as the last address description
+                    self.ADDRESS_SET[-1] = address_describe(
+                        self.ADDRESS_SET[-1], ''.join(self._text))
+                elif self.ERRORS is not None:
+                    # no link to describe yet, same as getChildren
+                    self.ERRORS.append(parse_diagnostic(
+                        'IndexError: description without link', 'dd',
+                        '::'.join(self.FOLDER_LIST), line=self._elem_line,
+                        fragment=stringNChar('<dd>' + ''.join(self._text), 100)))
+            self._elem = None
+
+    def handle_starttag(self, tag, attrs):
+        self._dd_close(tag)
+        if self._folder_nested(tag):
+            return
+        if tag in ('a', 'h1', 'h3', 'dd'):
+            self._elem = tag
+            self._elem_attrs = attrs
+            self._elem_line = self.getpos()[0]
+            self._elem_nested = False
+            self._text = []
+        else:
+            # a nested tag means the element is not a single text element
+            self._elem = None
+            if tag == 'dl' and self.DEBUG:
+                print('Enter new folder element' + ':'.join(self.FOLDER_LIST))
+
+    def handle_endtag(self, tag):
+        self._dd_close(tag)
+        if self._elem != tag and self._folder_nested(tag):
+            return
+        if tag == self._elem and len(self._text) > 0:
+            text = ''.join(self._text)
+            if tag == 'a':
+                if text != 'Recently Bookmarked' and text != 'Recent Tags':
+                    attrs = dict(self._elem_attrs)
+                    self.ADDRESS_SET.append(bc.parsedAddress(
+                        text,
+                        attrs.get('href'),
+                        attrs.get('add_date'),
+                        attrs.get('last_modified'),
+                        attrs.get('last_charset'),
+                        attrs.get('shortcuturl'),
+                        attrs.get('tags'),
+                        '::'.join(self.FOLDER_LIST)
+                        ))
+                    if self.DEBUG:
+                        print('::'.join(self.FOLDER_LIST) + "--" + text)
+            else:
+                # h1 or h3 match for folder names, append to the folder list
+                self.FOLDER_LIST.append(text)
+        elif tag == 'dl':
+            pre_folder = ':'.join(self.FOLDER_LIST)
+            if len(self.FOLDER_LIST) == 0 and self.ERRORS is not None:
+                # more folders closed than opened, nothing to leave
+                self.ERRORS.append(parse_diagnostic(
+                    'IndexError: folder closed with no open folder', tag, '',
+                    line=self.getpos()[0], fragment=f'</{tag}>'))
+                self._elem = None
+                return
+            self.FOLDER_LIST.pop()
+            if self.DEBUG:
+                print('Exit folder from' + pre_folder +
+                      '\n\tnow' + ':'.join(self.FOLDER_LIST))
+        self._elem = None
+
+    def _folder_nested(self, tag):
+        """
+        return True if recovering and tag is nested in a folder name, the
+        folder name text is kept instead of dropping the folder
+        """
+        if self.ERRORS is None or self._elem not in ('h1', 'h3') or \
+                tag in self.dd_end_tags:
+            return False
+        if not self._elem_nested:
+            self._elem_nested = True
+            self.ERRORS.append(parse_diagnostic(
+                'TypeError: folder name is not text', self._elem,
+                '::'.join(self.FOLDER_LIST), line=self.getpos()[0],
+                fragment=f'<{self._elem}>' + ''.join(self._text) + f'<{tag}>'))
+        return True
+
+    def handle_data(self, data):
+        if self._elem is not None:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        # a dd at the end of the file is not followed by another tag
+        self._dd_close('dl')
+
+
+def parse_html_stream(FILENAME, DEBUG=False, ADD_EMPTY=True, stats=None,
+                      errors=None):
+    """
+    Given a filename to a bookmarks.html file return the address set using
+    bookmarkStreamParser instead of a BeautifulSoup tree. The file is read,
+    pre-processed and tokenized one line at a time.
+    
+    Args:
+        FILENAME: path to the html file to parse
+        DEBUG (bool): default=False, if True print messages
+        ADD_EMPTY (bool): default=True, passed to html_preprocess()
+        stats (dict): if not None html_preprocess adds the bytes removed
+        errors (list): if not None recover, see bookmarkStreamParser
+    Returns:
+        (list) list of addresses, same format as getChildren() output
+    """
+    return parse_html_lines(html_read_lines(FILENAME, stats, errors), DEBUG,
+                            ADD_EMPTY, stats, errors)
+
+
+def parse_html_lines(lines, DEBUG=False, ADD_EMPTY=True, stats=None,
+                     errors=None, address_set=None):
+    """
+    parse_html_stream of an iterable of html text lines, see
+    parse_html_stream for the other arguments. if address_set is not None
+    the addresses are appended to it.
+    """
+    if stats is None and DEBUG:
+        stats = {}
+    parser = bookmarkStreamParser(DEBUG, errors)
+    if address_set is not None:
+        parser.ADDRESS_SET = address_set
+    for line in lines:
+        parser.feed(html_preprocess(line, ADD_EMPTY, stats))
+    parser.close()
+    if DEBUG:
+        print(f'html_preprocess removed: {stats}')
+    return parser.ADDRESS_SET
+
+
+def address_describe(ADDR, DESCRIPTION):
+    """
+    return the parsedAddress ADDR with the dd DESCRIPTION set. only the first
+    dd after a link is its description, later ones are dropped.
+    
+    Args:
+        ADDR (parsedAddress): the link the dd follows
+        DESCRIPTION (str): dd text
+    Returns:
+        (parsedAddress)
+    """
+    if ADDR.description is not None:
+        return ADDR
+    return ADDR._replace(description=DESCRIPTION)
+
+
 def parsed_address_len(ADDR_SET):
     """
     return number of attributes by address element in the address set.
@@ -341,7 +736,297 @@ def parsed_address_len(ADDR_SET):
     return(addrLenMax)
 
 
-def parse_html(FILENAME, DEBUG=False, ADD_EMPTY=True):
+# emoji characters removed by string_remove_emoji and html_preprocess
+# ref: https://gist.github.com/slowkow/7a7f61f495e3dbb7e3d767f97bd7304b
+EMOJI_CLASS = ("["
+               u"\U0001F600-\U0001F64F"  # emoticons
+               u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+               u"\U0001F680-\U0001F6FF"  # transport & map symbols
+               u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+               u"\U00002500-\U00002BEF"  # chinese char
+               u"\U00002702-\U000027B0"
+               u"\U00002702-\U000027B0"
+               u"\U000024C2-\U0001F251"
+               u"\U0001f926-\U0001f937"
+               u"\U00010000-\U0010ffff"
+               u"\u2640-\u2642"
+               u"\u2600-\u2B55"
+               u"\u200d"
+               u"\u23cf"
+               u"\u23e9"
+               u"\u231a"
+               u"\ufe0f"  # dingbats
+               u"\u2122"  # trademark symbol
+               u"\u3030"
+               "]")
+
+# html_preprocess tokens, only text matching a token is looked at in python
+#   rm: ICON information or emojis, with any spaces in front of them
+#   sp: duplicate spaces
+#   dl: empty folder
+#   a_rm: link name that is only ICON information or emojis
+#   a: empty link name
+#   ICON=".[^"\n]*" is the same match as ICON=".+?" without backtracking
+PREPROCESS_ICON = 'ICON_URI=".[^"\\n]*"|ICON=".[^"\\n]*"'
+PREPROCESS_RM = PREPROCESS_ICON + '|' + EMOJI_CLASS + '+'
+PREPROCESS_TOKENS = '(?P<sp_rm> *)(?P<rm>' + PREPROCESS_RM + ')|(?P<sp>  +)'
+PREPROCESS_RE = re.compile(PREPROCESS_TOKENS, flags=re.IGNORECASE)
+PREPROCESS_EMPTY_RE = re.compile(
+    PREPROCESS_TOKENS +
+    '|(?P<dl><DL><p>\n(?P<dl_rm>(?:' + PREPROCESS_RM + ')* (?: |' +
+    PREPROCESS_RM + ')*)</DL><p>(?P<dl_a>(?P<dl_a_rm>(?:' + PREPROCESS_RM +
+    ')*)</A>)?)' +
+    '|(?P<a_rm>>(?:' + PREPROCESS_RM + ')+</A>)' +
+    '|(?P<a>></A>)',
+    flags=re.IGNORECASE)
+PREPROCESS_ICON_RE = re.compile(PREPROCESS_ICON, flags=re.IGNORECASE)
+
+
+# the same ICON attributes removed from the file bytes before they are decoded
+HTML_ICON_BYTES_RE = re.compile(PREPROCESS_ICON.encode('ascii'),
+                                flags=re.IGNORECASE)
+HTML_CHARSET_RE = re.compile(rb'<META[^>]*?charset=["\']?([A-Za-z0-9_:.-]+)',
+                             flags=re.IGNORECASE)
+HTML_CHARSET_BYTES = 4096   # the META tag is looked for in the first bytes
+HTML_CHARSET_DEFAULT = 'utf-8'
+HTML_DECODE_ERRORS = 'bookmarks_replace'
+# a lone surrogate, valid bytes never decode to it
+HTML_DECODE_MARK = '\udcfd'
+
+
+def html_decode_replace(error):
+    """
+    codecs error handler registered as HTML_DECODE_ERRORS, replaces each
+    invalid byte with HTML_DECODE_MARK. it keeps no state, the caller counts
+    the marks in its own text with html_decode_marked
+    """
+    return (HTML_DECODE_MARK * (error.end - error.start), error.end)
+
+
+codecs.register_error(HTML_DECODE_ERRORS, html_decode_replace)
+
+
+def html_decode_marked(text):
+    """
+    return (text, count), text decoded with HTML_DECODE_ERRORS with every
+    HTML_DECODE_MARK replaced by U+FFFD and count the bytes replaced
+    """
+    count = text.count(HTML_DECODE_MARK)
+    if count > 0:
+        text = text.replace(HTML_DECODE_MARK, '\ufffd')
+    return (text, count)
+
+
+def html_charset(head, errors=None):
+    """
+    return the charset of a bookmark file from its first bytes: a byte order
+    mark, else the charset of the META Content-Type tag exports carry, else
+    HTML_CHARSET_DEFAULT
+    
+    Args:
+        head (bytes): first HTML_CHARSET_BYTES of the file
+        errors (list): if not None a parse_diagnostic is appended for a
+            charset python does not know, the default is used for it
+    Returns:
+        (str) python codec name
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    match = HTML_CHARSET_RE.search(head)
+    if match is None:
+        return HTML_CHARSET_DEFAULT
+    charset = match.group(1).decode('ascii')
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        if errors is not None:
+            errors.append(parse_diagnostic(
+                f'LookupError: unknown charset {charset}, read as '
+                f'{HTML_CHARSET_DEFAULT}', 'meta', '',
+                fragment=stringNChar(match.group(0).decode('ascii', 'replace'),
+                                     100)))
+        return HTML_CHARSET_DEFAULT
+
+
+def html_decode_record(charset, count, stats=None, errors=None):
+    """ record the charset and the count of bytes replaced while decoding """
+    if stats is not None:
+        stats['charset'] = charset
+        stats['decode_errors'] = stats.get('decode_errors', 0) + count
+    if count > 0 and errors is not None:
+        errors.append(parse_diagnostic(
+            f'UnicodeDecodeError: {count} bytes not valid {charset} replaced',
+            None, ''))
+
+
+def html_read(FILENAME, stats=None, errors=None):
+    """
+    Read a bookmark html file as bytes and decode it in one pass with the
+    html_charset of the file. Bytes that are not valid in the charset are
+    replaced with U+FFFD, counted and reported instead of failing the file.
+    For ascii compatible charsets the ICON attributes html_preprocess would
+    remove are cut from the bytes first, so the icon data is never decoded.
+    Line ends are translated to \\n like a file opened in text mode.
+    
+    Args:
+        FILENAME (str): path to the html file
+        stats (dict): if not None 'icon_bytes' and 'decode_errors' are added
+            to and 'charset' is set
+        errors (list): if not None a parse_diagnostic is appended for an
+            unknown charset and for replaced bytes
+    Returns:
+        (str) the text of the file
+    """
+    with file_open(FILENAME) as fileHan:
+        data = fileHan.read()
+    charset = html_charset(data[0:HTML_CHARSET_BYTES], errors)
+    if charset == 'utf-8-sig':
+        data = data[len(codecs.BOM_UTF8):]
+        charset = 'utf-8'
+    if charset != 'utf-16' and 'ICON="\r\n'.encode(charset) == b'ICON="\r\n':
+        if stats is not None:
+            size = len(data)
+        data = HTML_ICON_BYTES_RE.sub(b'', data)
+        if stats is not None:
+            stats['icon_bytes'] = stats.get('icon_bytes', 0) + size - len(data)
+        if b'\r' in data:
+            data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        ascii_lines = True
+    else:
+        ascii_lines = False
+    (fileString, count) = html_decode_marked(
+        data.decode(charset, HTML_DECODE_ERRORS))
+    html_decode_record(charset, count, stats, errors)
+    if not ascii_lines and '\r' in fileString:
+        fileString = fileString.replace('\r\n', '\n').replace('\r', '\n')
+    return fileString
+
+
+def html_read_lines(FILENAME, stats=None, errors=None):
+    """
+    generator of the lines of a bookmark html file decoded like html_read,
+    the ICON attributes are left for html_preprocess
+    """
+    with file_open(FILENAME) as fileHan:
+        charset = html_charset(fileHan.read(HTML_CHARSET_BYTES), errors)
+        fileHan.seek(0)
+        count = 0
+        for line in io.TextIOWrapper(fileHan, encoding=charset,
+                                     errors=HTML_DECODE_ERRORS):
+            (line, count_line) = html_decode_marked(line)
+            count += count_line
+            yield line
+        if charset == 'utf-8-sig':
+            charset = 'utf-8'
+        html_decode_record(charset, count, stats, errors)
+
+
+def preprocess_removed(removed, count):
+    """ add icon and emoji bytes in removed text to the count dictionary """
+    icon_bytes = sum([len(x) for x in PREPROCESS_ICON_RE.findall(removed)])
+    removed = PREPROCESS_ICON_RE.sub('', removed).replace(' ', '')
+    count['icon_bytes'] += icon_bytes
+    count['emoji_bytes'] += len(removed.encode('utf-8'))
+
+
+def html_preprocess(fileString, ADD_EMPTY=True, stats=None):
+    """
+    Pre-process bookmark html text to account for abberant formating before
+    it is parsed, in a single scan of the text:
+        drop ICON and ICON_URI information, reduces what is parsed
+        drop emojis
+        replace duplicate spaces, including those left by the above, ie
+            a run of n spaces becomes (n+1)//2 spaces
+        if ADD_EMPTY populate empty folders with empty html tags that can be
+            dropped later and populate empty link names
+    The output is the same as applying each of these as a separate re.sub
+    over the whole text in that order. Text between the matched tokens is
+    copied once, ICON values are skipped without being copied.
+
+    All rewrites except the empty folder fill are limited to a single line
+    so the function can be applied to the whole file or to each line.
+    
+    Args:
+        fileString (str): html text to pre-process
+        ADD_EMPTY (bool): if True populate empty folders and link names
+        stats (dict): if not None the bytes removed are added to keys
+            'icon_bytes', 'emoji_bytes' and 'space_bytes' and the time taken
+            to key 'preprocess_seconds'
+    Returns:
+        (str) pre-processed html text
+    """
+    if stats is not None:
+        t1 = time.perf_counter()
+    if ADD_EMPTY:
+        token_re = PREPROCESS_EMPTY_RE
+    else:
+        token_re = PREPROCESS_RE
+    out = []
+    count = {'icon_bytes': 0, 'emoji_bytes': 0, 'space_bytes': 0,
+             'spaces': 0}  # spaces waiting to be reduced and written to out
+
+    def write_text(text):
+        # spaces after removed text join the spaces before it
+        if count['spaces'] > 0:
+            text_strip = text.lstrip(' ')
+            count['spaces'] += len(text) - len(text_strip)
+            text = text_strip
+            if len(text) == 0:
+                return
+            out.append(' ' * ((count['spaces'] + 1) // 2))
+            count['space_bytes'] += count['spaces'] // 2
+            count['spaces'] = 0
+        out.append(text)
+
+    pos = 0     # end of the last token
+    for match in token_re.finditer(fileString):
+        start = match.start()
+        if start > pos:
+            write_text(fileString[pos:start])
+        pos = match.end()
+        token = match.lastgroup
+        if token == 'rm':
+            rm_start = match.start('rm')
+            count['spaces'] += rm_start - start
+            if fileString[rm_start:rm_start+4].upper() == 'ICON':
+                count['icon_bytes'] += pos - rm_start
+            else:
+                count['emoji_bytes'] += len(
+                    fileString[rm_start:pos].encode('utf-8'))
+        elif token == 'sp':
+            count['spaces'] += pos - start
+        elif token == 'dl':
+            # empty folder may contain removed text, rare so use the text
+            preprocess_removed(match.group('dl_rm'), count)
+            write_text('<DL><p>\n           <DT><A HREF="empty">empty</A></DL><p>')
+            if match.group('dl_a') is not None:
+                # empty link name after the folder
+                preprocess_removed(match.group('dl_a_rm'), count)
+                write_text('empty_string</A>')
+        elif token == 'a_rm':
+            # removed text was the whole link name, rare so use the text
+            preprocess_removed(match.group('a_rm')[1:-4], count)
+            write_text('>empty_string</A>')
+        else:
+            write_text('>empty_string</A>')
+    write_text(fileString[pos:])
+    if count['spaces'] > 0:
+        # text ends with spaces
+        out.append(' ' * ((count['spaces'] + 1) // 2))
+        count['space_bytes'] += count['spaces'] // 2
+
+    if stats is not None:
+        for key in ('icon_bytes', 'emoji_bytes', 'space_bytes'):
+            stats[key] = stats.get(key, 0) + count[key]
+        stats['preprocess_seconds'] = stats.get('preprocess_seconds', 0) + \
+            time.perf_counter() - t1
+    return ''.join(out)
+
+
+def parse_html(FILENAME, DEBUG=False, ADD_EMPTY=True, engine='soup',
+               stats=None, detach=False, errors=None):
     """
     Given an absolute filename to a bookmarks.html file return the address set.
     Parses addresses for folder structure. Also grabs keywords.
@@ -352,66 +1037,99 @@ def parse_html(FILENAME, DEBUG=False, ADD_EMPTY=True):
     Args:
         FILENAME: path to the html file to parse
         DEBUG (bool): default=False, passed to getChildren()
+        ADD_EMPTY (bool): default=True, pre-process empty folders and labels
+        engine (str): 'soup' (default) builds the BeautifulSoup tree and walks
+            it with getChildren(). 'stream' tokenizes the file line by line
+            with parse_html_stream() and never builds a tree.
+        stats (dict): if not None html_preprocess adds the bytes removed
+            and html_read the charset and the bytes it could not decode
+        detach (bool): default=False, if True the addresses are converted to
+            plain str by address_detach() and the soup is destroyed before
+            returning so no part of the tree stays in memory
+        errors (list): default None raises on the first malformed element.
+            if a list the parse recovers: the malformed element is skipped,
+            the rest of the file is parsed and a parse_diagnostic dict is
+            appended to errors for each element skipped
     Returns:
         (tuple) = (list of addresses, soup)
         the soup is output of bs.BeautifulSoup, returned for debugging purposes
+        soup is None for the stream engine or if detach is True
     """
     
+    if engine == 'stream':
+        return (parse_html_stream(FILENAME, DEBUG, ADD_EMPTY, stats, errors),
+                None)
+    elif engine != 'soup':
+        raise ValueError(f'parse_html engine must be soup or stream not {engine}')
+
     # read the file and pre-processing to account for abberant formating
-    fileHan = open(FILENAME)
-    fileString = fileHan.read()
-    fileHan.close()
-
-    # drop ICON information reduces what is parsed by beautiful soup
-    fileString = re.sub(
-         '(ICON_URI=").+?"', # non-greedy so only matches to next "
-         '',
-         fileString, flags=re.IGNORECASE
-         )
-    fileString = re.sub(
-         '(ICON=").+?"', #
-         '',
-         fileString, flags=re.IGNORECASE
-         )
-    
-    # drop emojis
-    # found warning symbol UTF-8 octal bytes: 342 232 240 357 270 217    
-    # ref: https://www.iemoji.com/view/emoji/163/symbols/warning
-    if 0:
-        # this works
-        fileString = re.sub(u"\u26A0\uFE0F", '', fileString)
-    else:
-        # remove emojis then drop duplicate space they introduce
-        fileString = string_remove_emoji(fileString)
-        fileString = re.sub("  ", " ", fileString)  # replace duplicate spaces
-
-    if ADD_EMPTY:    
-        # pre-process: populate empty folders with empty html tags that can be dropped later
-        fileString = re.sub(
-               '<DL><p>\\n {1,}</DL><p>',
-               '<DL><p>\\n           <DT><A HREF="empty">empty</A></DL><p>',
-               fileString, flags=re.IGNORECASE
-               )
-        # pre-process: populate empty link names
-        fileString = re.sub(
-               '></A>',
-               '>empty_string</A>',
-               fileString, flags=re.IGNORECASE
-               )
+    fileString = html_read(FILENAME, stats, errors)
+    return parse_html_text(fileString, DEBUG, ADD_EMPTY, engine, stats, detach,
+                           errors)
+
+
+def parse_html_text(fileString, DEBUG=False, ADD_EMPTY=True, engine='soup',
+                    stats=None, detach=False, errors=None, address_set=None):
+    """
+    parse_html of bookmark html text already read from the file, see
+    parse_html for the arguments and output
     
+    Args:
+        fileString (str): html text to parse
+        address_set (list): default None, if a list the addresses are
+            appended to it, a dd before the first link describes its last
+    """
+    if address_set is None:
+        address_set = []
+    if engine == 'stream':
+        return (parse_html_lines(io.StringIO(fileString), DEBUG, ADD_EMPTY,
+                                 stats, errors, address_set), None)
+    elif engine != 'soup':
+        raise ValueError(f'parse_html engine must be soup or stream not {engine}')
+
+    if stats is None and DEBUG:
+        stats = {}
+    fileString = html_preprocess(fileString, ADD_EMPTY, stats)
+    if DEBUG:
+        print(f'html_preprocess removed: {stats}')
+
     # run pre-process string through BeautifulSoup parser
     # non-preprocessed call: soup = bs.BeautifulSoup(open(FILENAME), "lxml")
     soup = bs.BeautifulSoup(fileString, "lxml")
         
     # process the BeautifulSoup output to extract the useful info: address set
     folderNameList = list()
-    addressSet = list()
+    addressSet = address_set
     (addressSet, folderNameList, folderPointer) = \
-        getChildren(soup, addressSet, folderNameList, -1, DEBUG)
+        getChildren(soup, addressSet, folderNameList, -1, DEBUG,
+                    ERRORS=errors)
+    
+    if detach:
+        addressSet = address_detach(addressSet)
+        # the tree is full of parent/child reference cycles, break them so
+        #   the memory is released now instead of at the next gc collection
+        soup.decompose()
+        soup = None
     
     return(addressSet, soup)
 
 
+def address_detach(ADDR_SET):
+    """
+    return a copy of the address set with soup elements, NavigableString
+    or Tag, converted to plain str. A NavigableString is a str but keeps a
+    reference to its parent so a single one keeps the whole soup alive.
+    
+    Args:
+        ADDR_SET (list): the data generated by parse_html()
+    Returns:
+        (list) of parsedAddress that only contain str and None
+    """
+    return [bc.parsedAddress._make(
+                [str(x) if isinstance(x, bs.element.PageElement) else x 
+                 for x in addr]) for addr in ADDR_SET]
+
+
 def parsed_max_address_len(ADDR_SET):
     """
     return maximum number of attributes by address element in the address set.
@@ -430,71 +1148,756 @@ def parsed_max_address_len(ADDR_SET):
     return(addrLenMax)
     
 
-def parse_path(file_path, ncpu=1):
+# tags html_split_folders tracks, the dl depth and the top-level folders
+#   the < is outside the group so the scan only stops at tags
+HTML_SPLIT_RE = re.compile(
+    r'<(?:(?P<dl_close>/DL)|(?P<dl>DL)|(?P<h3>DT><H3))\b', flags=re.IGNORECASE)
+HTML_SPLIT_ROOT_RE = re.compile(r'<DL><p>\s*', flags=re.IGNORECASE)
+HTML_SPLIT_TAIL_RE = re.compile(r'<(?:A|DD|DT|H1|H3)\b', flags=re.IGNORECASE)
+# link parse_html_chunk adds after the root dl, its location is the folder
+#   list left when the root dl is closed
+HTML_SPLIT_END = '\n<DT><A HREF="pybookmark:split">split</A>\n'
+# files smaller than this are not split by parse_file
+PARSE_SPLIT_BYTES = 1048576
+
+
+def html_split_folders(fileString, n_chunks):
+    """
+    Split bookmark html text into chunks at the top-level folders, the
+    <DT><H3> tags directly inside the root <DL>. head + chunk + tail is a
+    complete bookmark file: head is the text before the root dl (with the h1
+    that is the folder prefix of every link) and the root dl line, chunk a
+    run of top-level folders and links and tail the root dl close to the
+    end of the text.
+    
+    Text that does not have one root dl with its tags first on their lines
+    is not split.
+    
+    Args:
+        fileString (str): bookmark html text, not pre-processed
+        n_chunks (int): number of chunks wanted, adjacent top-level folders
+            are joined into chunks of about the same size
+    Returns:
+        (tuple) (head, tail, chunks)
+            chunks = list of (chunk text, line offset), line offset is added
+            to a line number in head + chunk + tail past the head to get the
+            line in fileString. ('', '', [(fileString, 0)]) if the text is
+            not split.
+    """
+    no_split = ('', '', [(fileString, 0)])
+    depth = 0
+    root_end = None     # end of the root dl line
+    close_start = None  # start of the root dl close tag
+    bounds = []         # start of the top-level folder tags
+    for match in HTML_SPLIT_RE.finditer(fileString):
+        line_start = fileString.rfind('\n', 0, match.start()) + 1
+        line_first = fileString[line_start:match.start()].strip() == ''
+        if match.lastgroup == 'dl':
+            if depth == 0:
+                if root_end is not None or not line_first:
+                    return no_split
+                root_end = fileString.find('\n', match.start()) + 1
+                if root_end == 0 or HTML_SPLIT_ROOT_RE.fullmatch(
+                        fileString, match.start(), root_end) is None:
+                    return no_split
+            depth += 1
+        elif match.lastgroup == 'dl_close':
+            depth -= 1
+            if depth < 0:
+                return no_split
+            if depth == 0:
+                if not line_first:
+                    return no_split
+                close_start = match.start()
+        elif depth == 1 and line_first:
+            # split at the tag, the spaces before it end the text of a dd
+            bounds.append(match.start())
+    if close_start is None or depth != 0 or \
+            HTML_SPLIT_TAIL_RE.search(fileString, close_start) is not None:
+        return no_split
+    if len(bounds) > 0 and fileString[root_end:bounds[0]].strip() == '':
+        # the first top-level folder starts the first chunk
+        bounds = bounds[1:]
+    if len(bounds) == 0:
+        return no_split
+
+    # - join adjacent top-level pieces into chunks of about the same size
+    chunk_bytes = (close_start - root_end) / max(n_chunks, 1)
+    starts = [root_end]
+    for (piece_start, piece_end) in zip(bounds, bounds[1:] + [close_start]):
+        if piece_start - starts[-1] >= chunk_bytes and \
+                piece_end - starts[-1] > chunk_bytes:
+            starts.append(piece_start)
+    if len(starts) < 2:
+        return no_split
+    starts.append(close_start)
+    lines = 0
+    chunks = []
+    for (chunk_start, chunk_end) in zip(starts[0:-1], starts[1:]):
+        chunks.append((fileString[chunk_start:chunk_end], lines))
+        lines += fileString.count('\n', chunk_start, chunk_end)
+    return (fileString[0:root_end], fileString[close_start:], chunks)
+
+
+def parse_html_chunk(chunk, head='', tail='', DEBUG=False, ADD_EMPTY=True,
+                     engine='soup', recover=False):
+    """
+    parse one html_split_folders chunk for parse_html_split, runs in a
+    worker process so the output is plain python.
+    
+    A chunk after the first starts with the previous chunk's last link in
+    the parse_html address set, a placeholder is put in its place so a dd
+    before the first link of the chunk is kept. HTML_SPLIT_END is added
+    after the tail to read the folders left open at the end of the chunk.
+    
+    Args:
+        chunk (tuple): (chunk text, line offset) from html_split_folders
+        head (str): html_split_folders head
+        tail (str): html_split_folders tail
+        recover (bool): if True parse in the recovering mode of parse_html
+        see parse_html for the other arguments
+    Returns:
+        (tuple) (address set, description, location, stats, errors)
+            address set = detached list of bc.parsedAddress
+            description = dd text for the link before the chunk or None
+            location = folders left open after the root dl, '' if none
+            stats = html_preprocess stats of the chunk
+            errors = parse_diagnostic dicts with the line in the file or None
+    """
+    (fileString, line_offset) = chunk
+    stats = {}
+    errors = [] if recover else None
+    before = bc.parsedAddress('split', 'pybookmark:split', None, None, None,
+                              None, None, '')
+    (addressSet, soup) = parse_html_text(
+        head + fileString + tail + HTML_SPLIT_END, DEBUG, ADD_EMPTY, engine,
+        stats, True, errors, address_set=[before])
+    if errors is not None and line_offset != 0:
+        for error in errors:
+            if error['line'] is not None:
+                error['line'] += line_offset
+    return (addressSet[1:-1], addressSet[0].description, addressSet[-1].location,
+            stats, errors)
+
+
+def parse_html_split(FILENAME, ncpu=2, DEBUG=False, ADD_EMPTY=True,
+                     engine='soup', stats=None, errors=None):
+    """
+    parse_html of one large file on ncpu processes. The text is split at the
+    top-level folders by html_split_folders, the chunks are parsed in a
+    multiprocessing pool and the address sets joined in the file order.
+    
+    The address set is the same as parse_html(FILENAME, detach=True). Every
+    chunk is parsed with only the h1 folder open, if a chunk leaves other
+    folders open or has a dd with no link before it the file is parsed again
+    in this process as one piece.
+    
+    Args:
+        FILENAME: path to the html file to parse
+        ncpu (int): number of processes, 1 parses the chunks in this process
+        see parse_html for the other arguments
+    Returns:
+        (tuple) = (list of addresses, None), the addresses are detached
+    """
+    fileString = html_read(FILENAME, stats, errors)
+    # a few chunks per process so one big folder does not leave others idle
+    (head, tail, chunks) = html_split_folders(fileString, ncpu * 4)
+    if len(chunks) < 2:
+        return parse_html_text(fileString, DEBUG, ADD_EMPTY, engine, stats,
+                               True, errors)
+    parse_now = partial(parse_html_chunk, head=head, tail=tail, DEBUG=DEBUG,
+                        ADD_EMPTY=ADD_EMPTY, engine=engine,
+                        recover=errors is not None)
+    if ncpu < 2:
+        results = list(map(parse_now, chunks))
+    else:
+        with Pool(min(ncpu, len(chunks))) as pool:
+            results = pool.map(parse_now, chunks)
+
+    addressSet = []
+    stats_sum = {}
+    errors_all = []
+    for (i, (addressChunk, description, location, chunk_stats,
+             chunk_errors)) in enumerate(results):
+        if (description is not None and len(addressSet) == 0) or \
+                (i < len(results) - 1 and location != ''):
+            # chunks do not join like the whole file, parse it as one
+            if DEBUG:
+                print(f'parse_html_split: chunk {i} does not join, parse whole')
+            return parse_html_text(fileString, DEBUG, ADD_EMPTY, engine, stats,
+                                   True, errors)
+        if i > 0 and description is not None:
+            addressSet[-1] = address_describe(addressSet[-1], description)
+        addressSet.extend(addressChunk)
+        for key in chunk_stats:
+            stats_sum[key] = stats_sum.get(key, 0) + chunk_stats[key]
+        if chunk_errors is not None:
+            errors_all.extend(chunk_errors)
+    if errors is not None:
+        errors.extend(errors_all)
+    if stats is not None:
+        # every chunk repeats the text around the root dl, count it once
+        frame_stats = {}
+        html_preprocess(head + tail, ADD_EMPTY, frame_stats)
+        for key in ('icon_bytes', 'emoji_bytes', 'space_bytes'):
+            stats_sum[key] -= (len(chunks) - 1) * frame_stats[key]
+        for key in stats_sum:
+            stats[key] = stats.get(key, 0) + stats_sum[key]
+    return (addressSet, None)
+
+
+def parse_file(FILENAME, engine='soup', ncpu=1):
+    """
+    parse_html wrapper used by parse_path for a single file. The file is
+    parsed once in the recovering mode of parse_html, a malformed element
+    is skipped and reported in diagnostics instead of failing the file.
+    Exceptions that still fail the file are returned instead of raised so
+    one bad file does not stop a worker process of the parse_path pool.
+    Firefox places.sqlite files are read by bookmarks_browser.read_places,
+    Chromium Bookmarks json files by bookmarks_browser.read_chromium.
+    
+    Args:
+        FILENAME (str): path to the html, places.sqlite or Bookmarks file
+        engine (str): parse_html engine, 'soup' (default) or 'stream'
+        ncpu (int): if > 1 html files of at least PARSE_SPLIT_BYTES are
+            parsed by parse_html_split on ncpu processes
+    Returns: (FILENAME, addressSet, addrLenMax, error, diagnostics, stats)
+        addressSet = list of addresses, None if the parse failed
+        addrLenMax = output of parsed_max_address_len
+        error = None or str message of the exception that failed the parse
+        diagnostics = list of parse_diagnostic dicts of the recovered errors
+        stats = dict telemetry of the parse, see parse_file_stats
+    """
+    t1 = time.perf_counter()
+    stats = {}
+    diagnostics = []
+    error = None
+    addressSet = None
+    try:
+        if bb.is_places_file(FILENAME):
+            engine = 'places'
+            addressSet = bb.read_places(FILENAME)
+        elif bb.is_chromium_file(FILENAME):
+            engine = 'chromium'
+            addressSet = bb.read_chromium(FILENAME)
+        elif ncpu > 1 and file_stat(FILENAME)[0] >= PARSE_SPLIT_BYTES:
+            (addressSet, soup) = parse_html_split(FILENAME, ncpu,
+                                                  engine=engine, stats=stats,
+                                                  errors=diagnostics)
+        else:
+            (addressSet, soup) = parse_html(FILENAME, engine=engine,
+                                            stats=stats, detach=True,
+                                            errors=diagnostics)
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        addressSet = None
+    stats = parse_file_stats(FILENAME, engine, addressSet, diagnostics,
+                             time.perf_counter() - t1, stats)
+    if addressSet is None:
+        return (FILENAME, None, 0, error, diagnostics, stats)
+    addrLenMax = parsed_max_address_len(addressSet)
+
+    # detached plain str so the address set can be passed back from a worker
+    #   process and the soup is already freed
+    return (FILENAME, addressSet, addrLenMax, None, diagnostics, stats)
+
+
+def parse_file_stats(FILENAME, engine, addressSet, diagnostics, seconds,
+                     stats=None):
+    """
+    return the telemetry record of one parse_file call, a flat dict that
+    can be written as a json line, see parse_stats_write
+    
+    Args:
+        FILENAME (str): file parsed
+        engine (str): parse_html engine, 'places' or 'chromium'
+        addressSet (list): parse output or None if the parse failed
+        diagnostics (list): recovered errors
+        seconds (float): wall time of the parse including pre-processing
+        stats (dict): html_preprocess stats of the parse or None
+    Returns:
+        (dict) keys
+            file, engine
+            source              'parse', parse_path changes it to 'cache' or
+                                'duplicate' for files that were not parsed
+            bytes               size of the file read
+            icon_bytes, emoji_bytes, space_bytes    removed by html_preprocess
+            charset, decode_errors  html files only, see html_read
+            links, folders      addresses and distinct folders holding them
+            descriptions        addresses with a dd description
+            errors              recovered errors
+            parse_seconds       wall time of the parse
+            preprocess_seconds  part of parse_seconds spent in html_preprocess
+            peak_mb             peak resident memory of the parsing process
+                                so far, None where it can not be measured
+    """
+    record = {'file': FILENAME, 'engine': engine, 'source': 'parse',
+              'bytes': file_stat(FILENAME)[0],
+              'icon_bytes': 0, 'emoji_bytes': 0, 'space_bytes': 0,
+              'links': 0, 'folders': 0, 'descriptions': 0,
+              'errors': len(diagnostics),
+              'parse_seconds': seconds, 'preprocess_seconds': 0.0}
+    if stats is not None:
+        record.update(stats)
+    if addressSet is not None:
+        record['links'] = len(addressSet)
+        record['folders'] = len({addr.location for addr in addressSet})
+        record['descriptions'] = sum(
+            [addr.description is not None for addr in addressSet])
+    record['peak_mb'] = peak_rss_mb()
+    return record
+
+
+def parse_stats_write(FILENAME, file_stats):
+    """
+    write the parse_path file_stats records to FILENAME, one json per line
+    
+    Args:
+        FILENAME (str): output file, replaced if it exists
+        file_stats (list): parse_file_stats dicts
+    """
+    with open(FILENAME, 'w') as fHan:
+        for record in file_stats:
+            fHan.write(json.dumps(record) + '\n')
+
+
+class parseCache():
+    """
+    On-disk cache of parse_file output so unchanged bookmark files are
+    never parsed twice.
+    
+    The cache path holds an index file, key = file path, value = 
+    [size, mtime_ns, sha256], and one json entry file per content hash.
+    The content hash is only computed again when the size or modification
+    time of a file changed, and a file that was only touched or copied 
+    still matches its entry by content hash.
+
+    Args:
+        cache_path (str): directory to store the cache in, created if missing
+    """
+    index_name = 'parse_cache_index.json'
+    version = 6     # change when parse output changes to invalidate entries
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.index = {}
+        self.hits = 0
+        self.misses = 0
+        if not os.path.exists(cache_path):
+            os.makedirs(cache_path)
+        index_file = os.path.join(cache_path, self.index_name)
+        if os.path.exists(index_file):
+            try:
+                with open(index_file, 'r') as fJson:
+                    self.index = json.load(fJson)
+            except ValueError:
+                print(f'parse cache index unreadable, starting new: {index_file}')
+
+    def file_key(self, FILENAME):
+        """ return [size, mtime_ns, sha256] of FILENAME and update index """
+        (size, mtime_ns) = file_stat(FILENAME)
+        key = self.index.get(FILENAME)
+        if (key is not None and key[0] == size and key[1] == mtime_ns):
+            return key
+        key = [size, mtime_ns, file_hash(FILENAME)]
+        self.index[FILENAME] = key
+        return key
+
+    def entry_file(self, key, engine='soup'):
+        """ return the path of the entry file for key and engine """
+        return os.path.join(self.cache_path,
+                            f'{key[2]}_{engine}_v{self.version}.json')
+
+    def contains(self, FILENAME, engine='soup'):
+        """ return True if an entry file exists for FILENAME and engine """
+        return os.path.exists(self.entry_file(self.file_key(FILENAME), engine))
+
+    def get(self, FILENAME, engine='soup'):
+        """
+        return parse_file output for FILENAME from the cache or None if
+        the file is not cached or the entry does not match
+        """
+        key = self.file_key(FILENAME)
+        entry_file = self.entry_file(key, engine)
+        if os.path.exists(entry_file):
+            try:
+                with open(entry_file, 'r') as fJson:
+                    entry = json.load(fJson)
+            except ValueError:
+                entry = None
+            if entry is not None and entry['size'] == key[0]:
+                self.hits += 1
+                addressSet = entry['addressSet']
+                if addressSet is not None:
+                    addressSet = [bc.parsedAddress._make(addr) 
+                                  for addr in addressSet]
+                stats = dict(entry['stats'], file=FILENAME, source='cache')
+                return (FILENAME, addressSet, entry['addrLenMax'],
+                        entry['error'], entry['diagnostics'], stats)
+        self.misses += 1
+        return None
+
+    def put(self, result, engine='soup'):
+        """
+        store parse_file output, result, in the cache. a failed parse is not
+        stored, the error may be transient like an OSError so the file is
+        parsed again on the next run
+        """
+        (FILENAME, addressSet, addrLenMax, error, diagnostics, stats) = result
+        if error is not None:
+            return
+        key = self.file_key(FILENAME)
+        entry = {'size': key[0],
+                 'addressSet': addressSet,
+                 'addrLenMax': addrLenMax,
+                 'error': error,
+                 'diagnostics': diagnostics,
+                 'stats': stats}
+        with open(self.entry_file(key, engine), 'w') as fJson:
+            json.dump(entry, fJson)
+
+    def report(self):
+        """ print the cache hit and miss counts """
+        print(f'parse cache: {self.hits} hits, {self.misses} misses, '
+              f'{self.cache_path}')
+
+    def save(self):
+        """ write the index file """
+        with open(os.path.join(self.cache_path, self.index_name), 'w') as fJson:
+            json.dump(self.index, fJson)
+
+
+def parse_manifest_read(FILENAME):
+    """
+    read a manifest written by parse_manifest_write
+    
+    Args:
+        FILENAME (str): manifest file
+    Returns:
+        (dict) key = file, value = modification time, {} if FILENAME does
+        not exist or can not be read
+    """
+    if not os.path.exists(FILENAME):
+        return {}
+    try:
+        with open(FILENAME, 'r') as fJson:
+            manifest = json.load(fJson)
+    except ValueError:
+        print(f'manifest unreadable, parse all files: {FILENAME}')
+        return {}
+    return manifest['files']
+
+
+def parse_manifest_write(FILENAME, file_ages, manifest=None):
+    """
+    write the files merged into an archive so the next parse_path with the
+    manifest only parses new and changed files
+    
+    Args:
+        FILENAME (str): manifest file, convention is the archive json file
+            name + .manifest
+        file_ages (dict): parse_path file_ages of this run
+        manifest (dict): previous manifest, the files merged before this run
+            are kept in the new manifest, default None
+    Returns:
+        (dict) the manifest written
+    """
+    manifest_new = {} if manifest is None else dict(manifest)
+    manifest_new.update(file_ages)
+    with open(FILENAME, 'w') as fJson:
+        json.dump({'version': 1, 'files': manifest_new}, fJson, indent=0)
+    return manifest_new
+
+
+def parse_path_files(file_path):
+    """
+    return the *bookmark*.html, places.sqlite and Chromium Bookmarks files
+    parse_path works on. *bookmark*.html.gz, .bz2 and .xz files and the html
+    members of zip archives are included, a zip archive is replaced by its
+    members named as in file_archive.
+    
+    Args:
+        file_path (str): see parse_path
+    Returns:
+        list of existing files with bookmark in the name or named 
+        places.sqlite or None if the input is invalid
+    """
+    if type(file_path) is str:
+        files = glob.glob(os.path.join(file_path, '**/*.html'), recursive=True)
+        files += glob.glob(os.path.join(file_path, '**/places.sqlite'),
+                           recursive=True)
+        files += glob.glob(os.path.join(file_path, '**/Bookmarks'),
+                           recursive=True)
+        for extension in FILE_COMPRESSED:
+            files += glob.glob(os.path.join(file_path, '**/*.html' + extension),
+                               recursive=True)
+        files += glob.glob(os.path.join(file_path, '**/*' + FILE_ZIP),
+                           recursive=True)
+    elif type(file_path) is list:
+        files = file_path
+    else:
+        print(f'Invalid input to parse_path of type: {type(file_path)}')
+        return None
+
+    files_found = []
+    for fileNow in files:
+        if fileNow.lower().endswith(FILE_ZIP) and os.path.isfile(fileNow):
+            files_found.extend(file_zip_members(fileNow))
+        else:
+            files_found.append(fileNow)
+    bookmark_match = re.compile('bookmark')
+    return [fileNow for fileNow in files_found
+            if file_exists(fileNow) and 
+            (bookmark_match.search(fileNow.lower()) is not None or
+             bb.is_places_file(fileNow))]
+
+
+def parse_path(file_path, ncpu=1, engine='soup', cache_path=None, dedup=True,
+               manifest=None, diagnostics=None, file_stats=None):
     """
     For *bookmark*.html files within file_path tree, use parse_html to parse
-    for links. List of files generated by recursive search.
+    for links. List of files generated by recursive search. Firefox profile
+    places.sqlite and Chromium profile Bookmarks files are read directly,
+    see bookmarks_browser. Compressed html files and html members of zip
+    archives are decompressed as they are read, see parse_path_files, the
+    archive path joined with the member name is their file location.
     
     Args:
         file_path (str): system file path to look for html files to parse
             if file_path is a list treats as individual set of files to 
             process not a path to search
-        ncpu (int): number of processes, 1 or >1. if > 1 then multiprocessing
-            XXX but not currently implemented because numerous overlapping
-            lists defined and decided not worth the effort.
+        ncpu (int): number of processes, 1 or >1. if > 1 then files are
+            parsed by parse_file in a multiprocessing pool of ncpu processes.
+            results are collected in the file order so output is the same
+            as for 1 process. if only 1 file is parsed it is split at its
+            top-level folders over the processes, see parse_html_split.
+        engine (str): parse_html engine, 'soup' (default) or 'stream'
+        cache_path (str): if not None (default) directory of a parseCache.
+            files found in the cache are not parsed, parsed files are added.
+        dedup (bool): if True (default) byte identical files are parsed once
+            and every copy gets the same addresses tagged with its own name,
+            the output is the same as parsing every copy.
+        manifest (dict): if not None (default) the file_ages of files already
+            merged, see parse_manifest_read. files with the same modification
+            time as in manifest are skipped, only new and changed files are
+            parsed.
+        diagnostics (dict): if not None filled with key = file, value = list
+            of parse_diagnostic dicts for each file with recovered errors or
+            that failed, a failed file ends with the error that failed it
+        file_stats (list): if not None a parse_file_stats dict is appended
+            for every file in the file order, failed files included. write
+            it with parse_stats_write to find the files that are slow to parse
     Returns: (addresses, file_ages, bad_files)
-        addresses = list of lists, contains bookmarks in files parsed 
+        addresses = list of bc.parsedAddress, bookmarks in files parsed 
         file_ages = dictionary of files parsed.
             key = file, value = modification time
         bad_files = list of files that fail to process
         
         will return (None, None, None) if invalid input
     """
-    if type(file_path) is str:
-        files = glob.glob(os.path.join(file_path, '**/*.html'), recursive=True)
-    elif type(file_path) is list:
-        files = file_path
-    else:
-        print(f'Invalid input to parse_path of type: {type(file_path)}')
+    files = parse_path_files(file_path)
+    if files is None:
         return (None, None, None)
 
     addresses = []  # list of lists, contains bookmarks in files parsed
     file_ages = {}  # dictionary: key = file, value = modification time
     bad_files = []  # files that fail to process
-    bookmark_match = re.compile('bookmark')
+    for addressSet in iter_parse_path(files, file_ages, bad_files, ncpu=ncpu,
+                                      engine=engine, cache_path=cache_path,
+                                      dedup=dedup, manifest=manifest,
+                                      diagnostics=diagnostics,
+                                      file_stats=file_stats):
+        addresses.extend(addressSet)
+    
+    return(addresses, file_ages, bad_files)
+
+
+def iter_parse_path(file_path, file_ages, bad_files, ncpu=1, engine='soup',
+                    cache_path=None, dedup=True, manifest=None,
+                    diagnostics=None, file_stats=None):
+    """
+    Generator version of parse_path, yields the addresses of each file as
+    soon as the file is parsed so only one file is held at a time.
+    Files are yielded in the same order as parse_path for any ncpu, cached
+    files are read from the cache when their turn comes.
+    
+    Args:
+        file_path (str): see parse_path
+        file_ages (dict): filled with key = file, value = modification time
+            for every file yielded
+        bad_files (list): filled with the files that fail to process
+        ncpu (int): see parse_path
+        engine (str): see parse_path
+        cache_path (str): see parse_path
+        dedup (bool): see parse_path
+        manifest (dict): see parse_path
+        diagnostics (dict): see parse_path
+        file_stats (list): see parse_path
+    Yields:
+        addressSet (list): bc.parsedAddress bookmarks of one file, each
+            tagged with the file name as file_location. files that fail are
+            not yielded.
+    """
+    files = parse_path_files(file_path)
+    if files is None:
+        return
+    if manifest is not None:
+        files_all = len(files)
+        files = [fileNow for fileNow in files
+                 if manifest.get(fileNow) != file_age(fileNow)]
+        print(f'parse_path: {files_all - len(files)} files unchanged since '
+              f'the manifest not parsed')
+
+    cache = None
+    if cache_path is not None:
+        cache = parseCache(cache_path)
+    
+    # byte identical copies are parsed once, the copies reuse the output
+    duplicate_of = {}
+    if dedup:
+        duplicate_of = parse_path_duplicates(files, cache)
+        if len(duplicate_of) > 0:
+            print(f'parse_path: {len(duplicate_of)} duplicate files not parsed')
+    duplicate_left = {}  # key = first file, value = copies not yielded yet
+    for fileFirst in duplicate_of.values():
+        duplicate_left[fileFirst] = duplicate_left.get(fileFirst, 0) + 1
+    duplicate_kept = {}  # key = first file, value = untagged parse output
+    
+    files_parse = [fileNow for fileNow in files if fileNow not in duplicate_of]
+    if cache is not None:
+        files_parse = [fileNow for fileNow in files_parse
+                       if not cache.contains(fileNow, engine)]
+        cache.misses += len(files_parse)
+    parse_set = set(files_parse)
+    parse_now = partial(parse_file, engine=engine)
+    if ncpu is not None and ncpu > 1 and len(files_parse) < 2:
+        # a single file to parse, split it over the processes instead
+        parse_now = partial(parse_file, engine=engine, ncpu=ncpu)
+
+    def results_ordered(parsed):
+        # merge cached, parsed and duplicate output back into the file order
+        for fileNow in files:
+            result = None
+            if fileNow in duplicate_of:
+                fileFirst = duplicate_of[fileNow]
+                duplicate_left[fileFirst] -= 1
+                if duplicate_left[fileFirst] == 0:
+                    result = duplicate_kept.pop(fileFirst)
+                else:
+                    result = parse_result_copy(duplicate_kept[fileFirst])
+                yield (fileNow,) + result[1:5] + (
+                    dict(result[5], file=fileNow, source='duplicate'),)
+                continue
+            elif cache is None:
+                result = next(parsed)
+            elif fileNow in parse_set:
+                result = next(parsed)
+                cache.put(result, engine)
+            else:
+                result = cache.get(fileNow, engine)
+                if result is None:  # entry unreadable, parse it here
+                    result = parse_now(fileNow)
+                    cache.put(result, engine)
+            if fileNow in duplicate_left:
+                # keep a copy because parse_path_tag appends the file name
+                duplicate_kept[fileNow] = parse_result_copy(result)
+            yield result
+
+    if ncpu is None or ncpu < 2 or len(files_parse) < 2:
+        yield from parse_path_tag(results_ordered(map(parse_now, files_parse)),
+                                  file_ages, bad_files, diagnostics,
+                                  file_stats)
+    else:
+        with Pool(min(ncpu, len(files_parse))) as pool:
+            # imap returns results in the order of files
+            yield from parse_path_tag(
+                results_ordered(pool.imap(parse_now, files_parse)),
+                file_ages, bad_files, diagnostics, file_stats)
+
+    if cache is not None:
+        cache.save()
+        cache.report()
+
+
+def parse_path_duplicates(files, cache=None):
+    """
+    find files with the same content, only files of the same size are hashed
+    
+    Args:
+        files (list): files to compare
+        cache (parseCache): if not None its file_key is used for the hash so
+            files already in the cache index are not read again
+    Returns:
+        (dict) key = file that repeats the content of an earlier file in
+            files, value = that first file
+    """
+    files_by_size = {}
     for fileNow in files:
-        
-        if not os.path.exists(fileNow):
-                    continue
-        
-        if bookmark_match.search(fileNow.lower()) is None:
+        files_by_size.setdefault(file_stat(fileNow)[0], []).append(fileNow)
+    
+    duplicate_of = {}
+    for files_same in files_by_size.values():
+        if len(files_same) < 2:
+            continue
+        first_by_hash = {}
+        for fileNow in files_same:
+            if cache is None:
+                hash_now = file_hash(fileNow)
+            else:
+                hash_now = cache.file_key(fileNow)[2]
+            fileFirst = first_by_hash.setdefault(hash_now, fileNow)
+            if fileFirst != fileNow:
+                duplicate_of[fileNow] = fileFirst
+    return duplicate_of
+
+
+def parse_result_copy(result):
+    """ return a copy of parse_file output with its own address list """
+    (FILENAME, addressSet, addrLenMax, error, diagnostics, stats) = result
+    if addressSet is not None:
+        addressSet = list(addressSet)
+    return (FILENAME, addressSet, addrLenMax, error, list(diagnostics),
+            dict(stats))
+
+
+def parse_path_tag(results, file_ages, bad_files, diagnostics=None,
+                   file_stats=None):
+    """
+    Tag parse_file output with the file name for iter_parse_path.
+    
+    Args:
+        results (iterable): parse_file output tuples in file order
+        file_ages (dict): see iter_parse_path
+        bad_files (list): see iter_parse_path
+        diagnostics (dict): see parse_path
+        file_stats (list): see parse_path
+    Yields:
+        addressSet (list): see iter_parse_path
+    """
+    for (fileNow, addressSet, addrLenMax, error, errors, stats) in results:
+        if file_stats is not None:
+            file_stats.append(stats)
+        if error is not None:
+            errors = errors + [parse_diagnostic(error, None, None)]
+        if diagnostics is not None and len(errors) > 0:
+            diagnostics[fileNow] = errors
+        if error is not None:
+            print(f'parse_html failed on {fileNow}, error: {error}')
+            bad_files.append(fileNow)
             continue
-        
-        try:
-            (addressSet, soup) = parse_html(fileNow)
-            addrLenMax = parsed_max_address_len(addressSet)
-        except Exception:
-            try:            
-                (addressSet, soup) = parse_html(fileNow, ADD_EMPTY=False)
-                addrLenMax = parsed_max_address_len(addressSet)                
-            except Exception as e:
-                print(f'parse_html failed on {fileNow}, error: {e}')
-                bad_files.append(fileNow)
-                continue
         
         print(f'Parsed: {len(addressSet)}, {addrLenMax}, {fileNow}')
+        if len(errors) > 0:
+            print(f'parse_html recovered {len(errors)} errors in {fileNow}')
         
         # tag all the html addresses with the current filename
-        for i in range(len(addressSet)):
-            addressSet[i].append(fileNow)
-        
-        # extend the set of addresses
-        addresses = addresses + addressSet
+        for i, addr in enumerate(addressSet):
+            addressSet[i] = addr._replace(file_location=fileNow)
     
         # get the file age
         file_ages[fileNow] = file_age(fileNow)
-    
-    return(addresses, file_ages, bad_files)
+        
+        yield addressSet
 
 
 def stringNChar(STR_IN, N_PRINT):
@@ -524,27 +1927,7 @@ def string_remove_emoji(string):
     Returns:
         (str): without emoji characters
     """
-    emoji_pattern = re.compile("["
-                               u"\U0001F600-\U0001F64F"  # emoticons
-                               u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                               u"\U0001F680-\U0001F6FF"  # transport & map symbols
-                               u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                               u"\U00002500-\U00002BEF"  # chinese char
-                               u"\U00002702-\U000027B0"
-                               u"\U00002702-\U000027B0"
-                               u"\U000024C2-\U0001F251"
-                               u"\U0001f926-\U0001f937"
-                               u"\U00010000-\U0010ffff"
-                               u"\u2640-\u2642"
-                               u"\u2600-\u2B55"
-                               u"\u200d"
-                               u"\u23cf"
-                               u"\u23e9"
-                               u"\u231a"
-                               u"\ufe0f"  # dingbats
-                               u"\u2122"  # trademark symbol
-                               u"\u3030"
-                               "]+", flags=re.UNICODE)
+    emoji_pattern = re.compile(EMOJI_CLASS + "+", flags=re.UNICODE)
     return emoji_pattern.sub(r'', string)
 
 
@@ -589,124 +1972,149 @@ def write_address_set(ADDR_SET, ADDR_LEN_MAX, FILENAME):
     return 0
 
 
-def debug_parsed_output(ADDR_SET, SOUP, FILENAME_DEBUG):
-    """ verify the count
-        
-    generate reference file with command line
-        cat bookmarks.html | sed 's/A HREF/\n/g' | sed 's/<\/A>/\n/g' | 
-           grep '=\"' | sed 's/=\" /\"/g' | sed 's/\" /\n/' | sed 's/\"AD/\nAD/' |
-           grep '^=\"h' | sed 's/=\"//' > bookmarks_reduced.txt
-    which is more accurate than:
-        Example creation of test file: 
-         grep -i 'a href=' bookmarks_test.html | sed 's/HREF="/HREF=/g' | 
-             sed 's/"/\n/g' |  sed 's/HREF/\nHREF/' | grep 'HREF' | 
-             sed 's/HREF=//' > bookmarks_test.txt
-
-    """
-    
-    if FILENAME_DEBUG is None:
-        FILENAME_DEBUG = 'bookmarks_reduced2.txt'
-    
-    #soup = bs.BeautifulSoup(open(fileInputName),"lxml")
-    tagSet = SOUP.find_all("a")
-    
-    if len(ADDR_SET) != len(tagSet):
-        # create a dictionary against the shorter variable
-        # XXX add a comparison of the ADDR_SET href to the tagSet[i].get('href') and tagset[i].string
-        # create a dictionary against ADDR_SET then lookup
-        # or vice versa where the dictionary is the shorter object
-        if (len(ADDR_SET) < len(tagSet)):
-            print(f'should be more tags; some left out? html < soup: {len(ADDR_SET)} < {len(tagSet)}')
-            longer = {}
-            for addrI in range(0,len(ADDR_SET)):
-                # href = string
-                longer[ADDR_SET[addrI][1]] = ADDR_SET[addrI][0]
-            for tagI in range(0,len(tagSet)):
-                # loop across larger set; check if in shorter set; if not print
-                if longer.get(tagSet[tagI].get('href')) is None:
-                    if tagSet[tagI].string is None:
-                        stringName = "None"
-                    else:
-                        stringName = tagSet[tagI].string
-                    if tagSet[tagI].get('href') is None:
-                        refName = "None"
-                    else:
-                        refName = tagSet[tagI].get('href')
-                    print(str(tagI) + "::" + stringName + "::" + refName)
-                    
+# verify_reference tokens: folder name, link, folder close
+VERIFY_RE = re.compile(
+    r'<H[13]\b[^>]*>(?P<folder>.*?)</H[13]>'
+    r'|<A\b(?P<attrs>[^>]*)>(?P<label>.*?)</A>'
+    r'|(?P<dl_close></DL>)',
+    flags=re.IGNORECASE | re.DOTALL)
+VERIFY_HREF_RE = re.compile(r'\bHREF="([^"]*)"', flags=re.IGNORECASE)
+VERIFY_TAG_RE = re.compile(r'<[^>]*>')
+VERIFY_SKIP = ('Recently Bookmarked', 'Recent Tags')  # skipped by tagElement
+VERIFY_EMPTY = 'empty'  # href of the html_preprocess empty folder link
+
+
+def verify_reference(fileString):
+    """
+    return the links of pre-processed bookmark html text found by a flat
+    scan of the text with VERIFY_RE, no tree is built. The folders are
+    followed like getChildren does: a h1 or h3 name is pushed and the
+    next </DL> pops it.
+    
+    Args:
+        fileString (str): html text after html_preprocess
+    Returns:
+        (list) (url, label, location) tuple for each link in file order
+    """
+    links = []
+    folders = []
+    for match in VERIFY_RE.finditer(fileString):
+        if match.lastgroup == 'dl_close':
+            if len(folders) > 0:
+                folders.pop()
+        elif match.group('folder') is not None:
+            folders.append(html.unescape(
+                VERIFY_TAG_RE.sub('', match.group('folder'))))
         else:
-            print(f'where did the extra tags come from? html > soup: {len(ADDR_SET)} > {len(tagSet)}')
-            longer = {}
-            for tagI in range(0,len(tagSet)):
-                # href = string
-                longer[tagSet[tagI].get('href')] = tagSet[tagI].string
-            for addrI in range(0,len(ADDR_SET)):
-                # loop across larger set; check if in shorter set; if not print
-                if longer.get(ADDR_SET[addrI][1]) is None:
-                    if ADDR_SET[addrI][0] is None:
-                        stringName = "None"
-                    else:
-                        stringName = ADDR_SET[addrI][0]
-                    if ADDR_SET[addrI][1] is None:
-                        refName = "None"
-                    else:
-                        refName = ADDR_SET[addrI][1]
-                    print(str(addrI) + "::" + ADDR_SET[addrI][0] + "::" + refName)
-    
-    with open(FILENAME_DEBUG,'r') as fileHan:
-        bookmarksReduced = fileHan.readlines()
-    bookmarksReduced = [ x.strip() for x in bookmarksReduced ]        
-    print(f'Length of bookmarksReduced: {len(bookmarksReduced)}')
-    
-    if len(ADDR_SET) != len(bookmarksReduced):
-        # create a dictionary against the shorter variable
-        # XXX add a comparison of the ADDR_SET href to the tagSet[i].get('href') and tagset[i].string
-        # create a dictionary against ADDR_SET then lookup
-        # or vice versa where the dictionary is the shorter object
-        if (len(ADDR_SET) < len(bookmarksReduced)):
-            print(f'should be more html; some left out? {len(ADDR_SET)} vs {len(bookmarksReduced)}')
-            longer = {}
-            for addrI in range(0,len(ADDR_SET)):
-                # href = string
-                longer[ADDR_SET[addrI][1]] = ADDR_SET[addrI][0]
-            deltaFound = 0
-            for tagI in range(0,len(bookmarksReduced)):
-                # loop across larger set; check if in shorter set; if not print
-                if longer.get(bookmarksReduced[tagI]) is None:
-                    if bookmarksReduced[tagI] is None:
-                        stringName = "None"
-                    else:
-                        if longer.get(bookmarksReduced[tagI] + "=") is None:
-                            # must have stripped trailing = off of some 
-                            #   links; add back in to check all are present
-                            #   they are; awesome
-                            stringName = bookmarksReduced[tagI]
-                            if len(stringName) > 200:
-                                stringName = stringName[0:200] + '...'
-                            deltaFound += 1
-                            print(str(tagI) + "::" + stringName)
-                    
-            print("Found {0} different, {1} html vs {2} soup based set".
-                  format(deltaFound, len(bookmarksReduced), len(ADDR_SET)))
+            label = html.unescape(VERIFY_TAG_RE.sub('', match.group('label')))
+            if label in VERIFY_SKIP:
+                continue
+            href = VERIFY_HREF_RE.search(match.group('attrs'))
+            if href is not None:
+                href = html.unescape(href.group(1))
+            if href == VERIFY_EMPTY:
+                # the empty folder link is not a bookmark, not checked
+                continue
+            links.append((href, label, '::'.join(folders)))
+    return links
+
+
+def verify_parsed_output(ADDR_SET, FILENAME, ADD_EMPTY=True, DEBUG=False):
+    """
+    verify a parse of FILENAME is complete by comparing ADDR_SET with the
+    links verify_reference finds in the file. Both sides are indexed by
+    href, and the links left over by label, so the check is linear in the
+    number of links and can run after every parse of a large file.
+    
+    Args:
+        ADDR_SET (list): parse_html output for FILENAME, parsedAddress
+        FILENAME (str): the file that was parsed
+        ADD_EMPTY (bool): html_preprocess option the file was parsed with
+        DEBUG (bool): default=False, if True print the report
+    Returns:
+        (dict) report, each list holds {'url', 'label', 'location'} dicts
+            'links'     number of links in the file
+            'parsed'    number of addresses checked in ADDR_SET
+            the html_preprocess empty folder links are not counted or checked
+            'missing'   links in the file not parsed
+            'extra'     parsed addresses not in the file
+            'folder'    links parsed with another location, the parsed
+                        one is in key 'parsed_location'
+            'href'      links parsed with the same label but another url,
+                        the parsed one is in key 'parsed_url'
+    """
+    reference = verify_reference(
+        html_preprocess(html_read(FILENAME), ADD_EMPTY))
+    
+    # key = href, value = list of (label, location) not matched yet
+    file_by_href = {}
+    for (url, label, location) in reference:
+        file_by_href.setdefault(url, []).append((label, location))
+    parsed_by_href = {}
+    for addr in ADDR_SET:
+        if addr.url == VERIFY_EMPTY:
+            continue
+        parsed_by_href.setdefault(addr.url, []).append(
+            (str(addr.label), str(addr.location)))
+    
+    report = {'links': len(reference),
+              'parsed': sum(len(links) for links in parsed_by_href.values()),
+              'missing': [], 'extra': [], 'folder': [], 'href': []}
+    missing_by_label = {}
+    for (url, file_links) in file_by_href.items():
+        parsed_links = parsed_by_href.pop(url, [])
+        # same location first, the rest of the same href moved folder
+        parsed_left = {}
+        for link in parsed_links:
+            parsed_left.setdefault(link[1], []).append(link)
+        file_left = []
+        for link in file_links:
+            if len(parsed_left.get(link[1], [])) > 0:
+                parsed_left[link[1]].pop()
+            else:
+                file_left.append(link)
+        parsed_left = [link for links in parsed_left.values() for link in links]
+        for (link, link_parsed) in zip(file_left, parsed_left):
+            report['folder'].append({'url': url, 'label': link[0],
+                                     'location': link[1],
+                                     'parsed_location': link_parsed[1]})
+        for link in file_left[len(parsed_left):]:
+            missing_by_label.setdefault(link[0].strip(), []).append(
+                {'url': url, 'label': link[0], 'location': link[1]})
+        for link in parsed_left[len(file_left):]:
+            report['extra'].append({'url': url, 'label': link[0],
+                                    'location': link[1]})
+    for (url, parsed_links) in parsed_by_href.items():
+        for link in parsed_links:
+            report['extra'].append({'url': url, 'label': link[0],
+                                    'location': link[1]})
+    
+    # a missing and an extra link with the same label is one changed href
+    extra = []
+    for link in report['extra']:
+        missing = missing_by_label.get(link['label'].strip(), [])
+        if len(missing) > 0:
+            report['href'].append(dict(missing.pop(0), parsed_url=link['url']))
         else:
-            print('where did the extra tags come from?')
-            longer = {}
-            for tagI in range(0,len(tagSet)):
-                # href = string
-                longer[tagSet[tagI].get('href')] = tagSet[tagI].string
-            for addrI in range(0,len(ADDR_SET)):
-                # loop across larger set; check if in shorter set; if not print
-                if longer.get(ADDR_SET[addrI][1]) is None:
-                    if ADDR_SET[addrI][0] is None:
-                        stringName = "None"
-                    else:
-                        stringName = ADDR_SET[addrI][0]
-                    if ADDR_SET[addrI][1] is None:
-                        refName = "None"
-                    else:
-                        refName = ADDR_SET[addrI][1]
-                    print(str(addrI) + "::" + ADDR_SET[addrI][0] + "::" + refName)
-    return 0
+            extra.append(link)
+    report['extra'] = extra
+    report['missing'] = [link for links in missing_by_label.values()
+                         for link in links]
+    
+    if DEBUG:
+        print(f'verify_parsed_output: {report["parsed"]} parsed of '
+              f'{report["links"]} links in {FILENAME}')
+        for key in ('missing', 'extra', 'folder', 'href'):
+            print(f'    {key}: {len(report[key])}')
+            for link in report[key]:
+                print(f'        {link}')
+    return report
+
+
+def verify_problems(report):
+    """ return the number of links verify_parsed_output found wrong """
+    return (len(report['missing']) + len(report['extra']) +
+            len(report['folder']) + len(report['href']))
 
 
 def test_code(DEBUG=False):
@@ -720,10 +2128,8 @@ def test_code(DEBUG=False):
     
     if DEBUG:
         fileInputName = 'bookmarks_test.html'
-        filedebug = os.path.join(pathName, 'bookmarks_test.txt')
     else:
         fileInputName = 'bookmarks.html'
-        filedebug = os.path.join(pathName, 'bookmarks.txt')
     fileInputName = os.path.join(pathName, fileInputName)
     
     (addressSet, soup) = parse_html(fileInputName)
@@ -733,7 +2139,7 @@ def test_code(DEBUG=False):
     write_address_set(addressSet, addrLenMax, os.path.join(pathName, 'addr_set.csv'))
     
     if DEBUG:
-        debug_parsed_output(addressSet, soup, FILENAME_DEBUG=filedebug)
+        verify_parsed_output(addressSet, fileInputName, DEBUG=True)
 
 
 if __name__ == '__main__':
@@ -454,6 +454,7 @@ class BookmarkGUI(tk.Frame):
         #     [3] = location
         #     [4] = description
         #     [5] = file location
+        #     [6] = last modified
         self.field_list = ['URL',
                       'label',
                       'age',
@@ -461,6 +462,7 @@ class BookmarkGUI(tk.Frame):
                       'location',
                       'description',
                       'file location',
+                      'last modified',
                       ]
         self.addrStruct_url_list = []  # used with search so removing from list is efficient
         
@@ -472,7 +474,7 @@ class BookmarkGUI(tk.Frame):
             if type(bookmarks_data) is str:
                 # assumes file path listing to read in the bookmark data
                 self.addrStruct = bc.bookmarks.Address_Struct_Read(bookmarks_data)
-            elif type(bookmarks_data) in [dict, type(bc.bookmarks())]: # QQQ will dict still work? maybe not
+            elif isinstance(bookmarks_data, dict): # QQQ will dict still work? maybe not, bookmarks subclasses do
                 # assumes bookmarks_data is the addrStruct data
                 self.addrStruct = bookmarks_data
         
@@ -1212,6 +1214,7 @@ class BookmarkGUI(tk.Frame):
         self.addrStruct[addr_url].set_value('location', addr_loc, overwrite=True)
         self.addrStruct[addr_url].set_value('description', addr_desc, overwrite=True)
         self.addrStruct[addr_url].set_value('file location', addr_file, overwrite=True)
+        self.addrStruct.index_clear()  # set_value in place, search index is stale
        
         self.console_log.add_text(f'url updated: {addr_url} at {time.time()}')
         self.update_action = True # set change tracker to true
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+benchmark the bookmarks_parse parser paths on synthetic bookmark files
+
+generates files with pybookmark.bookmarks_corpus for each link count and
+times every parser path on them. each path runs in its own process so the
+peak memory is the peak of that path alone.
+
+parser paths:
+    preprocess          html_preprocess of the whole file text
+    getChildren         getChildren walk of an already built soup
+    soup                parse_html engine='soup', preprocess + soup + walk
+    stream              parse_html engine='stream'
+    split               parse_html_split of the whole file on -f processes
+    parse_path          parse_path of the file split in -f files, 1 process
+    parse_path_pool     parse_path of the same files, -f processes
+
+reports per path and link count:
+    links/s             addresses parsed per second
+    MB/s                input file megabytes per second
+    peak MB             peak resident memory of the process (ru_maxrss),
+                        blank where the resource module does not exist.
+                        parse_path_pool is the main process only.
+    wrong               with -v, links bookmarks_parse.verify_parsed_output
+                        finds missing, extra or in the wrong folder. the
+                        check runs after the timing, the exit status is 1
+                        if any path has a wrong link
+
+examples:
+    $ python bookmarks_benchmark.py
+    $ python bookmarks_benchmark.py -n 1000 100000 1000000 -p stream soup
+    # keep the numbers to compare with a later run
+    $ python bookmarks_benchmark.py -o bench_before.jsonl
+    # CI: check every parse is complete
+    $ python bookmarks_benchmark.py -n 1000 10000 -v
+
+@author: Crumbs
+"""
+
+import argparse
+import contextlib
+import io
+import json
+from multiprocessing import Process, Queue
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(__file__))
+import pybookmark.bookmarks_corpus as corpus
+import pybookmark.bookmarks_parse as bp
+
+BENCH_PATHS = ['preprocess', 'getChildren', 'soup', 'stream', 'split',
+               'parse_path', 'parse_path_pool']
+
+
+def bench_path(path, files, verify=False):
+    """
+    run one parser path on files and return (seconds, links, peak MB, wrong)
+    meant to run in a fresh process, see bench_run
+
+    Args:
+        path (str): one of BENCH_PATHS
+        files (list): generated bookmark files, only parse_path paths use
+            more than the first, split uses the number of files as ncpu
+        verify (bool): if True check the addresses with
+            bp.verify_parsed_output after the timing
+    Returns:
+        (tuple) (seconds, number of links parsed, peak MB, wrong links)
+            wrong links is None if not verified or the path has no addresses
+    """
+    addresses_by_file = None
+    if path == 'preprocess':
+        with open(files[0]) as fileHan:
+            fileString = fileHan.read()
+        t1 = time.perf_counter()
+        bp.html_preprocess(fileString)
+        seconds = time.perf_counter() - t1
+        links = fileString.count('<DT><A ')
+    elif path == 'getChildren':
+        with open(files[0]) as fileHan:
+            soup = bp.bs.BeautifulSoup(bp.html_preprocess(fileHan.read()), 'lxml')
+        t1 = time.perf_counter()
+        (addressSet, folderNameList, folderPointer) = \
+            bp.getChildren(soup, [], [], -1, False)
+        seconds = time.perf_counter() - t1
+        links = len(addressSet)
+        addresses_by_file = {files[0]: bp.address_detach(addressSet)}
+    elif path in ('soup', 'stream'):
+        t1 = time.perf_counter()
+        (addressSet, soup) = bp.parse_html(files[0], engine=path)
+        seconds = time.perf_counter() - t1
+        links = len(addressSet)
+        addresses_by_file = {files[0]: addressSet}
+    elif path == 'split':
+        t1 = time.perf_counter()
+        (addressSet, soup) = bp.parse_html_split(files[0], ncpu=len(files) - 1)
+        seconds = time.perf_counter() - t1
+        links = len(addressSet)
+        addresses_by_file = {files[0]: addressSet}
+    elif path in ('parse_path', 'parse_path_pool'):
+        ncpu = len(files) if path == 'parse_path_pool' else 1
+        t1 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):   # Parsed: lines
+            (addresses, file_ages, bad_files) = bp.parse_path(files[1:],
+                                                              ncpu=ncpu)
+        seconds = time.perf_counter() - t1
+        links = len(addresses)
+        addresses_by_file = {fileNow: [] for fileNow in files[1:]}
+        for addr in addresses:
+            addresses_by_file[addr.file_location].append(addr)
+    else:
+        raise ValueError(f'bench_path: unknown path {path}')
+    peak = bp.peak_rss_mb()
+
+    wrong = None
+    if verify and addresses_by_file is not None:
+        wrong = sum(bp.verify_problems(bp.verify_parsed_output(addressSet, fileNow))
+                    for (fileNow, addressSet) in addresses_by_file.items())
+    return (seconds, links, peak, wrong)
+
+
+def bench_queue(queue, path, files, verify=False):
+    """ put the bench_path output on queue """
+    queue.put(bench_path(path, files, verify))
+
+
+def bench_run(path, files, verify=False):
+    """ run bench_path in a new process, see bench_path """
+    # not a Pool, pool workers can not start the parse_path_pool processes
+    queue = Queue()
+    process = Process(target=bench_queue, args=(queue, path, files, verify))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def bench_files(file_path, n_links, n_split, **kwargs):
+    """
+    write the corpus files for n_links
+
+    Args:
+        file_path (str): directory to write to
+        n_links (int): total number of links
+        n_split (int): number of files the parse_path paths parse
+        **kwargs: passed to corpus.corpus_write
+    Returns:
+        (list) [whole file] + n_split files with n_links together
+    """
+    files = [os.path.join(file_path, f'bookmarks_{n_links}.html')]
+    corpus.corpus_write(files[0], n_links=n_links, **kwargs)
+    for i in range(n_split):
+        files.append(os.path.join(file_path, f'bookmarks_{n_links}_{i}.html'))
+        corpus.corpus_write(files[-1], n_links=n_links // n_split,
+                            **dict(kwargs, seed=kwargs.get('seed', 350) + i + 1))
+    return files
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(usage=__doc__)
+    parser.add_argument('-n', '--links', dest='links', type=int, nargs='+',
+                        default=[1000, 10000, 100000],
+                        help='link counts to generate, default 1000 10000 100000')
+    parser.add_argument('-p', '--paths', dest='paths', nargs='+',
+                        default=BENCH_PATHS, choices=BENCH_PATHS,
+                        help='parser paths to run, default all')
+    parser.add_argument('-d', '--depth', dest='depth', type=int, default=6,
+                        help='maximum folder depth, default 6')
+    parser.add_argument('-r', '--dd-ratio', dest='dd_ratio', type=float,
+                        default=0.2,
+                        help='fraction of links with a description, default 0.2')
+    parser.add_argument('-i', '--icon-bytes', dest='icon_bytes', type=int,
+                        default=500,
+                        help='ICON data-uri size of each link, default 500')
+    parser.add_argument('-e', '--emoji-ratio', dest='emoji_ratio', type=float,
+                        default=0.05,
+                        help='fraction of labels with an emoji, default 0.05')
+    parser.add_argument('-s', '--seed', dest='seed', type=int, default=350,
+                        help='corpus random seed, default 350')
+    parser.add_argument('-f', '--files', dest='n_split', type=int, default=4,
+                        help='number of files for the parse_path paths and '
+                             'processes of split, default 4')
+    parser.add_argument('-o', '--output', dest='output_file', required=False,
+                        help='append results as json lines to this file')
+    parser.add_argument('-v', '--verify', dest='verify', action='store_true',
+                        help='check every parse with verify_parsed_output, '
+                             'exit status 1 if a link is wrong')
+    args = parser.parse_args()
+
+    corpus_args = {'depth': args.depth, 'dd_ratio': args.dd_ratio,
+                   'icon_bytes': args.icon_bytes,
+                   'emoji_ratio': args.emoji_ratio, 'seed': args.seed}
+    results = []
+    print(f'{"path":<16}{"links":>9}{"seconds":>10}{"links/s":>12}'
+          f'{"MB/s":>9}{"peak MB":>9}' + (f'{"wrong":>7}' if args.verify else ''))
+    with tempfile.TemporaryDirectory() as file_path:
+        for n_links in args.links:
+            files = bench_files(file_path, n_links, args.n_split, **corpus_args)
+            for path in args.paths:
+                files_use = files[1:] if path.startswith('parse_path') else files[0:1]
+                n_bytes = sum(os.path.getsize(fileNow) for fileNow in files_use)
+                (seconds, links, peak, wrong) = bench_run(path, files,
+                                                          args.verify)
+                result = dict(corpus_args, path=path, n_links=n_links,
+                              links=links, bytes=n_bytes, seconds=seconds,
+                              links_per_s=links / seconds if seconds > 0 else None,
+                              mb_per_s=n_bytes / 1048576 / seconds if seconds > 0 else None,
+                              peak_mb=peak, wrong=wrong)
+                results.append(result)
+                peak_str = '' if peak is None else f'{peak:.0f}'
+                wrong_str = '' if wrong is None else f'{wrong}'
+                print(f'{path:<16}{links:>9}{seconds:>10.3f}'
+                      f'{result["links_per_s"] or 0:>12.0f}'
+                      f'{result["mb_per_s"] or 0:>9.2f}{peak_str:>9}' +
+                      (f'{wrong_str:>7}' if args.verify else ''))
+
+    if args.output_file is not None:
+        with open(args.output_file, 'a') as fHan:
+            for result in results:
+                fHan.write(json.dumps(result) + '\n')
+
+    if any(result['wrong'] for result in results):
+        print('verify_parsed_output found wrong links')
+        sys.exit(1)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+benchmark the bookmarks_json codecs on a generated json archive
+
+generates a synthetic bookmark file with pybookmark.bookmarks_corpus,
+builds the bookmarks dictionary from it and writes the archive once per
+link count. then times every registered codec on it.
+
+reports per codec and link count:
+    load s              decode the archive file to the json dictionary
+    dump s              encode and write the json dictionary
+    read s              bookmarks.Address_Struct_Read with the codec
+    load MB/s           archive megabytes per second of load
+    dump MB/s           archive megabytes per second of dump
+    same                'yes' if the dump is byte for byte the file the
+                        stdlib json codec writes and load gives the same
+                        dictionary, the exit status is 1 if not
+
+examples:
+    $ python bookmarks_json_benchmark.py
+    $ python bookmarks_json_benchmark.py -n 10000 500000 -c json
+    # keep the numbers to compare with a later run
+    $ python bookmarks_json_benchmark.py -o json_before.jsonl
+
+@author: Crumbs
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(__file__))
+import pybookmark.bookmarks_class as bc
+import pybookmark.bookmarks_corpus as corpus
+import pybookmark.bookmarks_json as bj
+import pybookmark.bookmarks_parse as bp
+
+
+def bench_archive(file_path, n_links, **kwargs):
+    """
+    write the json archive of a synthetic bookmark file with n_links
+
+    Args:
+        file_path (str): directory to write to
+        n_links (int): number of links
+        **kwargs: passed to corpus.corpus_write
+    Returns:
+        (str) archive file written by write_json with the stdlib codec
+    """
+    file_html = os.path.join(file_path, f'bookmarks_{n_links}.html')
+    corpus.corpus_write(file_html, n_links=n_links, **kwargs)
+    (addresses, soup) = bp.parse_html(file_html, engine='stream')
+    os.remove(file_html)
+    addrStruct = bc.bookmarks()
+    addrStruct.build_address_struct(addresses)
+    file_json = os.path.join(file_path, f'addr_{n_links}.json')
+    addrStruct.write_json(file_json, codec='json')
+    return file_json
+
+
+def bench_codec(codec, file_json):
+    """
+    time one codec on file_json
+
+    Args:
+        codec (str): registered bookmarks_json codec name
+        file_json (str): archive written by bench_archive
+    Returns:
+        (tuple) (load seconds, dump seconds, read seconds, same)
+            same is True if the dump bytes and load dictionary equal the
+            stdlib json codec ones
+    """
+    t1 = time.perf_counter()
+    json_dict = bj.json_load(file_json, codec=codec)
+    seconds_load = time.perf_counter() - t1
+
+    file_dump = file_json + f'.{codec}'
+    t1 = time.perf_counter()
+    bj.json_dump(json_dict, file_dump, codec=codec)
+    seconds_dump = time.perf_counter() - t1
+
+    t1 = time.perf_counter()
+    addrStruct = bc.bookmarks.Address_Struct_Read(file_json, codec=codec)
+    seconds_read = time.perf_counter() - t1
+    del addrStruct
+
+    with open(file_json, 'rb') as fHan_ref, open(file_dump, 'rb') as fHan:
+        same = fHan_ref.read() == fHan.read()
+    os.remove(file_dump)
+    same = same and (json_dict == bj.json_load(file_json, codec='json'))
+    return (seconds_load, seconds_dump, seconds_read, same)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(usage=__doc__)
+    parser.add_argument('-n', '--links', dest='links', type=int, nargs='+',
+                        default=[500000],
+                        help='link counts to generate, default 500000')
+    parser.add_argument('-c', '--codecs', dest='codecs', nargs='+',
+                        default=list(bj.JSON_CODECS),
+                        choices=list(bj.JSON_CODECS),
+                        help='codecs to run, default all registered')
+    parser.add_argument('-d', '--depth', dest='depth', type=int, default=6,
+                        help='maximum folder depth, default 6')
+    parser.add_argument('-r', '--dd-ratio', dest='dd_ratio', type=float,
+                        default=0.2,
+                        help='fraction of links with a description, default 0.2')
+    parser.add_argument('-s', '--seed', dest='seed', type=int, default=350,
+                        help='corpus random seed, default 350')
+    parser.add_argument('-o', '--output', dest='output_file', required=False,
+                        help='append results as json lines to this file')
+    args = parser.parse_args()
+
+    corpus_args = {'depth': args.depth, 'dd_ratio': args.dd_ratio,
+                   'icon_bytes': 0, 'seed': args.seed}
+    results = []
+    print(f'{"codec":<10}{"links":>9}{"MB":>8}{"load s":>9}{"dump s":>9}'
+          f'{"read s":>9}{"load MB/s":>11}{"dump MB/s":>11}{"same":>6}')
+    with tempfile.TemporaryDirectory() as file_path:
+        for n_links in args.links:
+            file_json = bench_archive(file_path, n_links, **corpus_args)
+            mb = os.path.getsize(file_json) / 1048576
+            for codec in args.codecs:
+                (seconds_load, seconds_dump, seconds_read, same) = \
+                    bench_codec(codec, file_json)
+                result = dict(corpus_args, codec=codec, n_links=n_links, mb=mb,
+                              load_s=seconds_load, dump_s=seconds_dump,
+                              read_s=seconds_read,
+                              load_mb_per_s=mb / seconds_load if seconds_load > 0 else None,
+                              dump_mb_per_s=mb / seconds_dump if seconds_dump > 0 else None,
+                              same=same)
+                results.append(result)
+                print(f'{codec:<10}{n_links:>9}{mb:>8.1f}{seconds_load:>9.3f}'
+                      f'{seconds_dump:>9.3f}{seconds_read:>9.3f}'
+                      f'{result["load_mb_per_s"] or 0:>11.1f}'
+                      f'{result["dump_mb_per_s"] or 0:>11.1f}'
+                      f'{"yes" if same else "NO":>6}')
+
+    if args.output_file is not None:
+        with open(args.output_file, 'a') as fHan:
+            for result in results:
+                fHan.write(json.dumps(result) + '\n')
+
+    if not all(result['same'] for result in results):
+        print('a codec wrote different bytes or loaded a different dictionary')
+        sys.exit(1)
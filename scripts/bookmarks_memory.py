@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+benchmark the memory of the bookmarks_class bookmark storage
+
+generates a synthetic bookmark file with pybookmark.bookmarks_corpus for
+each link count, parses it once and then builds the url keyed bookmark
+dictionary with every storage layout, the way build_address_struct adds a
+new bookmark. each layout runs in its own process so allocations of one do
+not land in the numbers of the next.
+
+storage layouts:
+    attr_dict           bookmarkAttr list plus a per instance dict of the
+                        same lists, the layout before __slots__
+    attr                bookmarkAttr, the list is the only storage
+    columnar            bookmarksColumnar, integer arrays per attribute
+
+reports per layout and link count:
+    MB                  bytes allocated by the built dictionary (tracemalloc)
+    bytes/bookmark      MB per bookmark in bytes
+    build s             seconds to build the dictionary, tracemalloc off
+    read s              seconds for get_value of every field of every bookmark
+
+examples:
+    $ python bookmarks_memory.py
+    $ python bookmarks_memory.py -n 10000 1000000 -l attr
+    # keep the numbers to compare with a later run
+    $ python bookmarks_memory.py -o memory_before.jsonl
+
+@author: Crumbs
+"""
+
+import argparse
+import gc
+import json
+from multiprocessing import Process, Queue
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(__file__))
+import pybookmark.bookmarks_corpus as corpus
+import pybookmark.bookmarks_parse as bp
+import pybookmark.bookmarks_class as bc
+
+
+class bookmarkAttrDict(bc.bookmarkAttr):
+    """ bookmarkAttr with the name keyed dict copy of every field,
+    reproduces the storage before __slots__ for comparison
+    """
+
+    # no __slots__, instances get a __dict__ like the old class
+    def __init__(self, *args):
+        self.data = {}
+        super().__init__(*args)
+
+    def set_value(self, key, value, overwrite:bool=False):
+        super().set_value(key, value, overwrite=overwrite)
+        index = key if type(key) == int else self.bookmark_map_reverse[key]
+        self.data[self.bookmark_map_forward[index]] = self[index]
+
+    def get_dict(self):
+        return self.data
+
+
+# layout: (dictionary class, bookmark attribute class)
+MEMORY_LAYOUTS = {'attr_dict': (dict, bookmarkAttrDict),
+                  'attr': (dict, bc.bookmarkAttr),
+                  'columnar': (bc.bookmarksColumnar, bc.bookmarkAttr)}
+
+
+def memory_build(layout, addresses):
+    """
+    build the url keyed dictionary of addresses with the layout class
+
+    Args:
+        layout (str): one of MEMORY_LAYOUTS
+        addresses (list): parsedAddress records
+    Returns:
+        (dict) url: bookmark attribute object
+    """
+    (dict_class, attr_class) = MEMORY_LAYOUTS[layout]
+    built = dict_class()
+    for addr in addresses:
+        new_bookmark = attr_class(())
+        new_bookmark.set_array_keys(
+            **{'label': [addr.label],
+               'age': addr.add_date,
+               'tags': [addr.tags],
+               'location': [addr.location.strip()],
+               'description': [addr.description],
+               'file location': [addr.file_location],
+               'last modified': addr.last_modified,
+               })
+        built[addr.url] = new_bookmark
+    return built
+
+
+def memory_layout(layout, file_use):
+    """
+    measure one layout on file_use and return (MB, build s, read s, bookmarks)
+    meant to run in a fresh process, see memory_run
+
+    the parse is outside the measurement, the strings it made are shared by
+    every layout so only the storage the layout adds is counted
+
+    Args:
+        layout (str): one of MEMORY_LAYOUTS
+        file_use (str): generated bookmark file
+    Returns:
+        (tuple) (MB allocated, build seconds, read seconds, number of bookmarks)
+    """
+    (addresses, soup) = bp.parse_html(file_use, engine='stream')
+    gc.collect()
+
+    t1 = time.perf_counter()
+    built = memory_build(layout, addresses)
+    seconds_build = time.perf_counter() - t1
+    del built
+    gc.collect()
+
+    tracemalloc.start()
+    built = memory_build(layout, addresses)
+    gc.collect()
+    (current, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    keys = list(bc.bookmarkAttr.bookmark_map_forward.values())
+    t1 = time.perf_counter()
+    for bookmark in built.values():
+        for key in keys:
+            bookmark.get_value(key)
+    seconds_read = time.perf_counter() - t1
+    return (current / 1048576, seconds_build, seconds_read, len(built))
+
+
+def memory_queue(queue, layout, file_use):
+    """ put the memory_layout output on queue """
+    queue.put(memory_layout(layout, file_use))
+
+
+def memory_run(layout, file_use):
+    """ run memory_layout in a new process, see memory_layout """
+    queue = Queue()
+    process = Process(target=memory_queue, args=(queue, layout, file_use))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(usage=__doc__)
+    parser.add_argument('-n', '--links', dest='links', type=int, nargs='+',
+                        default=[10000, 100000],
+                        help='link counts to generate, default 10000 100000')
+    parser.add_argument('-l', '--layouts', dest='layouts', nargs='+',
+                        default=list(MEMORY_LAYOUTS), choices=list(MEMORY_LAYOUTS),
+                        help='storage layouts to run, default all')
+    parser.add_argument('-d', '--depth', dest='depth', type=int, default=6,
+                        help='maximum folder depth, default 6')
+    parser.add_argument('-r', '--dd-ratio', dest='dd_ratio', type=float,
+                        default=0.2,
+                        help='fraction of links with a description, default 0.2')
+    parser.add_argument('-s', '--seed', dest='seed', type=int, default=350,
+                        help='corpus random seed, default 350')
+    parser.add_argument('-o', '--output', dest='output_file', required=False,
+                        help='append results as json lines to this file')
+    args = parser.parse_args()
+
+    corpus_args = {'depth': args.depth, 'dd_ratio': args.dd_ratio,
+                   'icon_bytes': 0, 'seed': args.seed}
+    results = []
+    print(f'{"layout":<12}{"links":>9}{"MB":>9}{"bytes/bookmark":>16}'
+          f'{"build s":>10}{"read s":>9}')
+    with tempfile.TemporaryDirectory() as file_path:
+        for n_links in args.links:
+            file_use = os.path.join(file_path, f'bookmarks_{n_links}.html')
+            corpus.corpus_write(file_use, n_links=n_links, **corpus_args)
+            for layout in args.layouts:
+                (mb, seconds_build, seconds_read, n_bookmarks) = \
+                    memory_run(layout, file_use)
+                result = dict(corpus_args, layout=layout, n_links=n_links,
+                              bookmarks=n_bookmarks, mb=mb,
+                              bytes_per_bookmark=mb * 1048576 / max(n_bookmarks, 1),
+                              build_s=seconds_build, read_s=seconds_read)
+                results.append(result)
+                print(f'{layout:<12}{n_bookmarks:>9}{mb:>9.2f}'
+                      f'{result["bytes_per_bookmark"]:>16.0f}'
+                      f'{seconds_build:>10.3f}{seconds_read:>9.3f}')
+
+    if args.output_file is not None:
+        with open(args.output_file, 'a') as fHan:
+            for result in results:
+                fHan.write(json.dumps(result) + '\n')
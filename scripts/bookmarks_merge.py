@@ -11,14 +11,23 @@ creates output files:
     duplicate_addr_labels.txt           url, label:::labelN csv
                                             use file to update .tab version
     merge_process_failed.txt            html files that failed to import
+    merge_process_diagnostics.jsonl     one json line per file that failed or
+                                            had malformed html skipped:
+                                            file, status, errors, diagnostics
+    merge_process_stats.jsonl           one json line per file: bytes, links,
+                                            folders, descriptions, parse and
+                                            pre-processing seconds, peak MB
+    parse_cache/                        parsed file cache, see -c and -n
     addr_original.json                  addrStruct exported right after merge
     addr.json                           addrStruct reduced
+    addr.json.manifest                  files merged into addr.json and their
+                                            modification time, see -j and -f
     
 input files used to modify/reduce bookmark sets:
     duplicate_addr_labels.tab           duplicate label mapping
-                                        read by bp.file_read_label_mod_by_addr()
+                                        read by support.file_read_label_mod_by_addr()
     location_set_mapping.tab            file that lists by file location modification lookups
-                                        read by bp.file_read_file_location_mod()
+                                        read by support.file_read_file_location_mod()
     data/bookmarks_merge.yaml           some configuration variables are mappings
 
 structure of the created final merged json file is a dictionary
@@ -37,6 +46,9 @@ examples:
     # using yaml configuration for how to reduce bookmarks
     $ python bookmarks_merge.py -y data/bookmark_merge.yaml /data_dir /data_dir/bookmarks_merged/
 
+    # add only the new or changed files to the last archive
+    $ python bookmarks_merge.py -j /data_dir/bookmarks_merged/addr.<time>.json /data_dir /data_dir/bookmarks_merged/
+
 caveats:
     Do not name any html output as with bookmark in the name
     Do not run on more than a few files in spyder it is much faster in console
@@ -49,6 +61,7 @@ caveats:
 """
 
 import argparse
+import json
 import yaml
 
 # ref: https://stackoverflow.com/questions/8804830/python-multiprocessing-picklingerror-cant-pickle-type-function
@@ -89,13 +102,15 @@ if __name__ == '__main__':
                         help='call to set debug mode; hardcoded paths')
     parser.add_argument('file_path', 
                         type=str,
-                        help='file path for bookmarks.html files.' +\
+                        help='file path for bookmarks.html files and ' +\
+                            'Firefox profile places.sqlite and Chromium ' +\
+                            'profile Bookmarks files. ' +\
                             'used as default output_path if not defined otherwise')
     parser.add_argument('-m', '--multiprocessors', dest='nprocesses',
                         required=False, 
-                        help='Integer. If set uses N processes. Else 1' +\
-                            'Code checks and forces max processes to CPU-1' +\
-                            'Currently does not work due to underling code')
+                        help='Integer. If set uses N processes. Else 1. ' +\
+                            'Code checks and forces max processes to CPU-1. ' +\
+                            'Bookmark files are parsed in parallel.')
     parser.add_argument('output',
                         type=str,
                         help='''file path for output file
@@ -113,6 +128,22 @@ if __name__ == '__main__':
                         required=False, 
                         action='store_true',
                         help='''If set do not timestamp.''')
+    parser.add_argument('-c', '--cache', dest='cache_path',
+                        required=False, 
+                        help='''Directory of the parse cache. Bookmark files
+                            already parsed with the same content are read
+                            from the cache instead of parsed again.
+                            Default is parse_cache in the output path.''')
+    parser.add_argument('-n', dest='cache_no',
+                        required=False, 
+                        action='store_true',
+                        help='''If set do not use the parse cache.''')
+    parser.add_argument('-f', '--full', dest='manifest_no',
+                        required=False, 
+                        action='store_true',
+                        help='''If set parse all files. Else files listed in
+                            the manifest of the -j json file, <json>.manifest,
+                            with the same modification time are skipped.''')
     parser.add_argument('-y', '--config', type=str, default=None,
                         help='yaml config file path for modification variables.')
                         
@@ -121,10 +152,6 @@ if __name__ == '__main__':
     debug = args.debug
     file_path = args.file_path
 
-    sys.setrecursionlimit(10000)    # this really needs to expand as necessary
-        # gets stuck on some files. therefore disabled
-        # 3000 did not work for newer files from datamonster for unknown reasons
-
     # define paths (can be overwritten by yaml)
     if args.output is None:
         output_path = file_path
@@ -193,57 +220,86 @@ if __name__ == '__main__':
         print('Defined output_path does not exist, create it.')
         os.makedirs(output_path)
 
+    if args.cache_no:
+        cache_path = None
+    elif args.cache_path is not None:
+        cache_path = args.cache_path
+    else:
+        cache_path = os.path.join(output_path, 'parse_cache')
+
     # - import existing json structure to append to
+    manifest = None     # files already merged into the json structure
     if (args.json_file is not None) and os.path.exists(args.json_file):
         addrStruct = bc.bookmarks.Address_Struct_Read(args.json_file)
         if len(addrStruct) > 0:
             print(f'Read {len(addrStruct)} urls from {args.json_file}')
+        manifest = bp.parse_manifest_read(args.json_file + '.manifest')
     else:
         addrStruct = bc.bookmarks()
    
+    # addresses are bc.parsedAddress records
+    #   label (did call description before), url, add_date = age, tags,
+    #   location, description, file_location
+    
+    # get the unique set of unaltered address locations while parsing
+    addrloc = {}
+    def addr_batches(batches):
+        for addresses in batches:
+            if debug:
+                for addrlist in addresses:
+                    addrloc[addrlist.location.strip()] = 1
+            yield addresses
+    
     # - run code to merge the bookmarks found in the input file_path
+    # build dictionary by address and list data structure one file at a time
+    # merges but does not clean the data
     print('Start reading input path')
     t1 = time.time()
-    addresses, file_ages, bad_files = bp.parse_path(file_path, ncpu=ncpu)
+    file_ages = {}
+    bad_files = []
+    diagnostics = {}    # key = file, value = errors the parse skipped over
+    file_stats = []     # parse telemetry per file
+    addrStruct.build_address_struct_batches(addr_batches(
+        bp.iter_parse_path(file_path, file_ages, bad_files, ncpu=ncpu,
+                           cache_path=cache_path,
+                           manifest=None if args.manifest_no else manifest,
+                           diagnostics=diagnostics, file_stats=file_stats)))
+        # key = addr
+        # [0] = label
+        # [1] = age
+        # [2] = tags
+        # [3] = location
+        # [4] = description
+        # [5] = file location
+        # [6] = last modified
     t2 = time.time()
     print(f'{script_name} parse time for {len(file_ages)} files = {t2-t1} seconds')
-    print(f'encountered {len(bad_files)} bad files')
+    print(f'encountered {len(bad_files)} bad files, '
+          f'{len(diagnostics) - len(bad_files)} files with recovered errors')
     
     with open(os.path.join(output_path, 'merge_process_failed.txt'), 'wt') as fHan:
         for bad_file in bad_files:
             fHan.write(bad_file + '\n')
-    
-    # addresses definition
-    #   [0] = label (did call description before)
-    #   [1] = url
-    #   [2] = age
-    #   [6] = tags
-    #   [7] = location
-    #   [8] = file or description if 10 elements
-    #   [9] = file if 10 elements
+    with open(os.path.join(output_path, 'merge_process_diagnostics.jsonl'),
+              'wt') as fHan:
+        bad_set = set(bad_files)
+        for (fileNow, errors) in diagnostics.items():
+            fHan.write(json.dumps({
+                'file': fileNow,
+                'status': 'failed' if fileNow in bad_set else 'recovered',
+                'errors': len(errors),
+                'diagnostics': errors}) + '\n')
+    bp.parse_stats_write(os.path.join(output_path, 'merge_process_stats.jsonl'),
+                         file_stats)
+    for record in sorted(file_stats, key=lambda x: -x['parse_seconds'])[0:5]:
+        print(f'parse time {record["parse_seconds"]:.3f} seconds, '
+              f'{record["links"]} links, {record["bytes"]} bytes: {record["file"]}')
     
     if debug:
-        # get the unique set of unaltered address locations
-        addrloc = {}
-        for addrlist in addresses:
-            addr_loc = addrlist[7].strip()
-            addrloc[addr_loc] = 1
-        
         with open(os.path.join(output_path, 'addr_locations.txt'), 'wt') as fHan:
             for addr_loc in sorted(addrloc.keys()):
                 fHan.write(addr_loc + '\n')
     
-    # build dictionary by address and list data structure
-    # merges but does not clean the data
-    addrStruct.build_address_struct(addresses)
-        # key = addr
-        # [0] = label
-        # [1] = age
-        # [2] = tags
-        # [3] = location
-        # [4] = description
-        # [5] = file location
-    
     print(f'set of unique addresses: {len(addrStruct)}')
 
     # create _original name and save unaltered address set to it
@@ -259,7 +315,7 @@ if __name__ == '__main__':
         # no timestamp
         file_parts[0] = file_parts[0] + '_original'
     output_file_original = ''.join(file_parts)
-    addrStruct.bc.write_json(os.path.join(output_path, output_file_original))
+    addrStruct.write_json(os.path.join(output_path, output_file_original))
 
     #
     # YYY: below this point need to remove all parse_html output variables
@@ -445,7 +501,7 @@ if __name__ == '__main__':
     addr_label_mod_dict = {}
     if os.path.exists(mod_file):
         # - mod_file exists so can read and apply to reduce duplication
-        addr_label_mod_dict = bp.file_read_label_mod_by_addr(mod_file, addr_label_mod_dict)
+        addr_label_mod_dict = support.file_read_label_mod_by_addr(mod_file, addr_label_mod_dict)
         
         # change duplicate labels by url to a single label, 
         #   for urls in addr_label_mod_dict replace all labels with a 
@@ -586,7 +642,7 @@ if __name__ == '__main__':
     loc_label_dict = {}
     if os.path.exists(loc_label_file):
         # - location mod_file exists so can read and apply to simplify file locations
-        loc_label_dict = bp.file_read_file_location_mod(loc_label_file, loc_label_dict)
+        loc_label_dict = support.file_read_file_location_mod(loc_label_file, loc_label_dict)
     for addr in addrStruct:
         path_list = []
         for pathn in addrStruct[addr].get_value('file location'):
@@ -607,10 +663,13 @@ if __name__ == '__main__':
     #-------------------------------------------------------------------------
     # - cleanup non-empty empty lists: ie 'None', '', and None values
     #-------------------------------------------------------------------------
-    addrStruct.bc.clean_address_struct(emptyContentDropSet)
+    addrStruct.clean_address_struct(emptyContentDropSet)
     
     #-------------------------------------------------------------------------
     # - generate output files
     #-------------------------------------------------------------------------
-    addrStruct.bc.write_json(os.path.join(output_path, output_file_basename))
+    addrStruct.write_json(os.path.join(output_path, output_file_basename))
+    bp.parse_manifest_write(
+        os.path.join(output_path, output_file_basename) + '.manifest',
+        file_ages, manifest)
     
\ No newline at end of file
@@ -30,7 +30,10 @@ setup(
     packages=find_packages(exclude=['tests']),   # find all the sub-packages
     # packages=find_packages('pybookmark/', exclude=['tests']),  this version fails because the installed module can never be found
     include_package_data=True,
-    py_modules=["pybookmark.bookmarks_class",
+    py_modules=["pybookmark.bookmarks_browser",
+                "pybookmark.bookmarks_class",
+                "pybookmark.bookmarks_corpus",
+                "pybookmark.bookmarks_json",
                 "pybookmark.bookmarks_parse",
                 "pybookmark.pybookmarkjsonviewer",
                 "pybookmark.support"],
@@ -64,4 +67,7 @@ setup(
         # "webbrowser",
         "pyyaml",
     ],
+    extras_require={
+        "fast": ["orjson"],     # faster json archive load/dump, optional
+    },
 )
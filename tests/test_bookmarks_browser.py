@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bookmarks_browser tests
+
+note pytest only runs against function if it is named test_*() not *_tests()
+
+@author: Crumbs
+"""
+
+import json
+import sqlite3
+from pybookmark import bookmarks_browser as bb
+from pybookmark import bookmarks_class as bc
+from pybookmark import bookmarks_parse as bp
+
+
+# moz_bookmarks rows: id, type, fk, parent, position, title, guid
+#   type 1 = bookmark, 2 = folder, 3 = separator
+PLACES_BOOKMARKS = [
+    (1, 2, None, 0, 0, '', 'root________'),
+    (2, 2, None, 1, 0, 'menu', 'menu________'),
+    (3, 2, None, 1, 1, 'toolbar', 'toolbar_____'),
+    (4, 2, None, 1, 2, 'tags', 'tags________'),
+    (5, 2, None, 1, 3, 'unfiled', 'unfiled_____'),
+    (6, 1, 1, 2, 0, 'Menu One', 'b1'),
+    (7, 2, None, 2, 1, 'Folder A', 'f1'),
+    (8, 1, 2, 7, 0, 'A One', 'b2'),
+    (9, 2, None, 7, 1, 'Sub', 'f2'),
+    (10, 1, 3, 9, 0, 'Sub One', 'b3'),
+    (11, 3, None, 7, 2, None, 's1'),
+    (12, 1, 4, 7, 3, 'A Two', 'b4'),
+    (13, 1, 5, 2, 2, 'Menu Two', 'b5'),
+    (14, 1, 6, 2, 3, 'Recently Bookmarked', 'b6'),
+    (15, 1, 7, 3, 0, 'Toolbar One', 'b7'),
+    (16, 1, 8, 5, 0, 'Other One', 'b8'),
+    (17, 2, None, 4, 0, 'tag_b', 't1'),
+    (18, 2, None, 4, 1, 'tag_a', 't2'),
+    (19, 1, 8, 17, 0, None, 'tb1'),
+    (20, 1, 8, 18, 0, None, 'tb2'),
+    (21, 1, 2, 18, 0, None, 'tb3'),
+    ]
+PLACES_URLS = [(1, 'http://m1.com/'), (2, 'http://a1.com/'),
+               (3, 'http://s1.com/'), (4, 'http://a2.com/'),
+               (5, 'http://m2.com/'), (6, 'place:sort=12'),
+               (7, 'http://t1.com/'), (8, 'http://o1.com/')]
+
+# the export firefox writes for the database above
+PLACES_HTML = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks Menu</H1>
+
+<DL><p>
+    <DT><A HREF="http://m1.com/" ADD_DATE="1600000006" LAST_MODIFIED="1600000106">Menu One</A>
+    <DT><H3 ADD_DATE="1600000007" LAST_MODIFIED="1600000107">Folder A</H3>
+    <DL><p>
+        <DT><A HREF="http://a1.com/" ADD_DATE="1600000008" LAST_MODIFIED="1600000108" TAGS="tag_a">A One</A>
+        <DT><H3 ADD_DATE="1600000009" LAST_MODIFIED="1600000109">Sub</H3>
+        <DL><p>
+            <DT><A HREF="http://s1.com/" ADD_DATE="1600000010" LAST_MODIFIED="1600000110">Sub One</A>
+        </DL><p>
+        <HR>
+        <DT><A HREF="http://a2.com/" ADD_DATE="1600000012" LAST_MODIFIED="1600000112" SHORTCUTURL="kw">A Two</A>
+    </DL><p>
+    <DT><A HREF="http://m2.com/" ADD_DATE="1600000013" LAST_MODIFIED="1600000113">Menu Two</A>
+    <DT><A HREF="place:sort=12" ADD_DATE="1600000014" LAST_MODIFIED="1600000114">Recently Bookmarked</A>
+    <DT><H3 ADD_DATE="1600000003" LAST_MODIFIED="1600000103" PERSONAL_TOOLBAR_FOLDER="true">Bookmarks Toolbar</H3>
+    <DL><p>
+        <DT><A HREF="http://t1.com/" ADD_DATE="1600000015" LAST_MODIFIED="1600000115">Toolbar One</A>
+    </DL><p>
+    <DT><H3 ADD_DATE="1600000005" LAST_MODIFIED="1600000105" UNFILED_BOOKMARKS_FOLDER="true">Other Bookmarks</H3>
+    <DL><p>
+        <DT><A HREF="http://o1.com/" ADD_DATE="1600000016" LAST_MODIFIED="1600000116" TAGS="tag_a,tag_b">Other One</A>
+    </DL><p>
+</DL>
+"""
+
+
+def places_sqlite(FILENAME):
+    """ write a minimal places.sqlite with the columns read_places uses """
+    connection = sqlite3.connect(FILENAME)
+    connection.executescript(
+        'CREATE TABLE moz_places (id INTEGER PRIMARY KEY, url LONGVARCHAR);'
+        'CREATE TABLE moz_bookmarks (id INTEGER PRIMARY KEY, type INTEGER, '
+        '  fk INTEGER, parent INTEGER, position INTEGER, title LONGVARCHAR, '
+        '  dateAdded INTEGER, lastModified INTEGER, guid TEXT);'
+        'CREATE TABLE moz_keywords (id INTEGER PRIMARY KEY, keyword TEXT, '
+        '  place_id INTEGER, post_data TEXT);')
+    connection.executemany('INSERT INTO moz_places VALUES (?, ?)', PLACES_URLS)
+    connection.executemany(
+        'INSERT INTO moz_bookmarks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [row[0:6] + ((1600000000 + row[0]) * 1000000,
+                     (1600000100 + row[0]) * 1000000, row[6])
+         for row in PLACES_BOOKMARKS])
+    connection.execute("INSERT INTO moz_keywords VALUES (1, 'kw', 4, NULL)")
+    connection.commit()
+    connection.close()
+
+
+def test_read_places(tmp_path):
+    file_places = str(tmp_path / 'places.sqlite')
+    places_sqlite(file_places)
+    file_html = tmp_path / 'bookmarks.html'
+    file_html.write_text(PLACES_HTML)
+    assert bb.is_places_file(file_places)
+
+    address_places = bb.read_places(file_places)
+    (address_html, soup) = bp.parse_html(str(file_html), detach=True)
+    assert [addr.url for addr in address_places] == \
+        ['http://m1.com/', 'http://a1.com/', 'http://s1.com/', 'http://a2.com/',
+         'http://m2.com/', 'http://t1.com/', 'http://o1.com/']
+    assert address_places == address_html
+
+
+def test_parse_path_places(tmp_path):
+    (tmp_path / 'profile').mkdir()
+    places_sqlite(str(tmp_path / 'profile' / 'places.sqlite'))
+    (addresses, file_ages, bad_files) = bp.parse_path(str(tmp_path))
+    assert list(file_ages.keys()) == [str(tmp_path / 'profile' / 'places.sqlite')]
+    assert len(addresses) == 7
+    assert addresses[-1].location == 'Bookmarks Menu::Other Bookmarks'
+    assert addresses[-1].file_location == str(tmp_path / 'profile' / 'places.sqlite')
+
+
+def chromium_url(name, url, date_added):
+    return {'date_added': date_added, 'guid': url, 'id': url, 'name': name,
+            'type': 'url', 'url': url}
+
+
+def chromium_folder(name, children):
+    return {'children': children, 'date_added': '13285932710373502',
+            'date_modified': '0', 'guid': name, 'id': name, 'name': name,
+            'type': 'folder'}
+
+
+def chromium_json(FILENAME, n_extra=0):
+    """ write a Chromium profile Bookmarks file """
+    other = [chromium_url('Other One', 'http://o1.com/', '13285932710373502'),
+             chromium_folder('Deep', [chromium_folder('Deeper', [
+                 chromium_url('', 'http://d1.com/', '0')])])]
+    other += [chromium_url(f'x {i}', f'http://x{i}.com/', '13285932710373502')
+              for i in range(n_extra)]
+    roots = {'bookmark_bar': chromium_folder('Bookmarks bar', [
+                 chromium_url('Bar One', 'http://b1.com/', '13285932710373502'),
+                 chromium_folder('Folder A', [
+                     chromium_url('A One', 'http://a1.com/', '13285932720000000')]),
+                 chromium_url('Bar Two', 'http://b2.com/', '13285932710373502')]),
+             'other': chromium_folder('Other bookmarks', other),
+             'synced': chromium_folder('Mobile bookmarks', [])}
+    with open(FILENAME, 'w') as fJson:
+        json.dump({'checksum': '0', 'roots': roots, 'version': 1}, fJson)
+
+
+def test_read_chromium(tmp_path):
+    file_use = str(tmp_path / 'Bookmarks')
+    chromium_json(file_use)
+    assert bb.is_chromium_file(file_use)
+    address_set = bb.read_chromium(file_use)
+    assert [addr.url for addr in address_set] == \
+        ['http://b1.com/', 'http://a1.com/', 'http://b2.com/', 'http://o1.com/',
+         'http://d1.com/']
+    assert address_set[1].location == 'Bookmarks::Bookmarks bar::Folder A'
+    assert address_set[-1].location == 'Bookmarks::Other bookmarks::Deep::Deeper'
+    assert address_set[-1].label == 'empty_string'
+    assert address_set[-1].add_date is None
+    # 13285932710373502 microseconds from 1601 = 2022-01-06 UTC
+    assert address_set[0].add_date == '1641459110'
+
+    # - records go straight into the bookmarks structure
+    addr_struct = bc.bookmarks()
+    addr_struct.build_address_struct(
+        bb.read_chromium_iter(file_use, file_location=file_use))
+    assert len(addr_struct) == 5
+    assert addr_struct['http://a1.com/'].get_value('age') == bc.AgeAsInt(1641459120)
+    assert addr_struct['http://a1.com/'].get_value('file location') == [file_use]
+
+
+def test_parse_path_chromium(tmp_path):
+    (tmp_path / 'Default').mkdir()
+    file_use = str(tmp_path / 'Default' / 'Bookmarks')
+    chromium_json(file_use, n_extra=2000)
+    (addresses, file_ages, bad_files) = bp.parse_path(str(tmp_path))
+    assert list(file_ages.keys()) == [file_use]
+    assert len(addresses) == 2005
+    assert addresses[0].file_location == file_use
@@ -9,7 +9,11 @@ note pytest only runs against function if it is named test_*() not *_tests()
 """
 
 import datetime
-from pybookmark.bookmarks_class import AgeAsInt, bookmarkAttr, bookmarks
+import json
+import pytest
+from pybookmark import bookmarks_parse as bp
+from pybookmark.bookmarks_class import AgeAsInt, bookmarkAttr, bookmarks, \
+    bookmarksColumnar, parsedAddress
     
 def test_AgeAsInt():
     a = AgeAsInt(5)
@@ -38,6 +42,7 @@ def bookmark_attr_reference():
         3:'location',
         4:'description',
         5:'file location',
+        6:'last modified',
     """
     ref_bookmark = [
         ['the label'],
@@ -45,7 +50,8 @@ def bookmark_attr_reference():
         ['some tags'],
         ['location string'],
         ['descriptive string'],
-        ['where file?']
+        ['where file?'],
+        [AgeAsInt(2e6)]
         ]
     return ref_bookmark
 
@@ -58,6 +64,7 @@ def bookmark_attr_reference2():
         3:'location',
         4:'description',
         5:'file location',
+        6:'last modified',
     """
     ref_bookmark = [
         ['category tag: awesome bookmark '],  # extra space on purpose to test
@@ -65,6 +72,7 @@ def bookmark_attr_reference2():
         ['link', 'python'],          # duplicate tags to test
         ['category::sub-category'],  # note :: division
         ['descriptive string'],
+        [],
         []
         ]
     return ref_bookmark
@@ -81,6 +89,7 @@ def test_bookmark_attr():
     assert x.bookmark_map_forward[3] == 'location'
     assert x.bookmark_map_forward[4] == 'description'
     assert x.bookmark_map_forward[5] == 'file location'
+    assert x.bookmark_map_forward[6] == 'last modified'
     
     assert x.bookmark_map_reverse['label'] == 0
     assert x.bookmark_map_reverse['age'] == 1
@@ -88,6 +97,7 @@ def test_bookmark_attr():
     assert x.bookmark_map_reverse['location'] == 3
     assert x.bookmark_map_reverse['description'] == 4
     assert x.bookmark_map_reverse['file location'] == 5
+    assert x.bookmark_map_reverse['last modified'] == 6
     
     # - test direct values as assigned, and by get_value; handle age separately
     assert ref_bookmark[0] == x.get_value('label')
@@ -314,6 +324,120 @@ def test_bookmark():
     
     # - test unique
 
+def test_parsed_address():
+    addr = parsedAddress('link', 'https://link1.com', '23', None, None, None,
+                         'tag', 'loc')
+    assert addr.description is None and addr.file_location is None
+    assert addr[7] == 'loc'
+    # legacy 9 element lists have no description, 10 element lists do
+    assert parsedAddress.from_list(list(addr)[0:8] + ['fl']) == \
+        addr._replace(file_location='fl')
+    assert parsedAddress.from_list(list(addr)[0:8] + ['desc', 'fl']) == \
+        addr._replace(description='desc', file_location='fl')
+    assert parsedAddress.from_list(addr) is addr
+    with pytest.raises(ValueError):
+        parsedAddress.from_list(list(addr)[0:7])
+
+    bb = bookmarks()
+    bb.build_address_struct([addr._replace(description='desc', file_location='fl')])
+    assert bb['https://link1.com'].get_value('description') == ['desc']
+    assert bb['https://link1.com'].get_value('file location') == ['fl']
+
+
+def test_search_tags_times(capsys):
+    addresses = [
+        parsedAddress('one', 'https://one.com', '100', '500', None, None,
+                      'python, news,', 'loc', None, 'f1'),
+        parsedAddress('two', 'https://two.com', '200', '300', None, None,
+                      'news', 'loc', None, 'f1'),
+        parsedAddress('three', 'https://three.com', '300', None, None, None,
+                      None, 'loc', None, 'f1'),
+        # same link in a newer file, tags are added and last modified kept
+        #   as the newest like age is kept as the oldest
+        parsedAddress('two', 'https://two.com', '250', '700', None, None,
+                      'pythonic,news', 'loc', None, 'f2'),
+        ]
+    bb = bookmarks()
+    bb.build_address_struct(addresses)
+    assert bb['https://one.com'].get_value('tags') == ['python', 'news']
+    assert bb['https://two.com'].get_value('tags') == ['news', 'pythonic']
+    assert bb['https://one.com'].get_value('tags')[1] is \
+        bb['https://two.com'].get_value('tags')[0]
+    assert bb['https://two.com'].get_value('age') == AgeAsInt(200)
+    assert bb['https://two.com'].get_value('last modified') == AgeAsInt(700)
+    assert bb['https://three.com'].get_value('last modified') == []
+
+    # - the indexed search finds what a scan of every value would
+    assert bb.index is None
+    assert bb.search_address_struct('^news$', 'tags') == \
+        ['https://one.com', 'https://two.com']
+    assert bb.index is not None
+    assert bb.search_address_struct('python', 2) == \
+        ['https://one.com', 'https://two.com']
+    assert bb.search_address_struct('PYTHON$', 2, ignore_case=True) == \
+        ['https://one.com']
+    assert bb.search_address_struct('>150', 'age') == \
+        ['https://two.com', 'https://three.com']
+    assert bb.search_address_struct('<200', 1) == ['https://one.com']
+    assert bb.search_address_struct('>500', 'last modified') == \
+        ['https://two.com']
+    assert bb.search_address_struct(
+        '<1000', 6, url_list=['https://two.com', 'https://one.com']) == \
+        ['https://two.com', 'https://one.com']
+
+    # - a time pattern that is not ># or <# finds nothing and says why
+    capsys.readouterr()
+    assert bb.search_address_struct('>abc', 'age') == []
+    assert 'must be an integer' in capsys.readouterr().out
+    for pattern in ['150', '=150', '']:
+        assert bb.search_address_struct(pattern, 6) == []
+        assert 'pattern must be ># or <#' in capsys.readouterr().out
+
+    # - changes clear the index
+    new_bookmark = bookmarkAttr(())
+    new_bookmark.set_array_keys(**{'label': 'four', 'age': 400,
+                                   'tags': 'news,misc',
+                                   'last modified': 800})
+    bb.add('https://four.com', new_bookmark)
+    assert bb.index is None
+    assert bb.search_address_struct('news', 2) == \
+        ['https://one.com', 'https://two.com', 'https://four.com']
+    assert bb.search_address_struct('>750', 6) == ['https://four.com']
+
+    # - archives written before last modified existed and with tags kept as
+    #   one string still read
+    b2 = bookmarks({'https://old.com': [['old'], '100', ['a,b'], ['loc'],
+                                        [], ['f1']]})
+    assert b2['https://old.com'].get_value('tags') == ['a', 'b']
+    assert b2['https://old.com'].get_value('last modified') == []
+    assert b2.search_address_struct('^b$', 2) == ['https://old.com']
+    assert bb['https://two.com'].serialize()[6] == '700'
+
+
+def test_bookmark_attr_storage():
+    ref_bookmark = bookmark_attr_reference()
+    x = bookmarkAttr(ref_bookmark)
+    # - one storage location per field, no per instance dict
+    assert not hasattr(x, '__dict__')
+    with pytest.raises(AttributeError):
+        x.data = {}
+    assert x.get_dict()['tags'] is x[2]
+    x.set_value('tags', 'later', overwrite=True)
+    assert x.get_dict()['tags'] == ['later']
+    assert x.get_value('no such key') is None
+
+    # - short lists read the missing fields as undefined
+    y = bookmarkAttr([['short'], 100])
+    assert y.get_value('tags') is None
+    assert y.get_array()[2:] == [[], [], [], [], []]
+    assert y.get_dict() == {'label': ['short'], 'age': [AgeAsInt(100)]}
+
+    # - json archives round trip
+    bb = bookmarks({'https://x.com': ref_bookmark})
+    b2 = bookmarks(bb.serialize())
+    assert b2['https://x.com'].get_array() == bb['https://x.com'].get_array()
+
+
 def bookmark_test_dev_code():
     # these are development tests not intended to be automated
     x = bookmarkAttr((6,5,[5,5],6,[1,2]))
@@ -388,4 +512,177 @@ def bookmark_test_json_print_ba():
     y = {'url1':x1, 'url2':x2}
     filename = '/home/darkknight/Documents/temp/bookmark_test_json1.json'
     with open(filename, 'w') as fJson:
-        json.dump(y, fJson, indent=2)
\ No newline at end of file
+        json.dump(y, fJson, indent=2)
+
+def test_bookmarks_columnar():
+    ref_bookmark = bookmark_attr_reference()
+    addresses = [
+        parsedAddress('one', 'https://one.com', '100', '500', None, None,
+                      'python, news', 'Menu::Tech', 'desc one', 'f1'),
+        parsedAddress('two', 'https://two.com', '200', None, None, None,
+                      'news', 'Menu::Tech', None, 'f1'),
+        parsedAddress('two', 'https://two.com', '150', '700', None, None,
+                      'misc', 'Menu::Other', None, 'f2'),
+        ]
+    bb = bookmarks({'https://x.com': ref_bookmark})
+    bb.build_address_struct(addresses)
+    bc = bookmarksColumnar({'https://x.com': ref_bookmark})
+    bc.build_address_struct(addresses)
+
+    # - same dictionary, same archive
+    assert isinstance(bc, bookmarks)
+    assert bc == bb and bb == bc
+    assert list(bc.keys()) == list(bb.keys())
+    assert bc.serialize() == bb.serialize()
+    assert bc['https://two.com'].get_value('age') == AgeAsInt(150)
+    assert bc['https://two.com'].get_value('location') == ['Menu::Tech', 'Menu::Other']
+    # equal locations and file locations share one table value
+    assert bc.columns[3].table.count('Menu::Tech') == 1
+    assert len(bc.columns[5].table) == len(set(bc.columns[5].table))
+
+    # - searches match the bookmarks dictionary
+    for (pattern, element) in [('Tech', 'location'), ('^two$', 0), ('^news$', 2),
+                               ('desc', 4), ('f2', 5), ('>120', 1), ('<600', 6),
+                               ('one', -1)]:
+        assert bc.search_address_struct(pattern, element) == \
+            bb.search_address_struct(pattern, element)
+
+    # - set_value on a row is written back, in place list changes are not
+    bc['https://one.com'].set_value('tags', 'later', overwrite=True)
+    assert bc['https://one.com'].get_value('tags') == ['later']
+    bc['https://one.com'][2].append('lost')
+    assert bc['https://one.com'].get_value('tags') == ['later']
+    bc.clean_address_struct(['', 'None', None])
+    bc.unique()
+    assert bc.search_address_struct('^later$', 'tags') == ['https://one.com']
+
+    # - delete and compact keep the rest
+    bc.delete('https://x.com')
+    assert 'https://x.com' not in bc and len(bc) == 2
+    before = bc.serialize()
+    n_values = len(bc.columns[0].values)
+    bc.compact()
+    assert len(bc.columns[0].values) < n_values
+    assert bc.serialize() == before
+    assert bc.copy() == bc
+    assert bc.pop('https://two.com').get_value('label') == ['two']
+    assert bc.get('https://two.com') is None
+
+
+def test_intern_memory_stats(tmp_path):
+    # separate str objects like json.load makes for every occurrence
+    location = 'Bookmarks Menu::Tech::Python'
+    dict_in = {f'https://{n}.com': [[f'label {n}'], str(n), [],
+                                    [''.join(list(location))], [],
+                                    [''.join(list('f1.html'))], []]
+               for n in range(20)}
+    assert dict_in['https://0.com'][3][0] is not dict_in['https://1.com'][3][0]
+    bb = bookmarks(dict_in)
+    assert bb['https://0.com'].get_value('location')[0] is \
+        bb['https://1.com'].get_value('location')[0]
+    stats = bb.memory_stats()
+    assert stats['location']['values'] == 20
+    assert stats['location']['objects'] == 1
+    assert stats['file location']['objects'] == 1
+    assert stats['label']['objects'] == 20
+    assert stats['label']['bytes_saved'] == 0
+    assert stats['total']['bytes_saved'] == \
+        stats['location']['bytes_saved'] + stats['file location']['bytes_saved'] > 0
+    assert stats['total']['interned'] == 2
+
+    # - json archives and the merge build share values the same way
+    file_use = str(tmp_path / 'addr.json')
+    bb.write_json(file_use)
+    b2 = bookmarks.Address_Struct_Read(file_use)
+    assert b2.memory_stats()['location']['objects'] == 1
+    b2.build_address_struct([
+        parsedAddress('new', 'https://new.com', '100', None, None, None,
+                      None, ''.join(list(location)), None, 'f2.html')])
+    assert b2['https://new.com'].get_value('location')[0] is \
+        b2['https://0.com'].get_value('location')[0]
+    assert b2.memory_stats()['location']['objects'] == 1
+
+
+def test_read_json_trusted(tmp_path):
+    file_use = 'data/addr.json'
+    file_out = str(tmp_path / 'addr.json')
+    # - archives without the header are validated
+    bb = bookmarks.Address_Struct_Read(file_use)
+    bb['https://two.com'] = bookmarkAttr([['two'], [AgeAsInt(5), AgeAsInt(9)],
+                                          ['a', 'b'], ['loc'], [], ['f1'], []])
+    bb.write_json(file_out)
+    with open(file_out) as fHan:
+        json_dict = json.load(fHan)
+    assert list(json_dict) == [bookmarks.schema_key, bookmarks.bookmarks_key]
+    assert json_dict[bookmarks.schema_key]['version'] == bookmarks.schema_version
+    assert json_dict[bookmarks.bookmarks_key] == bb.serialize()
+
+    # - written by write_json: the trusted and validating loads agree
+    b_trusted = bookmarks.Address_Struct_Read(file_out)
+    b_valid = bookmarks.Address_Struct_Read(file_out, validate=True)
+    assert b_trusted == bb
+    assert b_valid == bb
+    assert b_trusted.serialize() == bb.serialize()
+    assert type(b_trusted['https://two.com'].get_value('age')) is AgeAsInt
+    assert b_trusted['https://two.com'].get_value('age', age_drop_list=False) == \
+        [AgeAsInt(5), AgeAsInt(9)]
+    assert bookmarks.Address_Struct_Read(file_out, columnar=True) == bb
+
+    # - other schema versions are validated, the header is not a url
+    json_dict[bookmarks.schema_key]['version'] = bookmarks.schema_version + 1
+    json_dict[bookmarks.bookmarks_key]['https://three.com'] = \
+        [[' three '], '7', ['x,y'], ['loc'], [], []]
+    b_other = bookmarks(json_dict)
+    assert list(b_other) == list(bb) + ['https://three.com']
+    assert b_other['https://three.com'].get_value('label') == ['three']
+    assert b_other['https://three.com'].get_value('tags') == ['x', 'y']
+
+    # - the flat {url: value} archives written before the header are read
+    b_flat = bookmarks(json_dict[bookmarks.bookmarks_key])
+    assert b_flat == b_other
+
+
+def test_bookmarks_columnar_merge_again():
+    # merging the same archive again changes nothing so adds no table values
+    (addresses, soup) = bp.parse_html('data/bookmarks.html', engine='stream')
+    assert len(addresses) > 0
+    bc = bookmarksColumnar()
+    bc.build_address_struct(addresses)
+    sizes = {index: (len(column.table or []), len(column.values))
+             for (index, column) in bc.columns.items()}
+    before = bc.serialize()
+    for repeat in range(2):
+        bc.build_address_struct(addresses)
+        assert {index: (len(column.table or []), len(column.values))
+                for (index, column) in bc.columns.items()} == sizes
+    assert bc.serialize() == before
+
+    # - a new label keeps the id of the label the row had
+    url = addresses[0].url
+    bc[url].set_value('label', 'new label')
+    assert len(bc.columns[0].table) == sizes[0][0] + 1
+    assert bc[url].get_value('label') == [addresses[0].label, 'new label']
+    # only the attribute set is written
+    assert len(bc.columns[3].values) == sizes[3][1]
+
+
+def test_bookmarks_columnar_append():
+    # - more than 65535 values in one row
+    tags = ','.join(f't{i}' for i in range(70000))
+    bc = bookmarksColumnar()
+    bc.build_address_struct([
+        parsedAddress('many', 'https://many.com', '100', None, None, None,
+                      tags, 'loc', None, 'f1')])
+    assert len(bc['https://many.com'].get_value('tags')) == 70000
+
+    # - a row that can not be stored leaves every column unchanged
+    lengths = [(len(column), len(column.count)) for column in bc.columns.values()]
+    with pytest.raises(TypeError):
+        bc['https://bad.com'] = bookmarkAttr([['bad'], [], [['x']], [], [], [], []])
+    assert 'https://bad.com' not in bc
+    assert [(len(column), len(column.count))
+            for column in bc.columns.values()] == lengths
+    bc['https://good.com'] = bookmarkAttr([['good'], [AgeAsInt(5)], ['x'],
+                                           ['loc'], [], ['f1'], []])
+    assert bc['https://good.com'].get_value('tags') == ['x']
+    assert bc['https://many.com'].get_value('label') == ['many']
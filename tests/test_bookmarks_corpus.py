@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bookmarks_corpus tests
+
+note pytest only runs against function if it is named test_*() not *_tests()
+
+@author: Crumbs
+"""
+
+import pytest
+from pybookmark import bookmarks_corpus as corpus
+from pybookmark import bookmarks_parse as bp
+
+
+def test_corpus_deterministic():
+    kwargs = {'n_links': 500, 'depth': 3, 'dd_ratio': 0.3, 'icon_bytes': 100,
+              'emoji_ratio': 0.2}
+    assert corpus.corpus_html(**kwargs) == corpus.corpus_html(**kwargs)
+    assert corpus.corpus_html(**kwargs) != corpus.corpus_html(seed=1, **kwargs)
+
+
+@pytest.mark.parametrize('n_links, depth', [(0, 0), (1, 4), (400, 0), (3000, 8)])
+def test_corpus_parse(tmp_path, n_links, depth):
+    file_use = str(tmp_path / 'bookmarks_corpus.html')
+    n_bytes = corpus.corpus_write(file_use, n_links=n_links, depth=depth,
+                                  dd_ratio=0.25, icon_bytes=300, emoji_ratio=0.1)
+    assert n_bytes == len(open(file_use, 'rb').read())
+    (address_soup, soup) = bp.parse_html(file_use)
+    (address_stream, soup) = bp.parse_html(file_use, engine='stream')
+    # every generated link is parsed once by both engines
+    assert len(address_soup) == n_links
+    assert address_stream == address_soup
+    # every link is in its folder in the file
+    for address_set in (address_soup, address_stream):
+        report = bp.verify_parsed_output(address_set, file_use)
+        assert report['links'] == n_links
+        assert bp.verify_problems(report) == 0
+    if n_links > 1000:
+        assert max(addr.location.count('::') for addr in address_soup) == depth
+        assert 500 < sum(addr.description is not None for addr in address_soup) < 1000
+        assert not any('ICON' in addr.label for addr in address_soup)
+
+
+def test_corpus_invalid():
+    with pytest.raises(ValueError):
+        corpus.corpus_html(n_links=-1)
+    with pytest.raises(ValueError):
+        corpus.corpus_html(dd_ratio=2)
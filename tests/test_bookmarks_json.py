@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bookmarks_json tests
+
+note pytest only runs against function if it is named test_*() not *_tests()
+
+@author: Crumbs
+"""
+
+import gc
+import json
+import pytest
+from pybookmark import bookmarks_json as bj
+from pybookmark.bookmarks_class import bookmarks
+
+JSON_OBJECT = {
+    'https://a.com/?q=1&r="2"': [['Crème brûlée \U0001F600'], '1615987239',
+                                 ['a', 'b'], ['Menu::Tech '], [],
+                                 ['f\\1.html'], []],
+    'ctrl\x01\t\n': [[65, None, True], ['1', '2'], [], [], [], [], '7'],
+    }
+
+
+@pytest.mark.parametrize('indent', [None, 2, 4])
+def test_codec_same_bytes(tmp_path, indent):
+    files = {}
+    for name in bj.JSON_CODECS:
+        files[name] = str(tmp_path / f'{name}.json')
+        bj.json_dump(JSON_OBJECT, files[name], indent=indent, codec=name)
+        assert bj.json_load(files[name], codec=name) == JSON_OBJECT
+    with open(files['json'], 'rb') as fHan:
+        data_json = fHan.read()
+    # the stdlib json module reads it and it is utf-8
+    assert json.loads(data_json.decode('utf-8')) == JSON_OBJECT
+    assert 'Crème'.encode('utf-8') in data_json
+    for name in files:
+        with open(files[name], 'rb') as fHan:
+            assert fHan.read() == data_json
+
+
+def test_codec_registry(tmp_path):
+    assert bj.codec_get('json').name == 'json'
+    assert bj.codec_get().name == ('orjson' if bj.orjson is not None else 'json')
+    with pytest.raises(ValueError):
+        bj.codec_get('no such codec')
+
+    # - a registered codec is used by read_json and write_json
+    calls = []
+
+    def load_count(fHan):
+        calls.append('load')
+        return bj.json_stdlib_load(fHan)
+
+    def dump_count(obj, fHan, indent=None):
+        calls.append('dump')
+        bj.json_stdlib_dump(obj, fHan, indent)
+
+    order = list(bj.JSON_CODEC_ORDER)
+    try:
+        bj.codec_register('count', load_count, dump_count, prefer=True)
+        assert bj.codec_get().name == 'count'
+        file_use = str(tmp_path / 'addr.json')
+        bb = bookmarks.Address_Struct_Read('data/addr.json')
+        bb.write_json(file_use)
+        assert bookmarks.Address_Struct_Read(file_use) == bb
+        assert bookmarks.Address_Struct_Read(file_use, codec='json') == bb
+        assert calls == ['load', 'dump', 'load']
+    finally:
+        del bj.JSON_CODECS['count']
+        bj.JSON_CODEC_ORDER[:] = order
+    assert bj.codec_get().name != 'count'
+
+
+def test_gc_paused():
+    assert gc.isenabled()
+    with pytest.raises(KeyError):
+        with bj.gc_paused():
+            assert not gc.isenabled()
+            with bj.gc_paused():
+                pass
+            # - the inner block leaves it paused
+            assert not gc.isenabled()
+            raise KeyError('x')
+    assert gc.isenabled()
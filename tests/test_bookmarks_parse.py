@@ -0,0 +1,683 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bookmarks_parse tests
+
+note pytest only runs against function if it is named test_*() not *_tests()
+    file paths are relative to the repository root like test_bookmarks_classes
+
+@author: Crumbs
+"""
+
+import bz2
+import gzip
+import json
+import lzma
+import os
+import pytest
+import random
+import re
+import subprocess
+import sys
+import zipfile
+from pybookmark import bookmarks_class as bc
+from pybookmark import bookmarks_parse as bp
+
+parse_files = ['data/bookmarks.html',
+               'data/bookmarks_test.html',
+               'data/bookmarks_nested_test.html']
+
+
+@pytest.mark.parametrize('file_use', parse_files)
+@pytest.mark.parametrize('add_empty', [True, False])
+def test_parse_html_stream(file_use, add_empty):
+    # - stream engine must match the soup engine address set exactly
+    (address_soup, soup) = bp.parse_html(file_use, ADD_EMPTY=add_empty)
+    (address_stream, no_soup) = bp.parse_html(file_use, ADD_EMPTY=add_empty,
+                                              engine='stream')
+    assert no_soup is None
+    assert len(address_soup) > 0
+    assert address_stream == address_soup
+
+
+def test_parse_html_stream_folders():
+    (address_set, soup) = bp.parse_html('data/bookmarks_nested_test.html',
+                                        engine='stream')
+    locations = {addr.url: addr.location for addr in address_set}
+    assert locations['http://top.com/'] == 'Bookmarks Menu'
+    assert locations['http://s1.com/'] == 'Bookmarks Menu::Folder A::Sub'
+    # empty folder and sub folder are left before the next link
+    assert locations['http://a3.com/'] == 'Bookmarks Menu::Folder A'
+    assert locations['http://top2.com/'] == 'Bookmarks Menu'
+    # recently bookmarked is dropped, descriptions are appended
+    assert 'place:x' not in locations
+    assert address_set[0].description.strip() == 'top description  here'
+    assert address_set[2].description is None
+
+
+def test_parse_html_engine_invalid():
+    with pytest.raises(ValueError):
+        bp.parse_html('data/bookmarks.html', engine='dom')
+
+
+def bookmark_html_nested(depth):
+    """ return bookmark html text with folders nested depth levels deep """
+    lines = ['<!DOCTYPE NETSCAPE-Bookmark-file-1>',
+             '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">',
+             '<TITLE>Bookmarks</TITLE>',
+             '<H1>Bookmarks Menu</H1>',
+             '<DL><p>']
+    for i in range(depth):
+        lines += [f'<DT><H3>F{i}</H3>',
+                  '<DL><p>',
+                  f'<DT><A HREF="http://in{i}.com/" ADD_DATE="{i}">In {i}</A>']
+    for i in range(depth):
+        lines += ['</DL><p>',
+                  f'<DT><A HREF="http://out{i}.com/" ADD_DATE="{i}">Out {i}</A>']
+    lines += ['</DL>']
+    return '\n'.join(lines) + '\n'
+
+
+def test_get_children_deep(tmp_path):
+    # - deeper than the default recursion limit of getChildren before
+    depth = 1500
+    file_use = tmp_path / 'deep_bookmarks.html'
+    file_use.write_text(bookmark_html_nested(depth))
+    (address_soup, soup) = bp.parse_html(str(file_use))
+    (address_stream, soup) = bp.parse_html(str(file_use), engine='stream')
+    assert len(address_soup) == 2 * depth
+    assert address_soup == address_stream
+    assert address_soup[depth - 1][7].count('::') == depth
+    assert address_soup[-1][7] == 'Bookmarks Menu'
+
+
+def test_parse_path_ncpu(tmp_path):
+    # - a file that can not be parsed, a Chromium Bookmarks file is json
+    file_bad = tmp_path / 'Bookmarks'
+    file_bad.write_text('<TITLE>Bookmarks</TITLE>\n<DL><p>\n</DL>\n')
+    files = parse_files + [str(file_bad), 'data/addr.json']
+    (addresses, file_ages, bad_files) = bp.parse_path(files, ncpu=1)
+    assert bad_files == [str(file_bad)]
+    assert list(file_ages.keys()) == parse_files
+    assert addresses[0][-1] == parse_files[0]
+    assert addresses[-1][-1] == parse_files[-1]
+
+    # - pool output must be the same and in the same order
+    (addresses2, file_ages2, bad_files2) = bp.parse_path(files, ncpu=2)
+    assert addresses2 == addresses
+    assert file_ages2 == file_ages
+    assert bad_files2 == bad_files
+    assert all(type(x) is str for addr in addresses2 for x in addr[0:2])
+
+
+BOOKMARK_HTML_LATIN1 = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=ISO-8859-1">
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks Menu</H1>
+<DL><p>
+    <DT><H3>Caf\u00e9</H3>
+    <DL><p>
+        <DT><A HREF="http://cafe.com/" ICON="data:image/png;base64,AAAA">Cr\u00e8me br\u00fbl\u00e9e</A>
+    </DL><p>
+</DL><p>
+"""
+
+
+@pytest.mark.parametrize('engine', ['soup', 'stream'])
+def test_parse_html_charset(tmp_path, engine):
+    # - the META charset is used, not the platform default encoding
+    file_use = tmp_path / 'latin1_bookmarks.html'
+    file_use.write_bytes(BOOKMARK_HTML_LATIN1.encode('latin-1'))
+    stats = {}
+    errors = []
+    (addresses, soup) = bp.parse_html(str(file_use), engine=engine,
+                                      stats=stats, detach=True, errors=errors)
+    assert [(addr.label, addr.location) for addr in addresses] == \
+        [('Cr\u00e8me br\u00fbl\u00e9e', 'Bookmarks Menu::Caf\u00e9')]
+    assert stats['charset'] == 'iso8859-1'
+    assert stats['decode_errors'] == 0
+    assert stats['icon_bytes'] == len('ICON="data:image/png;base64,AAAA"')
+    assert errors == []
+
+    # - a utf-8 byte order mark is dropped, invalid bytes are replaced and
+    #   reported instead of failing the file
+    file_use.write_bytes(b'\xef\xbb\xbf' + BOOKMARK_HTML_LATIN1.replace(
+        'ISO-8859-1', 'UTF-8').encode('utf-8').replace(b'br\xc3\xbb', b'br\xfb'))
+    stats = {}
+    errors = []
+    (addresses, soup) = bp.parse_html(str(file_use), engine=engine,
+                                      stats=stats, detach=True, errors=errors)
+    # U+FFFD is in the EMOJI_CLASS range html_preprocess drops
+    assert addresses[0].label == 'Cr\u00e8me brl\u00e9e'
+    assert stats['charset'] == 'utf-8'
+    assert stats['decode_errors'] == 1
+    assert [error['error'].split(':')[0] for error in errors] == \
+        ['UnicodeDecodeError']
+
+    # - a charset python does not know is read as utf-8 and reported
+    file_use.write_bytes(BOOKMARK_HTML_LATIN1.replace(
+        'ISO-8859-1', 'x-no-such').encode('utf-8'))
+    errors = []
+    (addresses, soup) = bp.parse_html(str(file_use), engine=engine,
+                                      detach=True, errors=errors)
+    assert addresses[0].label == 'Cr\u00e8me br\u00fbl\u00e9e'
+    assert [error['tag'] for error in errors] == ['meta']
+
+
+def test_html_decode_count_per_call(tmp_path):
+    # - a decode in between does not change the count of an other one
+    file_bad = tmp_path / 'bad_bookmarks.html'
+    file_bad.write_bytes(BOOKMARK_HTML_LATIN1.replace('ISO-8859-1', 'UTF-8')
+                         .encode('latin-1'))
+    file_good = tmp_path / 'good_bookmarks.html'
+    file_good.write_bytes(BOOKMARK_HTML_LATIN1.encode('latin-1'))
+    stats_bad = {}
+    stats_good = {}
+    lines = bp.html_read_lines(str(file_bad), stats=stats_bad)
+    text = next(lines)
+    bp.html_read(str(file_good), stats=stats_good)
+    text += ''.join(lines)
+    assert stats_good['decode_errors'] == 0
+    assert stats_bad['decode_errors'] == 4
+    assert text.count('\ufffd') == 4
+    assert bp.HTML_DECODE_MARK not in text
+
+
+def test_parse_path_archive(tmp_path):
+    file_html = 'data/bookmarks_nested_test.html'
+    with open(file_html, 'rb') as fileHan:
+        html = fileHan.read()
+    (address_html, soup) = bp.parse_html(file_html, detach=True)
+    (tmp_path / 'old').mkdir()
+    for (name, compress) in (('bookmarks.html.gz', gzip.compress),
+                             ('bookmarks.html.bz2', bz2.compress),
+                             ('old/bookmarks.html.xz', lzma.compress)):
+        (tmp_path / name).write_bytes(compress(html))
+    with zipfile.ZipFile(tmp_path / 'backup.zip', 'w',
+                         zipfile.ZIP_DEFLATED) as fZip:
+        fZip.writestr('2019/bookmarks_laptop.html', html)
+        fZip.writestr('2019/notes.html', html)
+        fZip.writestr('2019/bookmarks.txt', 'not html')
+    files_before = sorted(tmp_path.rglob('*'))
+
+    # - every file is read without extracting anything to disk, the zip
+    #   member is named by the archive path joined with its name
+    file_member = str(tmp_path / 'backup.zip' / '2019' / 'bookmarks_laptop.html')
+    files = [str(tmp_path / 'bookmarks.html.gz'),
+             str(tmp_path / 'bookmarks.html.bz2'),
+             str(tmp_path / 'old' / 'bookmarks.html.xz'), file_member]
+    assert sorted(bp.parse_path_files(str(tmp_path))) == sorted(files)
+    (addresses, file_ages, bad_files) = bp.parse_path(
+        files, cache_path=str(tmp_path / 'cache'))
+    assert bad_files == []
+    assert list(file_ages.keys()) == files
+    assert addresses == [addr._replace(file_location=fileNow)
+                         for fileNow in files for addr in address_html]
+    assert bp.file_stat(file_member)[0] == len(html)
+    assert bp.file_hash(file_member) == bp.file_hash(file_html)
+    assert sorted(path for path in tmp_path.rglob('*')
+                  if 'cache' not in path.parts) == files_before
+
+    # - the archives are cached like any other file
+    (addresses2, file_ages2, bad_files2) = bp.parse_path(
+        files, cache_path=str(tmp_path / 'cache'))
+    assert addresses2 == addresses
+    assert file_ages2 == file_ages
+
+
+@pytest.mark.parametrize('engine', ['soup', 'stream'])
+def test_verify_parsed_output(engine):
+    file_use = 'data/bookmarks_nested_test.html'
+    (address_set, soup) = bp.parse_html(file_use, engine=engine, detach=True)
+    report = bp.verify_parsed_output(address_set, file_use)
+    assert (report['links'], report['parsed']) == (6, 6)
+    assert bp.verify_problems(report) == 0
+
+    # - each kind of wrong parse is reported once
+    address_bad = [address_set[0]._replace(location='Bookmarks Menu::Folder A'),
+                   address_set[1]._replace(url='http://a1.org/'),
+                   address_set[2], address_set[4], address_set[5],
+                   address_set[5]._replace(url='http://new.com/', label='New')]
+    report = bp.verify_parsed_output(address_bad, file_use)
+    assert report['folder'] == [{'url': 'http://top.com/', 'label': 'Top & level',
+                                 'location': 'Bookmarks Menu',
+                                 'parsed_location': 'Bookmarks Menu::Folder A'}]
+    assert [link['parsed_url'] for link in report['href']] == ['http://a1.org/']
+    assert [link['url'] for link in report['missing']] == ['http://s1.com/']
+    assert [link['url'] for link in report['extra']] == ['http://new.com/']
+    assert bp.verify_problems(report) == 4
+
+    # - without the empty label fill the link with no label is lost
+    (address_set, soup) = bp.parse_html(file_use, ADD_EMPTY=False,
+                                        engine=engine, detach=True)
+    report = bp.verify_parsed_output(address_set, file_use, ADD_EMPTY=False)
+    assert [link['url'] for link in report['missing']] == ['http://a2.com/']
+
+
+BOOKMARK_HTML_MALFORMED = """<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks Menu</H1>
+<DL><p>
+    <DD>description with no link
+    <DT><A HREF="http://one.com/">One</A>
+    <DT><H3>Bold <b>folder</b></H3>
+    <DL><p>
+        <DT><A HREF="http://two.com/">Two</A>
+    </DL><p>
+</DL><p>
+</DL><p>
+<DL><p>
+    <DT><A HREF="http://three.com/">Three</A>
+</DL><p>
+"""
+
+
+def test_parse_html_recover(tmp_path):
+    file_use = tmp_path / 'malformed_bookmarks.html'
+    file_use.write_text(BOOKMARK_HTML_MALFORMED)
+    with pytest.raises(IndexError):
+        bp.parse_html(str(file_use))
+
+    # - only the malformed elements are skipped, every link is kept
+    errors = []
+    (address_set, soup) = bp.parse_html(str(file_use), errors=errors)
+    assert [addr.url for addr in address_set] == \
+        ['http://one.com/', 'http://two.com/', 'http://three.com/']
+    assert address_set[1].location == 'Bookmarks Menu::Bold folder'
+    assert address_set[2].location == ''
+    assert [error['tag'] for error in errors] == ['dd', 'h3', 'dl']
+    assert errors[0]['error'].startswith('IndexError')
+    assert errors[1]['location'] == 'Bookmarks Menu'
+    assert errors[1]['fragment'].startswith('<h3>Bold')
+
+    errors_stream = []
+    (address_stream, soup) = bp.parse_html(str(file_use), engine='stream',
+                                           errors=errors_stream)
+    assert address_stream == address_set
+    assert [(error['tag'], error['line']) for error in errors_stream] == \
+        [('dd', 4), ('h3', 6), ('dl', 11), ('dl', 14)]
+
+    # - parse_path parses the file once and reports the recovered errors
+    diagnostics = {}
+    (addresses, file_ages, bad_files) = bp.parse_path(
+        [str(file_use)], diagnostics=diagnostics)
+    assert bad_files == []
+    assert addresses == [addr._replace(file_location=str(file_use))
+                         for addr in address_set]
+    assert diagnostics == {str(file_use): errors}
+
+
+def test_parse_html_recover_dd(tmp_path):
+    # - a description before any link is reported the same by both engines
+    file_use = tmp_path / 'dd_bookmarks.html'
+    file_use.write_text(bookmark_html_nested(0).replace(
+        '<DL><p>', '<DL><p>\n<DD>no link\n<DT><H3>F</H3>', 1))
+    errors = {}
+    for engine in ['soup', 'stream']:
+        errors[engine] = []
+        bp.parse_html(str(file_use), engine=engine, errors=errors[engine])
+    assert errors['soup'][0]['error'] == 'IndexError: description without link'
+    assert [(error['error'], error['tag'], error['location'])
+            for error in errors['soup']] == \
+        [(error['error'], error['tag'], error['location'])
+         for error in errors['stream']]
+    assert len(errors['soup']) == 1
+
+
+def test_parse_path_cache(tmp_path, capsys):
+    cache_path = str(tmp_path / 'parse_cache')
+    (addresses, file_ages, bad_files) = bp.parse_path(parse_files)
+    (addresses1, file_ages1, bad_files1) = bp.parse_path(
+        parse_files, cache_path=cache_path)
+    # bookmarks.html and bookmarks_test.html are the same, one is parsed
+    assert 'parse cache: 0 hits, 2 misses' in capsys.readouterr().out
+    (addresses2, file_ages2, bad_files2) = bp.parse_path(
+        parse_files, ncpu=2, cache_path=cache_path)
+    assert 'parse cache: 2 hits, 0 misses' in capsys.readouterr().out
+    assert addresses1 == addresses
+    assert addresses2 == addresses
+    assert file_ages2 == file_ages
+
+    # - changed content is a miss, copied content is a hit by content hash
+    file_copy = tmp_path / 'copy_bookmarks.html'
+    file_copy.write_text(open(parse_files[0]).read())
+    file_new = tmp_path / 'new_bookmarks.html'
+    file_new.write_text(open(parse_files[2]).read().replace('Top2', 'Top3'))
+    (addresses3, file_ages3, bad_files3) = bp.parse_path(
+        [str(file_copy), str(file_new)], cache_path=cache_path)
+    assert 'parse cache: 1 hits, 1 misses' in capsys.readouterr().out
+    assert addresses3[-1][0] == 'Top3'
+
+
+def test_parse_path_cache_error(tmp_path, capsys, monkeypatch):
+    # - a failed parse is not cached, the next run parses the file again
+    cache_path = str(tmp_path / 'parse_cache')
+    parse_html = bp.parse_html
+
+    def parse_html_fail(*args, **kwargs):
+        raise OSError('disk went away')
+
+    monkeypatch.setattr(bp, 'parse_html', parse_html_fail)
+    (addresses, file_ages, bad_files) = bp.parse_path(
+        parse_files[2:], cache_path=cache_path)
+    assert bad_files == parse_files[2:]
+    assert not bp.parseCache(cache_path).contains(parse_files[2])
+    monkeypatch.setattr(bp, 'parse_html', parse_html)
+    capsys.readouterr()
+    (addresses2, file_ages2, bad_files2) = bp.parse_path(
+        parse_files[2:], cache_path=cache_path)
+    assert bad_files2 == []
+    assert len(addresses2) > 0
+    assert 'parse cache: 0 hits' in capsys.readouterr().out
+
+
+def test_parse_path_stats(tmp_path):
+    cache_path = str(tmp_path / 'parse_cache')
+    file_stats = []
+    (addresses, file_ages, bad_files) = bp.parse_path(
+        parse_files, cache_path=cache_path, file_stats=file_stats)
+    assert [record['file'] for record in file_stats] == parse_files
+    assert [record['source'] for record in file_stats] == \
+        ['parse', 'duplicate', 'parse']
+    assert sum(record['links'] for record in file_stats) == len(addresses)
+    for record in file_stats:
+        assert record['bytes'] == os.path.getsize(record['file'])
+        assert 0 < record['preprocess_seconds'] < record['parse_seconds']
+        assert record['errors'] == 0
+    assert file_stats[0]['icon_bytes'] > 0
+    assert file_stats[2]['folders'] == \
+        len({addr.location for addr in addresses[-file_stats[2]['links']:]})
+
+    # - one json line per file, cached files keep the stats of their parse
+    file_out = str(tmp_path / 'stats.jsonl')
+    bp.parse_stats_write(file_out, file_stats)
+    file_stats2 = []
+    bp.parse_path(parse_files, cache_path=cache_path, file_stats=file_stats2)
+    assert [record['source'] for record in file_stats2] == \
+        ['cache', 'duplicate', 'cache']
+    records = [json.loads(line) for line in open(file_out)]
+    for (record, record2) in zip(records, file_stats2):
+        assert dict(record, source='cache', peak_mb=None) == \
+            dict(record2, source='cache', peak_mb=None)
+
+
+def html_preprocess_reference(fileString, ADD_EMPTY=True):
+    """ the separate whole text re.sub passes html_preprocess replaced """
+    fileString = re.sub('(ICON_URI=").+?"', '', fileString, flags=re.IGNORECASE)
+    fileString = re.sub('(ICON=").+?"', '', fileString, flags=re.IGNORECASE)
+    fileString = bp.string_remove_emoji(fileString)
+    fileString = re.sub("  ", " ", fileString)
+    if ADD_EMPTY:
+        fileString = re.sub(
+               '<DL><p>\\n {1,}</DL><p>',
+               '<DL><p>\\n           <DT><A HREF="empty">empty</A></DL><p>',
+               fileString, flags=re.IGNORECASE)
+        fileString = re.sub('></A>', '>empty_string</A>', fileString,
+                            flags=re.IGNORECASE)
+    return fileString
+
+
+@pytest.mark.parametrize('add_empty', [True, False])
+def test_html_preprocess(add_empty):
+    # - single scan must match the separate passes, including text that
+    #   only becomes a match after an earlier pass removed something
+    pieces = [' ', '  ', '   ', 'x', '\n', '>', '</A>', '</a>', '<DL><p>\n',
+              '</DL><p>', 'ICON="abc"', 'icon_uri="q r"', ' ICON="zz" ',
+              '⚠️', '\U0001F600', '™', '<A HREF="u">', '"']
+    rand = random.Random(350)
+    for n in range(20000):
+        text = ''.join([rand.choice(pieces) for i in range(rand.randint(0, 12))])
+        assert bp.html_preprocess(text, add_empty) == \
+            html_preprocess_reference(text, add_empty)
+
+    for file_use in parse_files:
+        with open(file_use) as fileHan:
+            text = fileHan.read()
+        stats = {}
+        text_out = bp.html_preprocess(text, add_empty, stats)
+        assert text_out == html_preprocess_reference(text, add_empty)
+        if not add_empty:
+            # all ascii or 1 emoji so character count = byte count
+            assert len(text.encode('utf-8')) - len(text_out.encode('utf-8')) == \
+                stats['icon_bytes'] + stats['emoji_bytes'] + stats['space_bytes']
+    assert stats['emoji_bytes'] > 0
+    stats = {}
+    bp.parse_html(parse_files[0], ADD_EMPTY=add_empty, stats=stats)
+    assert stats['icon_bytes'] > 5000
+
+
+def test_parse_path_dedup(tmp_path, capsys):
+    # - copies in other directories and a same size file that differs
+    (tmp_path / 'usb').mkdir()
+    file_copy = tmp_path / 'usb' / 'bookmarks.html'
+    file_copy.write_text(open(parse_files[2]).read())
+    file_same_size = tmp_path / 'usb' / 'bookmarks_same_size.html'
+    file_same_size.write_text(open(parse_files[2]).read().replace('Top2', 'Top3'))
+    files = parse_files + [str(file_copy), str(file_same_size)]
+    (addresses, file_ages, bad_files) = bp.parse_path(files, dedup=False)
+    assert 'duplicate' not in capsys.readouterr().out
+    (addresses2, file_ages2, bad_files2) = bp.parse_path(files, ncpu=2)
+    assert 'parse_path: 2 duplicate files not parsed' in capsys.readouterr().out
+    assert addresses2 == addresses
+    assert file_ages2 == file_ages
+    assert addresses2[-1][-1] == str(file_same_size)
+    assert bp.parse_path_duplicates(files) == {parse_files[1]: parse_files[0],
+                                              str(file_copy): parse_files[2]}
+
+
+def test_iter_parse_path(tmp_path):
+    (addresses, file_ages, bad_files) = bp.parse_path(parse_files)
+    file_ages_iter = {}
+    bad_files_iter = []
+    batches = bp.iter_parse_path(parse_files, file_ages_iter, bad_files_iter)
+    # - one batch per file, yielded before the next file is parsed
+    batch = next(batches)
+    assert list(file_ages_iter.keys()) == parse_files[0:1]
+    batches = [batch] + list(batches)
+    assert len(batches) == len(parse_files)
+    assert [addr for batch in batches for addr in batch] == addresses
+    assert file_ages_iter == file_ages
+    assert bad_files_iter == bad_files == []
+
+    # - build_address_struct from the stream matches the whole list
+    addr_struct = bc.bookmarks()
+    addr_struct.build_address_struct(addresses)
+    addr_struct_iter = bc.bookmarks()
+    count = addr_struct_iter.build_address_struct_batches(
+        bp.iter_parse_path(parse_files, {}, [], ncpu=2,
+                           cache_path=str(tmp_path / 'parse_cache')))
+    assert count == len(addresses)
+    assert addr_struct_iter.serialize() == addr_struct.serialize()
+
+
+def test_parse_html_detach():
+    (address_soup, soup) = bp.parse_html(parse_files[2])
+    (address_detach, no_soup) = bp.parse_html(parse_files[2], detach=True)
+    assert no_soup is None
+    assert address_detach == address_soup
+    assert any(type(x) is not str for addr in address_soup for x in addr)
+    assert all(type(x) is str or x is None
+               for addr in address_detach for x in addr)
+
+
+PARSE_PEAK_RSS = """
+import resource, sys
+from pybookmark import bookmarks_class as bc
+from pybookmark import bookmarks_parse as bp
+addr_struct = bc.bookmarks()
+addr_struct.build_address_struct_batches(
+    bp.iter_parse_path(sys.argv[1:], {}, []))
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def test_parse_path_peak_rss(tmp_path):
+    # - merging 3x the files must not hold 3x the parse trees
+    pytest.importorskip('resource')
+    lines = bookmark_html_nested(0).splitlines()[:-1]
+    for i in range(1500):
+        lines += [f'<DT><A HREF="http://site{i}.com/" ADD_DATE="{i}" '
+                  f'ICON="data:{"x" * 200}">Site {i}</A>',
+                  f'<DD>description {i}']
+    text = '\n'.join(lines + ['</DL>']) + '\n'
+    files = []
+    for i in range(18):
+        file_use = tmp_path / f'bookmarks_{i}.html'
+        file_use.write_text(text)
+        files.append(str(file_use))
+
+    def peak_rss(files):
+        out = subprocess.run([sys.executable, '-c', PARSE_PEAK_RSS] + files,
+                             capture_output=True, text=True, check=True).stdout
+        return int(out.splitlines()[-1])
+    
+    assert peak_rss(files) < 1.25 * peak_rss(files[0:6])
+
+
+def test_parse_path_manifest(tmp_path, capsys):
+    files = []
+    for i in range(3):
+        file_use = tmp_path / f'bookmarks_{i}.html'
+        file_use.write_text(open(parse_files[2]).read().replace('Top2', f'Top{i}'))
+        files.append(str(file_use))
+    (addresses, file_ages, bad_files) = bp.parse_path(files[0:2])
+    file_manifest = str(tmp_path / 'addr.json.manifest')
+    assert bp.parse_manifest_read(file_manifest) == {}
+    bp.parse_manifest_write(file_manifest, file_ages)
+    manifest = bp.parse_manifest_read(file_manifest)
+    assert manifest == file_ages
+
+    # - only the new file and the file with a changed mtime are parsed
+    os.utime(files[1], (file_ages[files[1]] + 10, file_ages[files[1]] + 10))
+    capsys.readouterr()
+    (addresses2, file_ages2, bad_files2) = bp.parse_path(files, manifest=manifest)
+    assert '1 files unchanged since the manifest' in capsys.readouterr().out
+    assert list(file_ages2.keys()) == files[1:3]
+    assert addresses2[-1].label == 'Top2'
+    manifest2 = bp.parse_manifest_write(file_manifest, file_ages2, manifest)
+    assert bp.parse_manifest_read(file_manifest) == manifest2
+    assert sorted(manifest2.keys()) == files
+    (addresses3, file_ages3, bad_files3) = bp.parse_path(files, manifest=manifest2)
+    assert addresses3 == [] and file_ages3 == {}
+
+
+def test_merge_script_manifest(tmp_path):
+    # - bookmarks_merge.py writes the json and manifest then -j only merges
+    #   the new file
+    for module in ['pandas', 'yaml', 'tkinter']:
+        pytest.importorskip(module)
+    path_in = tmp_path / 'in'
+    path_out = tmp_path / 'out'
+    path_in.mkdir()
+    file_out = str(path_out / 'addr.json')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [os.getcwd()] + sys.path))
+
+    def merge(*args):
+        return subprocess.run([sys.executable, 'scripts/bookmarks_merge.py',
+                               '-t', '-n'] + list(args)
+                              + [str(path_in), str(path_out)],
+                              capture_output=True, text=True, env=env,
+                              check=True).stdout
+
+    files = []
+    for i in range(2):
+        file_use = path_in / f'bookmarks_{i}.html'
+        file_use.write_text(open(parse_files[2]).read().replace('Top2', f'Top{i}'))
+        files.append(str(file_use))
+        if i == 0:
+            merge()
+            addr_struct = bc.bookmarks.Address_Struct_Read(file_out)
+            assert os.path.exists(str(path_out / 'addr_original.json'))
+            assert list(bp.parse_manifest_read(file_out + '.manifest')) == files
+    out = merge('-j', file_out)
+    assert '1 files unchanged since the manifest' in out
+    assert sorted(bp.parse_manifest_read(file_out + '.manifest')) == files
+    addr_struct2 = bc.bookmarks.Address_Struct_Read(file_out)
+    assert set(addr_struct).issubset(addr_struct2)
+
+
+BOOKMARK_HTML_SPLIT = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<TITLE>Bookmarks</TITLE>
+<H1>Bookmarks Menu</H1>
+
+<DL><p>
+    <DT><A HREF="http://top.com/">Top</A>
+    <DT><H3>Folder A</H3>
+    <DD>folder description
+    <DL><p>
+        <DT><A HREF="http://a1.com/">A one</A>
+        <DD>a one  description
+    </DL><p>
+    <DT><H3>Folder B</H3>
+    <DL><p>
+        <DT><H3>Empty</H3>
+        <DL><p>
+        </DL><p>
+        <DT><A HREF="http://b1.com/" ICON="data:x">B one</A>
+    </DL><p>
+    <DT><H3>Folder C</H3>
+    <DL><p>
+        <DT><A HREF="http://c1.com/"></A>
+        <DD>without ADD_EMPTY the link is dropped and this describes B one
+    </DL><p>
+    <DT><A HREF="http://top2.com/">Top2</A>
+</DL>
+"""
+
+
+@pytest.mark.parametrize('engine', ['soup', 'stream'])
+def test_parse_html_split(tmp_path, engine):
+    from pybookmark import bookmarks_corpus as corpus
+    file_use = str(tmp_path / 'bookmarks_split.html')
+    corpus.corpus_write(file_use, n_links=3000, depth=4, dd_ratio=0.3,
+                        icon_bytes=100, emoji_ratio=0.1)
+    (head, tail, chunks) = bp.html_split_folders(open(file_use).read(), 8)
+    assert len(chunks) > 2
+    assert head + ''.join(chunk[0] for chunk in chunks) + tail == \
+        open(file_use).read()
+
+    stats = {}
+    (address_set, soup) = bp.parse_html(file_use, engine=engine, detach=True,
+                                        stats=stats)
+    stats_split = {}
+    (address_split, soup) = bp.parse_html_split(file_use, ncpu=2, engine=engine,
+                                                stats=stats_split)
+    assert address_split == address_set
+    for key in ('icon_bytes', 'emoji_bytes', 'space_bytes'):
+        assert stats_split[key] == stats[key]
+
+    # - a dd before the first link of a chunk and an empty folder
+    file_use = tmp_path / 'bookmarks_split_dd.html'
+    file_use.write_text(BOOKMARK_HTML_SPLIT)
+    # ncpu=3 asks for 12 chunks
+    assert '<DT><H3>Folder C</H3>' in [chunk[0][0:21] for chunk in
+        bp.html_split_folders(BOOKMARK_HTML_SPLIT, 12)[2]]
+    for add_empty in (True, False):
+        (address_set, soup) = bp.parse_html(str(file_use), engine=engine,
+                                            detach=True, ADD_EMPTY=add_empty)
+        (address_split, soup) = bp.parse_html_split(
+            str(file_use), ncpu=3, engine=engine, ADD_EMPTY=add_empty)
+        assert address_split == address_set
+    assert address_set[2].description.startswith('without ADD_EMPTY')
+
+
+def test_parse_path_split(tmp_path, monkeypatch):
+    file_use = tmp_path / 'bookmarks_split.html'
+    file_use.write_text(BOOKMARK_HTML_SPLIT)
+    (addresses, file_ages, bad_files) = bp.parse_path([str(file_use)])
+    # - a single file with ncpu > 1 is split over the processes
+    monkeypatch.setattr(bp, 'PARSE_SPLIT_BYTES', 0)
+    calls = []
+    parse_html_split = bp.parse_html_split
+    def parse_html_split_count(*args, **kwargs):
+        calls.append(args[0])
+        return parse_html_split(*args, **kwargs)
+    monkeypatch.setattr(bp, 'parse_html_split', parse_html_split_count)
+    (addresses2, file_ages2, bad_files2) = bp.parse_path([str(file_use)],
+                                                         ncpu=2)
+    assert calls == [str(file_use)]
+    assert addresses2 == addresses
+
+    # - the text is not split when there is no single root dl
+    assert bp.html_split_folders(BOOKMARK_HTML_MALFORMED, 4) == \
+        ('', '', [(BOOKMARK_HTML_MALFORMED, 0)])